@@ -1,6 +1,40 @@
+import atexit
+
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db.models import CharField
+from django.db.models.functions import Upper
+from django.db.models.signals import post_migrate, post_save, post_delete
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api.models import Vehicle
+        from api.signals import (
+            apply_sqlite_pragmas, create_trigram_indexes, create_search_index, install_query_metrics,
+            invalidate_vehicles_cache,
+        )
+        from utils.datalog import flush_data_log
+
+        # Преобразование `<поле>__upper` позволяет использовать функциональные индексы по UPPER(<поле>)
+        CharField.register_lookup(Upper)
+
+        # Профиль параметров SQLite применяется к каждому новому соединению
+        connection_created.connect(apply_sqlite_pragmas)
+        # Запросы к БД учитываются в метриках запроса к API (см. api.middleware)
+        connection_created.connect(install_query_metrics)
+
+        post_migrate.connect(create_trigram_indexes, sender=self)
+        post_migrate.connect(create_search_index, sender=self)
+
+        # Кэш ответов API (см. utils.cache) сбрасывается при любом изменении записей о транспортных средствах
+        post_save.connect(invalidate_vehicles_cache, sender=Vehicle)
+        post_delete.connect(invalidate_vehicles_cache, sender=Vehicle)
+
+        # Буфер записей лог-таблицы сохраняется после отправки ответа на каждый запрос и при завершении процесса
+        request_finished.connect(flush_data_log)
+        atexit.register(flush_data_log)
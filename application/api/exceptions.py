@@ -6,3 +6,10 @@ class VehicleAPIException(APIException):
     status_code = 500
     default_detail = 'Service temporarily unavailable, try again later.'
     default_code = 'service_unavailable'
+
+
+class UploadRangeException(VehicleAPIException):
+    """ Переданная часть файла не продолжает уже полученные данные. """
+    status_code = 416
+    default_detail = 'Requested range not satisfiable.'
+    default_code = 'range_not_satisfiable'
@@ -1,10 +1,20 @@
-from django.db.models import QuerySet
+from django.db.models import QuerySet, Value
+from django.db.models.functions import Upper
 from rest_framework.request import Request
 
 from api.models import Vehicle
 from utils.views import build_field_lookup
 
 
+def database_upper(value: str) -> Upper:
+    """
+    Приводит значение фильтра к верхнему регистру функцией UPPER базы данных, как и значение поля.
+
+    Функции СУБД и Python различаются: UPPER в SQLite не изменяет регистр букв кириллицы, а `str.upper` - изменяет.
+    """
+    return Upper(Value(value))
+
+
 def vehicle_list_filter(request: Request) -> QuerySet:
     """
     Реализует фильтрацию списка транспортных средств по предоставленным параметрам.
@@ -16,12 +26,15 @@ def vehicle_list_filter(request: Request) -> QuerySet:
     filters.update(build_field_lookup(request=request, parameter='make', filtering_method='icontains'))
     filters.update(build_field_lookup(request=request, parameter='model', filtering_method='icontains'))
     filters.update(build_field_lookup(request=request, parameter='color', filtering_method='icontains'))
-    filters.update(
-        build_field_lookup(request=request, parameter='registration_number', filtering_method='iexact'))
+    # Идентификаторы сравниваются без учёта регистра по UPPER(<поле>) = UPPER(<значение>), что позволяет
+    # использовать индексы
+    filters.update(build_field_lookup(
+        request=request, parameter='registration_number', filtering_method='upper', normalize=database_upper))
     filters.update(build_field_lookup(request=request, parameter='year_of_manufacture'))
-    filters.update(build_field_lookup(request=request, parameter='vin', filtering_method='iexact'))
-    filters.update(
-        build_field_lookup(request=request, parameter='vehicle_certificate_number', filtering_method='iexact'))
+    filters.update(build_field_lookup(
+        request=request, parameter='vin', filtering_method='upper', normalize=database_upper))
+    filters.update(build_field_lookup(
+        request=request, parameter='vehicle_certificate_number', filtering_method='upper', normalize=database_upper))
     filters.update(build_field_lookup(request=request, parameter='vehicle_certificate_date'))
 
     if filters:
@@ -0,0 +1,143 @@
+import asyncio
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+
+BENCHMARK_USERNAME = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Измеряет пропускную способность запущенного сервера API при большом количестве одновременных клиентов ' \
+           '(например, uWSGI с представлениями /api/vehicles/ и сервер ASGI с представлениями /api/async/vehicles/).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='+', help='Адреса для запросов, например http://127.0.0.1:8000/api/vehicles/.')
+        parser.add_argument('--clients', type=int, default=200, help='Количество одновременных клиентов.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Время измерения для каждого адреса, секунд.')
+        parser.add_argument('--interval', type=float, default=0.0,
+                            help='Пауза клиента между запросами, секунд (клиенты, опрашивающие API).')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Время ожидания ответа, секунд.')
+        parser.add_argument('--username', default=BENCHMARK_USERNAME,
+                            help='Пользователь, от имени которого выполняются запросы (создаётся при отсутствии).')
+
+    def handle(self, *args, **options):
+        # Сессия создаётся в базе данных, которую использует сервер: проверка пароля при базовой аутентификации
+        # каждого запроса заняла бы больше времени, чем сам запрос
+        user, _ = User.objects.get_or_create(username=options['username'])
+        client = Client()
+        client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+        for url in options['url']:
+            parts = urlsplit(url)
+            if parts.scheme != 'http' or not parts.hostname:
+                raise CommandError(f'Поддерживаются только адреса http://: {url}')
+
+            latencies, errors, elapsed = asyncio.run(self._run(parts, cookie, options))
+            self._report(url, latencies, errors, elapsed)
+
+    async def _run(self, parts, cookie: str, options: dict) -> tuple[list[float], list[str], float]:
+        """ Запускает `clients` клиентов, отправляющих запросы по одному соединению keep-alive до истечения времени. """
+        path = f'{parts.path or "/"}?{parts.query}' if parts.query else parts.path or '/'
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\nCookie: {cookie}\r\n\r\n'
+        ).encode('latin-1')
+
+        latencies, errors = [], []
+        started_at = time.perf_counter()
+        deadline = started_at + options['duration']
+        await asyncio.gather(*(
+            self._client(parts.hostname, parts.port or 80, request, deadline, options, latencies, errors)
+            for _ in range(options['clients'])
+        ))
+        return latencies, errors, time.perf_counter() - started_at
+
+    async def _client(self, host: str, port: int, request: bytes, deadline: float, options: dict,
+                      latencies: list, errors: list):
+        # Опрашивающие клиенты начинают работу в разное время в пределах паузы между запросами
+        await asyncio.sleep(random.uniform(0, options['interval']))
+
+        writer = None
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            reused = writer is not None
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), options['timeout'])
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(self._read_response(reader), options['timeout'])
+            except asyncio.IncompleteReadError as e:
+                writer.close()
+                writer = None
+                if reused and not e.partial:
+                    # Сервер закрыл ранее использованное соединение, не сообщив об этом в ответе: повторить запрос
+                    continue
+                errors.append(repr(e))
+                keep_alive, status = False, None
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                errors.append(repr(e))
+                keep_alive, status = False, None
+            else:
+                latencies.append(time.perf_counter() - started_at)
+                if status != 200:
+                    errors.append(f'HTTP {status}')
+
+            if not keep_alive and writer is not None:
+                writer.close()
+                writer = None
+            if options['interval']:
+                await asyncio.sleep(options['interval'])
+
+        if writer is not None:
+            writer.close()
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+        """ Читает ответ HTTP/1.1; возвращает статус и признак того, что соединение можно использовать повторно. """
+        head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        status = int(head[0].split(' ')[1])
+        headers = {}
+        for line in head[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip().lower()
+
+        # HTTP/1.0 по умолчанию закрывает соединение после ответа, HTTP/1.1 - сохраняет
+        if head[0].startswith('HTTP/1.0'):
+            keep_alive = headers.get('connection') == 'keep-alive'
+        else:
+            keep_alive = headers.get('connection') != 'close'
+        if 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            # Длина ответа не указана: тело ответа заканчивается закрытием соединения
+            await reader.read()
+            keep_alive = False
+
+        return status, keep_alive
+
+    def _report(self, url: str, latencies: list[float], errors: list[str], elapsed: float):
+        if len(latencies) < 2:
+            self.stdout.write(f'{url}: выполнено запросов {len(latencies)}, ошибок {len(errors)}')
+        else:
+            percentiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f'{url}: {len(latencies)} запросов за {elapsed:.3f} с ({len(latencies) / elapsed:.1f} запросов/с), '
+                f'p50 {percentiles[49] * 1000:.1f} мс, p95 {percentiles[94] * 1000:.1f} мс, '
+                f'p99 {percentiles[98] * 1000:.1f} мс, ошибок {len(errors)}'
+            )
+        if errors:
+            self.stdout.write(f'  {errors[0]}')
@@ -0,0 +1,81 @@
+import csv
+import os
+import tempfile
+import time
+
+import pandas
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.data import FileHeadersEnum, IMPORT_BATCH_SIZE, pyarrow, read_csv_batches
+from utils.synthetic import generate_vehicles
+
+
+GENERATE_BATCH_SIZE = 10000     # Количество записей, генерируемых и записываемых в файл за один раз
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость разбора файла CSV прежним способом и библиотеками pandas и pyarrow.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Количество строк в файле.')
+        parser.add_argument('--encoding', default='cp1251', help='Кодировка файла.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Размер пакета строк.')
+        parser.add_argument('--file', help='Разобрать указанный файл вместо сгенерированного.')
+
+    def handle(self, *args, **options):
+        if options['file']:
+            self._benchmark(options['file'], options)
+            return
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'vehicles.csv')
+            self._generate(path, options['rows'], options['encoding'])
+            self._benchmark(path, options)
+
+    def _benchmark(self, path: str, options: dict):
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден.')
+        self.stdout.write(f'Файл {path}: {os.path.getsize(path) / 1024 / 1024:.1f} МБ')
+
+        batch_size = options['batch_size']
+        if options['encoding'] == 'cp1251':
+            # Прежний способ поддерживает только кодировку cp1251
+            self._report('Прежний разбор (определение типов)', *self._measure(self._legacy_read, path, batch_size))
+
+        self._report('pandas (схема столбцов)', *self._measure(self._read, path, batch_size, 'c'))
+        if pyarrow is not None:
+            self._report('pyarrow (схема столбцов)', *self._measure(self._read, path, batch_size, 'pyarrow'))
+
+    @staticmethod
+    def _generate(path: str, rows: int, encoding: str):
+        """ Записывает в файл синтетические записи о транспортных средствах (см. utils.synthetic). """
+        with open(path, 'w', encoding=encoding, newline='') as file:
+            writer = csv.writer(file, delimiter=';', quotechar='"', lineterminator='\n')
+            writer.writerow([item.value for item in FileHeadersEnum])
+            for number, start in enumerate(range(0, rows, GENERATE_BATCH_SIZE)):
+                vehicles = generate_vehicles(min(GENERATE_BATCH_SIZE, rows - start), seed=number,
+                                             prefix=f'{number:04d}')
+                writer.writerows([vehicle[item.name] for item in FileHeadersEnum] for vehicle in vehicles)
+
+    @staticmethod
+    def _legacy_read(path: str, batch_size: int):
+        """ Воспроизводит прежний разбор: все столбцы, типы определяются по содержимому. """
+        with open(path, 'rb') as file:
+            with pandas.read_csv(file, encoding='cp1251', sep=';', quotechar='"', chunksize=batch_size) as reader:
+                yield from reader
+
+    @staticmethod
+    def _read(path: str, batch_size: int, engine: str):
+        with open(path, 'rb') as file:
+            yield from read_csv_batches(file, batch_size=batch_size, engine=engine)
+
+    @staticmethod
+    def _measure(function, *args) -> tuple[int, float]:
+        """ Возвращает количество прочитанных строк и время разбора. """
+        started_at = time.perf_counter()
+        rows = sum(len(dataframe) for dataframe in function(*args))
+        return rows, time.perf_counter() - started_at
+
+    def _report(self, title: str, rows: int, elapsed: float):
+        self.stdout.write(f'{title}: {rows} строк за {elapsed:.3f} с ({rows / elapsed:.0f} строк/с)')
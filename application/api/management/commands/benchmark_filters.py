@@ -0,0 +1,91 @@
+import os
+import statistics
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.filters import vehicle_list_filter
+from api.models import Vehicle
+from utils.synthetic import generate_vehicles
+
+
+BENCHMARK_USERNAME = 'benchmark'
+SEED_BATCH_SIZE = 10000
+PAGE_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = 'Измеряет время фильтрации списка транспортных средств (vehicle_list_filter) на большой таблице ' \
+           'в отдельной временной базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Количество записей в таблице.')
+        parser.add_argument('--repeat', type=int, default=20, help='Количество повторов каждого запроса.')
+        parser.add_argument('--explain', action='store_true', help='Вывести план выполнения каждого запроса.')
+
+    def handle(self, *args, **options):
+        # Синтетические записи создаются в отдельной базе данных, которая удаляется после измерения
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                # Файл на диске, а не база данных в памяти: время запросов сопоставимо с рабочей базой данных
+                connection.settings_dict['TEST'] = {
+                    **connection.settings_dict['TEST'], 'NAME': os.path.join(directory, 'benchmark.sqlite3'),
+                }
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                self._seed(options['rows'])
+                self._benchmark(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _benchmark(self, options: dict):
+        """ Выполняет каждый вариант фильтрации `repeat` раз и выводит медиану и максимум времени запроса. """
+
+        sample = Vehicle.objects.order_by('?').values('registration_number', 'vin', 'vehicle_certificate_number')[0]
+        cases = [
+            {},
+            {'registration_number': sample['registration_number'].lower()},
+            {'vin': sample['vin'].lower()},
+            {'vehicle_certificate_number': sample['vehicle_certificate_number']},
+            {'make': 'Audi'},
+            {'make': 'toy', 'model': 'cam'},
+            {'color': 'сер'},
+            {'year_of_manufacture': 2015},
+        ]
+
+        factory = APIRequestFactory()
+        for params in cases:
+            queryset = vehicle_list_filter(Request(factory.get('/', params)))
+
+            timings = []
+            for _ in range(options['repeat']):
+                started_at = time.perf_counter()
+                list(queryset[:PAGE_SIZE])
+                timings.append((time.perf_counter() - started_at) * 1000)
+
+            self.stdout.write(
+                f'{params or "без фильтров"}: медиана {statistics.median(timings):.2f} мс, '
+                f'максимум {max(timings):.2f} мс'
+            )
+            if options['explain']:
+                self.stdout.write(queryset[:PAGE_SIZE].explain())
+
+    def _seed(self, rows: int):
+        """ Заполняет таблицу `rows` синтетическими записями. """
+        user = User.objects.create_user(username=BENCHMARK_USERNAME)
+
+        for start in range(0, rows, SEED_BATCH_SIZE):
+            count = min(SEED_BATCH_SIZE, rows - start)
+            vehicles = [
+                Vehicle(created_by=user, updated_by=user, **vehicle)
+                for vehicle in generate_vehicles(count, seed=start, prefix=f'F{start // SEED_BATCH_SIZE:04d}')
+            ]
+            Vehicle.objects.bulk_create(vehicles, batch_size=SEED_BATCH_SIZE)
+            self.stdout.write(f'Создано записей: {start + count} из {rows}', ending='\r')
+
+        self.stdout.write(f'Записей в таблице: {Vehicle.objects.count()}')
@@ -0,0 +1,79 @@
+import time
+
+import pandas
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from api.models import Vehicle, DataLog, DATA_OPERATIONS_MAPPING
+from api.serializers import VehicleSerializer
+from utils.data import save_vehicle, import_vehicles_batch, BULK_BATCH_SIZE, IMPORT_BATCH_SIZE
+from utils.datalog import data_log_writer
+from utils.synthetic import generate_vehicles
+from utils.transactions import immediate_atomic
+from utils.views import log_data_modification
+
+
+BENCHMARK_USERNAME = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость построчного и пакетного импорта данных о транспортных средствах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Количество импортируемых записей.')
+        parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE, help='Размер пакета bulk_create.')
+        parser.add_argument('--skip-legacy', action='store_true', help='Не измерять построчный импорт.')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        rows = options['rows']
+
+        if not options['skip_legacy']:
+            vehicles = generate_vehicles(rows, prefix='B1')
+            elapsed = self._measure(self._legacy_import, vehicles, user)
+            self._report('Построчный импорт (save_vehicle)', rows, elapsed)
+
+        vehicles = generate_vehicles(rows, prefix='B2')
+        elapsed = self._measure(self._bulk_import, vehicles, user, batch_size=options['batch_size'])
+        self._report('Пакетный импорт (import_vehicles_batch)', rows, elapsed)
+
+    @staticmethod
+    def _legacy_import(vehicles: list[dict], user: User):
+        """ Воспроизводит прежний построчный импорт: сохранение и запись в лог для каждой записи. """
+        for vehicle in vehicles:
+            vehicle_instance = save_vehicle(vehicle, created_by=user, updated_by=user)
+            log_data_modification(
+                vehicle=VehicleSerializer(vehicle_instance).data,
+                username=user,
+                operation=DATA_OPERATIONS_MAPPING['import'],
+                description='Импортированы данные о транспортном средстве.',
+            )
+        data_log_writer.flush()
+
+    @staticmethod
+    def _bulk_import(vehicles: list[dict], user: User, batch_size: int):
+        """
+        Импортирует записи так же, как задание на импорт (см. utils.jobs.process_import_job): пакетами
+        по `IMPORT_BATCH_SIZE` строк, каждый пакет - в отдельной транзакции.
+        """
+        dataframe = pandas.DataFrame(vehicles)
+        for start in range(0, len(dataframe), IMPORT_BATCH_SIZE):
+            with immediate_atomic():
+                import_vehicles_batch(dataframe.iloc[start:start + IMPORT_BATCH_SIZE], user=user, batch_size=batch_size)
+
+    @staticmethod
+    def _measure(function, vehicles: list[dict], *args, **kwargs) -> float:
+        """ Измеряет время импорта и удаляет созданные записи. """
+        vins = [vehicle['vin'] for vehicle in vehicles]
+        started_at = time.perf_counter()
+        try:
+            function(vehicles, *args, **kwargs)
+            return time.perf_counter() - started_at
+        finally:
+            for start in range(0, len(vins), 500):
+                Vehicle.objects.filter(vin__in=vins[start:start + 500]).delete()
+                DataLog.objects.filter(vin__in=vins[start:start + 500]).delete()
+
+    def _report(self, title: str, rows: int, elapsed: float):
+        self.stdout.write(f'{title}: {rows} записей за {elapsed:.3f} с ({rows / elapsed:.0f} записей/с)')
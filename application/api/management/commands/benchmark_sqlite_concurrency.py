@@ -0,0 +1,181 @@
+import csv
+import io
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.models import Vehicle, ImportJob
+from settings.database import SQLITE_PROFILES_MAPPING
+from utils.data import FileHeadersEnum
+from utils.jobs import process_import_job
+from utils.synthetic import generate_vehicles
+
+
+BENCHMARK_USERNAME = 'benchmark'
+PAGE_SIZE = 100         # Размер страницы списка ТС (см. api.pagination)
+CONTEXT = multiprocessing.get_context('fork')     # Процессы читателей наследуют настройки Django и базу данных
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость чтения списка ТС на SQLite без импорта и во время импорта для профилей SQLite.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=list(SQLITE_PROFILES_MAPPING), action='append',
+                            help='Профиль параметров SQLite (по умолчанию - все профили).')
+        parser.add_argument('--vehicles', type=int, default=20000, help='Количество записей в базе данных.')
+        parser.add_argument('--import-rows', type=int, default=20000, help='Количество строк импортируемого файла.')
+        parser.add_argument('--readers', type=int, default=4, help='Количество параллельных читателей.')
+        parser.add_argument('--duration', type=float, default=5.0, help='Время чтения без импорта, секунд.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда предназначена для SQLite.')
+
+        # Ответы не кэшируются, чтобы каждый запрос списка обращался к базе данных
+        with tempfile.TemporaryDirectory() as directory, override_settings(RESPONSE_CACHE_TIMEOUT=0):
+            for profile in options['profile'] or SQLITE_PROFILES_MAPPING:
+                self.stdout.write(f'Профиль {profile}: {SQLITE_PROFILES_MAPPING[profile]}')
+                with override_settings(SQLITE_PRAGMAS=SQLITE_PROFILES_MAPPING[profile]):
+                    self._benchmark(os.path.join(directory, f'{profile}.sqlite3'), options)
+
+    def _benchmark(self, path: str, options: dict):
+        """ Создаёт отдельную базу данных в файле `path` и измеряет чтение без импорта и во время импорта. """
+        connection.settings_dict['TEST'] = {**connection.settings_dict['TEST'], 'NAME': path}
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = User.objects.create_user(username=BENCHMARK_USERNAME)
+            Vehicle.objects.bulk_create([
+                Vehicle(created_by=user, updated_by=user, **vehicle)
+                for vehicle in generate_vehicles(options['vehicles'], prefix='R')
+            ], batch_size=1000)
+            content = self._generate_file(options['import_rows'])
+            connection.close()
+
+            stop = CONTEXT.Event()
+            threading.Timer(options['duration'], stop.set).start()
+            self._report('Чтение без импорта', *self._read(user, options, stop))
+
+            stop = CONTEXT.Event()
+            result = {}
+            writer = threading.Thread(target=self._import, args=(user, content, stop, result))
+            self._report('Чтение во время импорта', *self._read(user, options, stop, writer=writer))
+
+            if 'error' in result:
+                self.stdout.write(f'  Импорт завершился ошибкой: {result["error"]}')
+            else:
+                self.stdout.write(f'  Импорт: {result["rows"]} строк за {result["elapsed"]:.3f} с, '
+                                  f'ошибок строк {result["failed"]}')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    @staticmethod
+    def _generate_file(rows: int) -> bytes:
+        """ Формирует файл CSV для импорта с новыми записями. """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';', lineterminator='\n')
+        writer.writerow([item.value for item in FileHeadersEnum])
+        vehicles = generate_vehicles(rows, prefix='W')
+        writer.writerows([vehicle[item.name] for item in FileHeadersEnum] for vehicle in vehicles)
+        return buffer.getvalue().encode('utf-8')
+
+    def _read(self, user: User, options: dict, stop, writer: Optional[threading.Thread] = None
+              ) -> tuple[list[float], list[str], float]:
+        """
+        Запускает читателей в отдельных процессах (каждый со своим соединением с базой данных) до события `stop`
+        и, если передан, поток импорта `writer`. Возвращает время запросов, ошибки и общее время чтения.
+        """
+        pages = max(options['vehicles'] // PAGE_SIZE, 1)
+        results = CONTEXT.Queue()
+        readers = [
+            CONTEXT.Process(target=self._reader, args=(user, number, pages, stop, results))
+            for number in range(options['readers'])
+        ]
+
+        started_at = time.perf_counter()
+        for reader in readers:
+            reader.start()
+        if writer is not None:
+            writer.start()
+
+        latencies, errors = [], []
+        for _ in readers:
+            reader_latencies, reader_errors = results.get()
+            latencies.extend(reader_latencies)
+            errors.extend(reader_errors)
+        elapsed = time.perf_counter() - started_at
+
+        for reader in readers:
+            reader.join()
+        if writer is not None:
+            writer.join()
+        return latencies, errors, elapsed
+
+    @staticmethod
+    def _reader(user: User, number: int, pages: int, stop, results):
+        """ Запрашивает страницы списка ТС (`VehicleList`), пока не установлено событие `stop`. """
+        latencies, errors = [], []
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        page = number
+        try:
+            while not stop.is_set():
+                page = page % pages + 1
+                started_at = time.perf_counter()
+                try:
+                    response = client.get('/api/vehicles/', {'page': page})
+                except DatabaseError as e:
+                    errors.append(str(e))
+                    continue
+                if response.status_code != 200:
+                    errors.append(f'HTTP {response.status_code}')
+                    continue
+                latencies.append(time.perf_counter() - started_at)
+        finally:
+            connections.close_all()
+            results.put((latencies, errors))
+
+    @staticmethod
+    def _import(user: User, content: bytes, stop, result: dict):
+        """ Загружает файл через `ImportDataView` и выполняет задание на импорт. """
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+        started_at = time.perf_counter()
+        job = None
+        try:
+            response = client.put('/api/vehicles/import/', content, content_type='text/csv',
+                                  HTTP_CONTENT_DISPOSITION='attachment; filename=benchmark.csv')
+            job = ImportJob.objects.get(pk=response.data['id'])
+            process_import_job(job)
+            job.refresh_from_db()
+            result.update(rows=job.rows_imported, failed=job.rows_failed, elapsed=time.perf_counter() - started_at)
+        except DatabaseError as e:
+            result['error'] = str(e)
+        finally:
+            stop.set()
+            if job is not None:
+                job.file.delete(save=False)
+                job.errors_file.delete(save=False)
+            connections.close_all()
+
+    def _report(self, title: str, latencies: list[float], errors: list[str], elapsed: float):
+        if len(latencies) < 2:
+            self.stdout.write(f'  {title}: выполнено запросов {len(latencies)}, ошибок {len(errors)}')
+            return
+
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'  {title}: {len(latencies)} запросов за {elapsed:.3f} с ({len(latencies) / elapsed:.1f} запросов/с), '
+            f'p50 {percentiles[49] * 1000:.1f} мс, p95 {percentiles[94] * 1000:.1f} мс, ошибок {len(errors)}'
+        )
+        if errors:
+            self.stdout.write(f'    {errors[0]}')
@@ -0,0 +1,139 @@
+import csv
+import datetime
+import os
+import time
+from typing import Iterator
+
+import xlsxwriter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from api.models import Vehicle
+from utils.cache import bump_data_version
+from utils.data import FileHeadersEnum, BULK_BATCH_SIZE
+from utils.synthetic import generate_fleet, FLEET_CAPACITY
+from utils.transactions import immediate_atomic
+
+try:
+    import xlwt
+except ImportError:     # Формат XLS доступен только при установленной библиотеке xlwt
+    xlwt = None
+
+
+FLEET_USERNAME = 'benchmark'
+FLEET_FORMATS = ('csv', 'xls', 'xlsx', 'db', )
+GENERATE_BATCH_SIZE = 10000     # Количество записей, генерируемых за один раз
+XLS_MAX_ROWS = 65535            # Ограничение формата XLS (без строки заголовка)
+
+
+class Command(BaseCommand):
+    help = 'Генерирует синтетический флот транспортных средств в файлах для импорта (CSV, XLS, XLSX) ' \
+           'и/или сразу в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Количество записей.')
+        parser.add_argument('--format', choices=FLEET_FORMATS, action='append', dest='formats',
+                            help='Формат: csv, xls, xlsx или db - запись в базу данных (по умолчанию - все файлы).')
+        parser.add_argument('--output', default='.', help='Каталог для файлов.')
+        parser.add_argument('--encoding', default='cp1251', help='Кодировка файла CSV.')
+        parser.add_argument('--start', type=int, default=0,
+                            help='Порядковый номер первой записи: флоты с непересекающимися номерами не содержат '
+                                 'повторяющихся значений уникальных полей.')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора случайных чисел.')
+        parser.add_argument('--username', default=FLEET_USERNAME,
+                            help='Пользователь, от имени которого создаются записи в базе данных.')
+
+    def handle(self, *args, **options):
+        rows, start = options['rows'], options['start']
+        if rows <= 0 or start < 0 or start + rows > FLEET_CAPACITY:
+            raise CommandError(f'Порядковые номера записей должны находиться в пределах 0 ... {FLEET_CAPACITY - 1}.')
+
+        formats = options['formats'] or [file_type for file_type in FLEET_FORMATS if file_type != 'db']
+        if 'xls' in formats and xlwt is None:
+            raise CommandError('Для формата XLS необходима библиотека xlwt.')
+        if 'xls' in formats and rows > XLS_MAX_ROWS:
+            raise CommandError(f'Формат XLS вмещает не более {XLS_MAX_ROWS} записей.')
+
+        os.makedirs(options['output'], exist_ok=True)
+        for file_type in formats:
+            started_at = time.perf_counter()
+            batches = self._generate(rows, start, options['seed'])
+            if file_type == 'db':
+                self._write_db(batches, options['username'])
+                target = 'база данных'
+            else:
+                target = os.path.join(options['output'], f'fleet_{start}_{rows}.{file_type}')
+                getattr(self, f'_write_{file_type}')(batches, target, options)
+            self.stdout.write(f'{file_type}: {rows} записей за {time.perf_counter() - started_at:.3f} с ({target})')
+
+    @staticmethod
+    def _generate(rows: int, start: int, seed: int) -> Iterator[list[dict]]:
+        for batch_start in range(start, start + rows, GENERATE_BATCH_SIZE):
+            yield generate_fleet(min(GENERATE_BATCH_SIZE, start + rows - batch_start), start=batch_start, seed=seed)
+
+    @staticmethod
+    def _write_csv(batches: Iterator[list[dict]], path: str, options: dict):
+        with open(path, 'w', encoding=options['encoding'], newline='') as file:
+            writer = csv.writer(file, delimiter=';', quotechar='"', lineterminator='\n')
+            writer.writerow([item.value for item in FileHeadersEnum])
+            for vehicles in batches:
+                writer.writerows([vehicle[item.name] for item in FileHeadersEnum] for vehicle in vehicles)
+
+    @staticmethod
+    def _write_xlsx(batches: Iterator[list[dict]], path: str, options: dict):
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        worksheet = workbook.add_worksheet('Транспортные средства')
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+
+        worksheet.write_row(0, 0, [item.value for item in FileHeadersEnum])
+        row_number = 1
+        for vehicles in batches:
+            for vehicle in vehicles:
+                for column_number, item in enumerate(FileHeadersEnum):
+                    value = vehicle[item.name]
+                    if isinstance(value, datetime.date):
+                        worksheet.write_datetime(row_number, column_number, value, date_format)
+                    else:
+                        worksheet.write(row_number, column_number, value)
+                row_number += 1
+
+        workbook.close()
+
+    @staticmethod
+    def _write_xls(batches: Iterator[list[dict]], path: str, options: dict):
+        workbook = xlwt.Workbook(encoding='utf-8')
+        worksheet = workbook.add_sheet('Транспортные средства')
+        date_format = xlwt.easyxf(num_format_str='yyyy-mm-dd')
+
+        for column_number, item in enumerate(FileHeadersEnum):
+            worksheet.write(0, column_number, item.value)
+        row_number = 1
+        for vehicles in batches:
+            for vehicle in vehicles:
+                for column_number, item in enumerate(FileHeadersEnum):
+                    value = vehicle[item.name]
+                    if isinstance(value, datetime.date):
+                        worksheet.write(row_number, column_number, value, date_format)
+                    else:
+                        worksheet.write(row_number, column_number, value)
+                row_number += 1
+
+        workbook.save(path)
+
+    @staticmethod
+    def _write_db(batches: Iterator[list[dict]], username: str):
+        """ Сохраняет записи пакетами bulk_create, без проверки через сериализатор и без записи в лог-таблицу. """
+        user, _ = User.objects.get_or_create(username=username)
+        try:
+            for vehicles in batches:
+                with immediate_atomic():
+                    Vehicle.objects.bulk_create([
+                        Vehicle(created_by=user, updated_by=user, **vehicle) for vehicle in vehicles
+                    ], batch_size=BULK_BATCH_SIZE)
+        except IntegrityError as e:
+            raise CommandError(f'Записи с такими значениями уникальных полей уже существуют (укажите другой --start): '
+                               f'{e}')
+        finally:
+            bump_data_version()
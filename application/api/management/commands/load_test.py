@@ -0,0 +1,273 @@
+import csv
+import io
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.models import Vehicle, ImportJob
+from utils.data import FileHeadersEnum, BULK_BATCH_SIZE
+from utils.datalog import data_log_writer
+from utils.jobs import process_import_job
+from utils.synthetic import generate_fleet, SYNTHETIC_MAKES
+
+
+LOAD_TEST_USERNAME = 'benchmark'
+PAGE_SIZE = 100         # Размер страницы списка ТС (см. api.pagination)
+CONTEXT = multiprocessing.get_context('fork')     # Процессы нагрузки наследуют настройки Django и базу данных
+
+# Сценарии нагрузки и запросы (операции), время выполнения которых измеряется в каждом сценарии
+LOAD_TEST_SCENARIOS_MAPPING = {
+    'list': ['GET /api/vehicles/', 'GET /api/vehicles/ (фильтр)'],
+    'crud': ['POST /api/vehicles/', 'GET /api/vehicles/<pk>/', 'PATCH /api/vehicles/<pk>/',
+             'DELETE /api/vehicles/<pk>/'],
+    'import': ['PUT /api/vehicles/import/', 'Задание на импорт'],
+    'export': ['GET /api/vehicles/export/'],
+}
+# Порядковые номера записей синтетического флота (см. generate_fleet), используемые сценариями:
+# исходные записи - с нуля, создаваемые сценарием crud и импортируемые сценарием import - со своих смещений
+CRUD_FLEET_START = 10_000_000
+IMPORT_FLEET_START = 20_000_000
+WORKER_FLEET_SIZE = 1_000_000
+
+
+class LoadTestRecorder:
+    """ Время выполнения и ошибки запросов одного процесса нагрузки. """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(list)
+
+    def measure(self, label: str, function, *args, expected_status: Optional[int] = 200, **kwargs):
+        """ Выполняет запрос (вызывает `function`) и сохраняет время выполнения; возвращает ответ или None. """
+        started_at = time.perf_counter()
+        try:
+            response = function(*args, **kwargs)
+            if getattr(response, 'streaming', False):
+                for _ in response.streaming_content:
+                    pass
+        except DatabaseError as e:
+            self.error(label, str(e))
+            return None
+
+        if expected_status is not None and response.status_code != expected_status:
+            self.error(label, f'HTTP {response.status_code}')
+            return None
+
+        self.latencies[label].append(time.perf_counter() - started_at)
+        return response
+
+    def error(self, label: str, message: str):
+        self.errors[label].append(message)
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочное тестирование API: одновременно выполняет сценарии просмотра списка с фильтрами, ' \
+           'создания/просмотра/изменения/удаления записей, импорта и выгрузки на отдельной базе данных ' \
+           'с синтетическим флотом и выводит время ответа (p50/p95/p99), пропускную способность и пиковый ' \
+           'объём памяти по каждому запросу.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', choices=list(LOAD_TEST_SCENARIOS_MAPPING), action='append',
+                            dest='scenarios', help='Сценарий нагрузки (по умолчанию - все сценарии).')
+        parser.add_argument('--vehicles', type=int, default=20000, help='Количество записей в базе данных.')
+        parser.add_argument('--workers', type=int, default=2, help='Количество процессов на каждый сценарий.')
+        parser.add_argument('--duration', type=float, default=20.0, help='Время нагрузки, секунд.')
+        parser.add_argument('--import-rows', type=int, default=5000, help='Количество строк одного файла импорта.')
+        parser.add_argument('--no-cache', action='store_true', help='Не кэшировать ответы API.')
+        parser.add_argument('--max-p95', type=float,
+                            help='Допустимое время ответа p95, мс: при превышении команда завершается с ошибкой.')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenarios'] or list(LOAD_TEST_SCENARIOS_MAPPING)
+        if options['workers'] > WORKER_FLEET_SIZE // options['import_rows']:
+            raise CommandError('Слишком много процессов для указанного количества строк файла импорта.')
+
+        with tempfile.TemporaryDirectory() as directory:
+            media_root = os.path.join(directory, 'media')
+            overrides = {
+                'MEDIA_ROOT': media_root,
+                'EXPORT_CACHE_DIR': os.path.join(media_root, 'exports'),
+                'IMPORT_UPLOAD_DIR': os.path.join(media_root, 'uploads'),
+            }
+            if options['no_cache']:
+                overrides['RESPONSE_CACHE_TIMEOUT'] = 0
+
+            if connection.vendor == 'sqlite':
+                # Процессы нагрузки не могут использовать общую базу данных в памяти
+                connection.settings_dict['TEST'] = {
+                    **connection.settings_dict['TEST'], 'NAME': os.path.join(directory, 'load_test.sqlite3'),
+                }
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                with override_settings(**overrides):
+                    results, elapsed = self._run(scenarios, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self._report(scenarios, results, elapsed, options)
+
+    def _run(self, scenarios: list[str], options: dict) -> tuple[dict, float]:
+        """ Заполняет базу данных и запускает процессы сценариев; возвращает результаты по сценариям и время. """
+        user = User.objects.create_user(username=LOAD_TEST_USERNAME)
+        for start in range(0, options['vehicles'], BULK_BATCH_SIZE * 10):
+            vehicles = generate_fleet(min(BULK_BATCH_SIZE * 10, options['vehicles'] - start), start=start)
+            Vehicle.objects.bulk_create([
+                Vehicle(created_by=user, updated_by=user, **vehicle) for vehicle in vehicles
+            ], batch_size=BULK_BATCH_SIZE)
+        self.stdout.write(f'База данных: {connection.vendor}, записей: {options["vehicles"]}, '
+                          f'память процесса перед запуском: {self._get_peak_rss():.0f} МБ')
+
+        # Соединения с базой данных не должны наследоваться процессами сценариев
+        connections.close_all()
+
+        stop = CONTEXT.Event()
+        queue = CONTEXT.Queue()
+        workers = [
+            CONTEXT.Process(target=self._worker, args=(scenario, number, user, options, stop, queue))
+            for scenario in scenarios for number in range(options['workers'])
+        ]
+
+        started_at = time.perf_counter()
+        threading.Timer(options['duration'], stop.set).start()
+        for worker in workers:
+            worker.start()
+
+        results = defaultdict(lambda: {'latencies': defaultdict(list), 'errors': defaultdict(list), 'rss': 0.0})
+        for _ in workers:
+            scenario, latencies, errors, rss = queue.get()
+            for label, values in latencies.items():
+                results[scenario]['latencies'][label].extend(values)
+            for label, values in errors.items():
+                results[scenario]['errors'][label].extend(values)
+            results[scenario]['rss'] = max(results[scenario]['rss'], rss)
+        elapsed = time.perf_counter() - started_at
+
+        for worker in workers:
+            worker.join()
+        return results, elapsed
+
+    def _worker(self, scenario: str, number: int, user: User, options: dict, stop, queue):
+        """ Выполняет сценарий `scenario` в отдельном процессе до события `stop`. """
+        recorder = LoadTestRecorder()
+        generator = random.Random(f'{scenario}:{number}')
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+
+        try:
+            iteration = 0
+            while not stop.is_set():
+                getattr(self, f'_{scenario}')(client, recorder, generator, number, iteration, options)
+                iteration += 1
+        finally:
+            data_log_writer.flush()
+            connections.close_all()
+            queue.put((scenario, dict(recorder.latencies), dict(recorder.errors), self._get_peak_rss()))
+
+    @staticmethod
+    def _list(client: APIClient, recorder: LoadTestRecorder, generator: random.Random, number: int,
+              iteration: int, options: dict):
+        pages = max(options['vehicles'] // PAGE_SIZE, 1)
+        recorder.measure('GET /api/vehicles/', client.get, '/api/vehicles/', {'page': generator.randint(1, pages)})
+
+        filters = generator.choice([
+            {'make': generator.choice(list(SYNTHETIC_MAKES))},
+            {'make': generator.choice(list(SYNTHETIC_MAKES)), 'color': 'ый'},
+            {'year_of_manufacture': generator.randint(2000, 2020), 'cursor': ''},
+        ])
+        recorder.measure('GET /api/vehicles/ (фильтр)', client.get, '/api/vehicles/', filters)
+
+    @staticmethod
+    def _crud(client: APIClient, recorder: LoadTestRecorder, generator: random.Random, number: int,
+              iteration: int, options: dict):
+        vehicle = generate_fleet(1, start=CRUD_FLEET_START + number * WORKER_FLEET_SIZE + iteration)[0]
+        vehicle['vehicle_certificate_date'] = vehicle['vehicle_certificate_date'].isoformat()
+
+        response = recorder.measure('POST /api/vehicles/', client.post, '/api/vehicles/', vehicle, format='json',
+                                    expected_status=201)
+        if response is None:
+            return
+        url = f'/api/vehicles/{response.data["id"]}/'
+        recorder.measure('GET /api/vehicles/<pk>/', client.get, url)
+        recorder.measure('PATCH /api/vehicles/<pk>/', client.patch, url, {'color': 'Фиолетовый'}, format='json')
+        recorder.measure('DELETE /api/vehicles/<pk>/', client.delete, url, expected_status=204)
+
+    @staticmethod
+    def _import(client: APIClient, recorder: LoadTestRecorder, generator: random.Random, number: int,
+                iteration: int, options: dict):
+        rows = options['import_rows']
+        start = IMPORT_FLEET_START + number * WORKER_FLEET_SIZE + iteration * rows
+        if start + rows > IMPORT_FLEET_START + (number + 1) * WORKER_FLEET_SIZE:
+            recorder.error('PUT /api/vehicles/import/', 'Исчерпаны порядковые номера записей для импорта.')
+            time.sleep(1)
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';', lineterminator='\n')
+        writer.writerow([item.value for item in FileHeadersEnum])
+        writer.writerows([vehicle[item.name] for item in FileHeadersEnum] for vehicle in generate_fleet(rows, start))
+
+        response = recorder.measure(
+            'PUT /api/vehicles/import/', client.put, '/api/vehicles/import/', buffer.getvalue().encode('utf-8'),
+            content_type='text/csv', HTTP_CONTENT_DISPOSITION=f'attachment; filename=load_test_{start}.csv',
+            expected_status=202,
+        )
+        if response is None:
+            return
+
+        # Задание выполняется в том же процессе, как его выполнил бы обработчик заданий
+        job = ImportJob.objects.get(pk=response.data['id'])
+        recorder.measure('Задание на импорт', process_import_job, job, expected_status=None)
+        job.refresh_from_db()
+        if job.rows_imported != rows:
+            recorder.error('Задание на импорт', job.message or f'Импортировано строк: {job.rows_imported} из {rows}')
+
+    @staticmethod
+    def _export(client: APIClient, recorder: LoadTestRecorder, generator: random.Random, number: int,
+                iteration: int, options: dict):
+        recorder.measure('GET /api/vehicles/export/', client.get, '/api/vehicles/export/', HTTP_ACCEPT='text/csv')
+
+    @staticmethod
+    def _get_peak_rss() -> float:
+        """ Возвращает пиковый объём резидентной памяти текущего процесса, МБ. """
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def _report(self, scenarios: list[str], results: dict, elapsed: float, options: dict):
+        self.stdout.write(
+            f'{"Запрос":<30} {"Запросов":>9} {"Запросов/с":>11} {"p50, мс":>9} {"p95, мс":>9} {"p99, мс":>9} '
+            f'{"Ошибок":>7} {"Память, МБ":>11}'
+        )
+
+        exceeded = []
+        for scenario in scenarios:
+            for label in LOAD_TEST_SCENARIOS_MAPPING[scenario]:
+                latencies = results[scenario]['latencies'].get(label, [])
+                errors = results[scenario]['errors'].get(label, [])
+                if len(latencies) >= 2:
+                    percentiles = [value * 1000 for value in statistics.quantiles(latencies, n=100)]
+                    p50, p95, p99 = f'{percentiles[49]:.1f}', f'{percentiles[94]:.1f}', f'{percentiles[98]:.1f}'
+                    if options['max_p95'] is not None and percentiles[94] > options['max_p95']:
+                        exceeded.append(label)
+                else:
+                    p50 = p95 = p99 = '-'
+                self.stdout.write(
+                    f'{label:<30} {len(latencies):>9} {len(latencies) / elapsed:>11.1f} {p50:>9} {p95:>9} {p99:>9} '
+                    f'{len(errors):>7} {results[scenario]["rss"]:>11.0f}'
+                )
+                if errors:
+                    self.stdout.write(f'  {errors[0]}')
+
+        if exceeded:
+            raise CommandError(f'Время ответа p95 превышает {options["max_p95"]} мс: {", ".join(exceeded)}')
@@ -0,0 +1,32 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.jobs import claim_import_job, process_import_job
+from utils.uploads import delete_expired_uploads
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь заданий на импорт данных о транспортных средствах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=2.0, help='Интервал опроса очереди, секунд.')
+        parser.add_argument('--once', action='store_true', help='Обработать ожидающие задания и завершить работу.')
+
+    def handle(self, *args, **options):
+        logging.info('Обработчик заданий на импорт запущен.')
+
+        while True:
+            job = claim_import_job()
+            if job is not None:
+                process_import_job(job)
+                continue
+
+            # Очередь пуста: удалить незавершённые загрузки файлов по частям с истёкшим сроком хранения
+            if deleted := delete_expired_uploads():
+                logging.info(f'Удалено незавершённых загрузок: {deleted}')
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
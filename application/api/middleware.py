@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from django.http import HttpRequest, HttpResponse
+
+from utils.metrics import REQUEST_DURATION, REQUEST_DB_QUERIES, REQUEST_DB_DURATION, request_queries
+
+
+UNRESOLVED_VIEW = 'unresolved'      # Метка запросов, для которых не найдено представление (404)
+
+
+class MetricsMiddleware:
+    """
+    Учитывает в метриках Prometheus время обработки запроса, количество и время запросов к БД
+    с меткой представления (имя класса представления, например `VehicleList`).
+
+    Поддерживает синхронный и асинхронный режимы, чтобы под ASGI не переключать каждый запрос в общий поток
+    синхронного кода. Время потоковых ответов (выгрузка) учитывается до отправки заголовков; полное время
+    выгрузки учитывается отдельно (см. utils.metrics.observe_export).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Django определяет асинхронное промежуточное ПО по этому признаку
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request: HttpRequest):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        counters = [0, 0.0]
+        token = request_queries.set(counters)
+        started_at = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_queries.reset(token)
+        self._observe(request, response, started_at, counters)
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        counters = [0, 0.0]
+        token = request_queries.set(counters)
+        started_at = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_queries.reset(token)
+        self._observe(request, response, started_at, counters)
+        return response
+
+    @staticmethod
+    def _observe(request: HttpRequest, response: HttpResponse, started_at: float, counters: list):
+        match = request.resolver_match
+        if match is None:
+            view = UNRESOLVED_VIEW
+        else:
+            # Представления-классы - по имени класса, функции (в том числе асинхронные представления) - по имени
+            view = getattr(match.func, 'view_class', match.func).__name__
+
+        REQUEST_DURATION.labels(view, request.method, response.status_code).observe(time.perf_counter() - started_at)
+        REQUEST_DB_QUERIES.labels(view).observe(counters[0])
+        REQUEST_DB_DURATION.labels(view).observe(counters[1])
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import Upper
 
 from api.validators import MaxCurrentYearValidator, ExactLengthValidator
 
@@ -24,6 +25,34 @@ DATA_OPERATIONS = [
     (DATA_OPERATIONS_MAPPING['remove'], 'Удалить'),
     (DATA_OPERATIONS_MAPPING['get'], 'Получить'),
 ]
+IMPORT_JOB_STATUSES_MAPPING = {
+    'pending': 'pending',
+    'running': 'running',
+    'completed': 'completed',
+    'failed': 'failed',
+}
+IMPORT_JOB_STATUSES = [
+    (IMPORT_JOB_STATUSES_MAPPING['pending'], 'Ожидает обработки'),
+    (IMPORT_JOB_STATUSES_MAPPING['running'], 'Выполняется'),
+    (IMPORT_JOB_STATUSES_MAPPING['completed'], 'Завершено'),
+    (IMPORT_JOB_STATUSES_MAPPING['failed'], 'Ошибка'),
+]
+IMPORT_MODES_MAPPING = {
+    'create': 'create',
+    'upsert': 'upsert',
+}
+IMPORT_MODES = [
+    (IMPORT_MODES_MAPPING['create'], 'Создание записей'),
+    (IMPORT_MODES_MAPPING['upsert'], 'Создание и обновление записей'),
+]
+IMPORT_UPLOAD_STATUSES_MAPPING = {
+    'active': 'active',
+    'completed': 'completed',
+}
+IMPORT_UPLOAD_STATUSES = [
+    (IMPORT_UPLOAD_STATUSES_MAPPING['active'], 'Загружается'),
+    (IMPORT_UPLOAD_STATUSES_MAPPING['completed'], 'Завершена'),
+]
 
 
 class Vehicle(models.Model):
@@ -98,7 +127,15 @@ class Vehicle(models.Model):
         return f'{self.make} {self.model} ({self.registration_number})'
 
     class Meta:
-        ordering = ('make', 'model', )
+        ordering = ('make', 'model', 'id', )
+        indexes = [
+            # Сортировка списка по умолчанию и курсорный постраничный вывод
+            models.Index(fields=['make', 'model', 'id'], name='vehicle_make_model_idx'),
+            # Поиск по идентификаторам без учёта регистра (фильтр `<поле>__upper`)
+            models.Index(Upper('registration_number'), name='vehicle_reg_number_upper_idx'),
+            models.Index(Upper('vin'), name='vehicle_vin_upper_idx'),
+            models.Index(Upper('vehicle_certificate_number'), name='vehicle_cert_number_upper_idx'),
+        ]
         verbose_name = 'Транспортное средство'
         verbose_name_plural = 'Транспортные средства'
 
@@ -154,6 +191,200 @@ class DataLog(models.Model):
         return f'{self.operation} {self.registration_number} ({self.description})'
 
     class Meta:
-        ordering = ('-created_at', )
+        ordering = ('-created_at', '-id', )
+        indexes = [
+            # Сортировка журнала по умолчанию и курсорный постраничный вывод
+            models.Index(fields=['created_at', 'id'], name='datalog_created_at_id_idx'),
+        ]
         verbose_name = 'Лог'
         verbose_name_plural = 'Логи'
+
+
+class ImportJob(models.Model):
+    """ Задание на импорт данных о транспортных средствах из файла """
+    created_at = models.DateTimeField(
+        verbose_name='Дата и время создания записи',
+        auto_now_add=True,
+    )
+    created_by = models.ForeignKey(
+        verbose_name='Пользователь, создавший запись',
+        to=User,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+    )
+
+    file = models.FileField(
+        verbose_name='Файл',
+        help_text='Загруженный файл с данными о транспортных средствах.',
+        upload_to='imports/%Y/%m/%d/',
+    )
+    file_type = models.CharField(
+        verbose_name='Тип файла',
+        max_length=10,
+    )
+    content_encoding = models.CharField(
+        verbose_name='Способ сжатия файла',
+        help_text='Значение заголовка Content-Encoding загруженного файла; пустое значение - файл не сжат.',
+        max_length=20,
+        blank=True,
+        default='',
+    )
+    checksum = models.CharField(
+        verbose_name='Контрольная сумма файла',
+        help_text='SHA-256 содержимого загруженного файла; по ней определяются повторные загрузки того же файла.',
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+    )
+    mode = models.CharField(
+        verbose_name='Режим импорта',
+        help_text='Только создание новых записей или создание и обновление существующих записей (upsert).',
+        max_length=20,
+        choices=IMPORT_MODES,
+        default=IMPORT_MODES_MAPPING['create'],
+    )
+    key_field = models.CharField(
+        verbose_name='Ключевое поле',
+        help_text='Поле, по которому в режиме upsert импортируемые записи сопоставляются с существующими.',
+        max_length=100,
+        default='vin',
+    )
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=20,
+        choices=IMPORT_JOB_STATUSES,
+        default=IMPORT_JOB_STATUSES_MAPPING['pending'],
+    )
+    started_at = models.DateTimeField(
+        verbose_name='Дата и время начала обработки',
+        null=True,
+        blank=True,
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='Дата и время окончания обработки',
+        null=True,
+        blank=True,
+    )
+    rows_processed = models.IntegerField(
+        verbose_name='Обработано строк',
+        default=0,
+    )
+    rows_imported = models.IntegerField(
+        verbose_name='Импортировано строк',
+        default=0,
+    )
+    rows_updated = models.IntegerField(
+        verbose_name='Обновлено строк',
+        default=0,
+    )
+    rows_unchanged = models.IntegerField(
+        verbose_name='Строк без изменений',
+        default=0,
+    )
+    rows_failed = models.IntegerField(
+        verbose_name='Строк с ошибками',
+        default=0,
+    )
+    errors_file = models.FileField(
+        verbose_name='Отчёт об ошибках',
+        help_text='Файл CSV с ошибками в строках импортируемого файла.',
+        upload_to='imports/errors/%Y/%m/%d/',
+        null=True,
+        blank=True,
+    )
+    message = models.TextField(
+        verbose_name='Сообщение',
+        help_text='Описание ошибки, прервавшей обработку файла.',
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self):
+        return f'{self.id} {self.status} ({self.file.name})'
+
+    class Meta:
+        ordering = ('-created_at', )
+        verbose_name = 'Задание на импорт'
+        verbose_name_plural = 'Задания на импорт'
+
+
+class ImportUpload(models.Model):
+    """ Загрузка файла для импорта по частям (с возможностью продолжения после обрыва соединения) """
+    created_at = models.DateTimeField(
+        verbose_name='Дата и время создания записи',
+        auto_now_add=True,
+    )
+    created_by = models.ForeignKey(
+        verbose_name='Пользователь, создавший запись',
+        to=User,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата и время получения последней части файла',
+        auto_now=True,
+    )
+
+    filename = models.CharField(
+        verbose_name='Имя файла',
+        max_length=255,
+        blank=True,
+        default='',
+    )
+    file_type = models.CharField(
+        verbose_name='Тип файла',
+        max_length=10,
+    )
+    content_encoding = models.CharField(
+        verbose_name='Способ сжатия файла',
+        max_length=20,
+        blank=True,
+        default='',
+    )
+    mode = models.CharField(
+        verbose_name='Режим импорта',
+        max_length=20,
+        choices=IMPORT_MODES,
+        default=IMPORT_MODES_MAPPING['create'],
+    )
+    key_field = models.CharField(
+        verbose_name='Ключевое поле',
+        max_length=100,
+        default='vin',
+    )
+    size = models.BigIntegerField(
+        verbose_name='Размер файла, байт',
+    )
+    checksum = models.CharField(
+        verbose_name='Контрольная сумма файла',
+        help_text='SHA-256 содержимого файла, указанная клиентом; проверяется после получения всех частей.',
+        max_length=64,
+    )
+    received = models.BigIntegerField(
+        verbose_name='Получено байт',
+        help_text='Размер непрерывно полученного начала файла: загрузка продолжается с этого смещения.',
+        default=0,
+    )
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=20,
+        choices=IMPORT_UPLOAD_STATUSES,
+        default=IMPORT_UPLOAD_STATUSES_MAPPING['active'],
+    )
+    job = models.ForeignKey(
+        verbose_name='Задание на импорт',
+        to=ImportJob,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self):
+        return f'{self.id} {self.status} ({self.received}/{self.size})'
+
+    class Meta:
+        ordering = ('-created_at', )
+        verbose_name = 'Загрузка файла для импорта'
+        verbose_name_plural = 'Загрузки файлов для импорта'
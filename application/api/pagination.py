@@ -0,0 +1,140 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Постраничный вывод с двумя режимами.
+
+    По умолчанию работает как PageNumberPagination (номер страницы, COUNT(*) и OFFSET).
+    Если в запросе передан параметр `cursor` (для первой страницы - пустой), используется курсорный (keyset) режим:
+    записи упорядочиваются по полям `ordering`, а следующая страница выбирается условием "после последней записи
+    предыдущей страницы". Такой запрос использует индекс по полям `ordering` и выполняется за одинаковое время
+    для любой страницы; общее количество записей в этом режиме не вычисляется.
+    """
+    cursor_query_param = 'cursor'
+    ordering: tuple[str, ...] = ('id', )
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> Optional[list]:
+        if self.cursor_query_param not in request.query_params:
+            self.keyset_mode = False
+            return super().paginate_queryset(queryset, request, view=view)
+
+        self.keyset_mode = True
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request.query_params[self.cursor_query_param], queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.build_position_filter(position))
+
+        # Запросить на одну запись больше, чтобы определить наличие следующей страницы
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.next_position = [self.get_field_value(page[-1], field) for field in self.ordering] if page else None
+
+        return page
+
+    def get_paginated_response(self, data) -> Response:
+        if not self.keyset_mode:
+            return super().get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.keyset_mode:
+            return super().get_next_link()
+
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def build_position_filter(self, position: list) -> Q:
+        """
+        Формирует условие выборки записей, следующих за позицией `position` в порядке `ordering`.
+
+        Для порядка (a, b, c) условие имеет вид: a >= x AND (a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)).
+        Первое слагаемое позволяет СУБД ограничить диапазон сканирования индекса.
+        """
+        fields = [(field.lstrip('-'), 'lt' if field.startswith('-') else 'gt') for field in self.ordering]
+
+        following = Q()
+        for index, (field, operator) in enumerate(fields):
+            equal = {previous_field: value for (previous_field, _), value in zip(fields[:index], position[:index])}
+            following |= Q(**equal, **{f'{field}__{operator}': position[index]})
+
+        first_field, first_operator = fields[0]
+        return Q(**{f'{first_field}__{first_operator}e': position[0]}) & following
+
+    @staticmethod
+    def get_field_value(instance, field: str):
+        return getattr(instance, field.lstrip('-'))
+
+    def encode_cursor(self, position: list) -> str:
+        data = json.dumps(position, default=lambda value: value.isoformat(), ensure_ascii=False)
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor: str, model: type[Model]) -> Optional[list]:
+        """
+        Возвращает позицию из параметра `cursor`: значения полей `ordering`, приведённые к типам полей модели `model`.
+        """
+        if not cursor:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(detail='Некорректное значение параметра cursor.')
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(detail='Некорректное значение параметра cursor.')
+
+        # Курсор передаётся клиентом: значение неподходящего типа или вне допустимого диапазона
+        # не должно приводить к ошибке при выполнении запроса
+        values = []
+        for field_name, value in zip(self.ordering, position):
+            if value is None:
+                raise NotFound(detail='Некорректное значение параметра cursor.')
+
+            field = model._meta.get_field(field_name.lstrip('-'))
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(detail='Некорректное значение параметра cursor.')
+
+            # SQLite не ограничивает диапазон целых чисел в схеме, но не принимает значения вне 64 бит
+            value_range = BaseDatabaseOperations.integer_field_ranges.get(field.get_internal_type())
+            if value_range is not None and not value_range[0] <= value <= value_range[1]:
+                raise NotFound(detail='Некорректное значение параметра cursor.')
+
+            values.append(value)
+
+        return values
+
+
+class VehiclePagination(KeysetPagination):
+    """ Постраничный вывод списка транспортных средств: порядок по марке, модели и идентификатору. """
+    ordering = ('make', 'model', 'id', )
+
+
+class DataLogPagination(KeysetPagination):
+    """ Постраничный вывод журнала: от новых записей к старым. """
+    ordering = ('-created_at', '-id', )
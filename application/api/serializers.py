@@ -1,7 +1,11 @@
+import datetime
+from typing import Optional
+
 from django.contrib.auth.models import User, Group
+from django.utils import timezone
 from rest_framework import serializers
 
-from api.models import Vehicle, DataLog
+from api.models import Vehicle, DataLog, ImportJob, ImportUpload
 
 
 class UserSerializer(serializers.HyperlinkedModelSerializer):
@@ -34,6 +38,41 @@ class VehicleSerializer(serializers.ModelSerializer):
                   'vehicle_certificate_date', ]
 
 
+class ReadOnlyListSerializer(serializers.BaseSerializer):
+    """
+    Облегчённый сериализатор записей для вывода списков (только чтение).
+
+    Формирует то же представление, что и соответствующий ModelSerializer, но не создаёт поля DRF для каждой записи:
+    значения берутся из атрибутов модели, дата и время преобразуются общими экземплярами полей DRF.
+    Пользователи в полях `user_fields` выводятся по `User.username` и должны быть загружены через select_related.
+    """
+    field_names: tuple[str, ...] = ()
+    user_fields: tuple[str, ...] = ()
+
+    datetime_field = serializers.DateTimeField()
+    date_field = serializers.DateField()
+
+    def to_representation(self, instance) -> dict:
+        data = dict()
+        for field in self.field_names:
+            value = getattr(instance, field)
+            if field in self.user_fields:
+                value = value.username if value is not None else None
+            elif isinstance(value, datetime.datetime):
+                value = self.datetime_field.to_representation(value)
+            elif isinstance(value, datetime.date):
+                value = self.date_field.to_representation(value)
+            data[field] = value
+
+        return data
+
+
+class VehicleListSerializer(ReadOnlyListSerializer):
+    """ Сериализатор списка транспортных средств; формирует то же представление, что и VehicleSerializer. """
+    field_names = tuple(VehicleSerializer.Meta.fields)
+    user_fields = ('created_by', 'updated_by', )
+
+
 class DataLogSerializer(serializers.ModelSerializer):
     """
     Сериализатор модели DataLog.
@@ -52,3 +91,58 @@ class DataLogSerializer(serializers.ModelSerializer):
             'id', 'created_at', 'created_by', 'vehicle_id', 'registration_number', 'vin', 'vehicle_certificate_number',
             'operation', 'description',
         ]
+
+
+class DataLogListSerializer(ReadOnlyListSerializer):
+    """ Сериализатор списка записей лог-таблицы; формирует то же представление, что и DataLogSerializer. """
+    field_names = tuple(DataLogSerializer.Meta.fields)
+    user_fields = ('created_by', )
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор модели ImportJob.
+
+    Поле created_by переопределено и отображает `User.username` вместо `User.id`.
+    Поле throughput содержит скорость обработки файла (строк в секунду).
+    """
+    created_by = serializers.SlugRelatedField(read_only=True, slug_field='username', )
+    throughput = serializers.SerializerMethodField()
+    has_errors = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'created_at', 'created_by', 'file_type', 'checksum', 'mode', 'key_field', 'status', 'started_at',
+            'finished_at',
+            'rows_processed', 'rows_imported', 'rows_updated', 'rows_unchanged', 'rows_failed', 'throughput',
+            'has_errors', 'message',
+        ]
+        read_only_fields = fields
+
+    def get_throughput(self, job: ImportJob) -> Optional[float]:
+        if job.started_at is None:
+            return None
+
+        elapsed = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+        return round(job.rows_processed / elapsed, 1) if elapsed > 0 else None
+
+    def get_has_errors(self, job: ImportJob) -> bool:
+        return bool(job.errors_file)
+
+
+class ImportUploadSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор модели ImportUpload.
+
+    Поле job содержит задание на импорт, созданное после завершения загрузки.
+    """
+    job = ImportJobSerializer(read_only=True)
+
+    class Meta:
+        model = ImportUpload
+        fields = [
+            'id', 'created_at', 'updated_at', 'filename', 'file_type', 'content_encoding', 'mode', 'key_field', 'size',
+            'checksum', 'received', 'status', 'job',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,71 @@
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from api.models import Vehicle
+from utils.cache import bump_data_version_on_commit
+from utils.metrics import record_query
+from utils.search import create_sqlite_search_index, create_postgresql_search_index
+
+
+TRIGRAM_INDEXED_FIELDS = ('make', 'model', 'color', )
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """ Применяет к новому соединению с SQLite параметры профиля `SQLITE_PRAGMAS` (см. settings.database). """
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def install_query_metrics(sender, connection, **kwargs):
+    """ Подключает к соединению учёт количества и времени запросов к БД для метрик (см. utils.metrics). """
+    # Сигнал отправляется при каждом повторном соединении того же объекта соединения
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def create_trigram_indexes(sender, using: str, **kwargs):
+    """
+    Создаёт на PostgreSQL триграммные GIN-индексы для полей, фильтруемых по `icontains`.
+
+    Django формирует для `icontains` условие `UPPER(<поле>::text) LIKE UPPER(...)`, поэтому индекс строится
+    по тому же выражению. На других СУБД ничего не делает.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    table = Vehicle._meta.db_table
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for field in TRIGRAM_INDEXED_FIELDS:
+                column = Vehicle._meta.get_field(field).column
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS vehicle_{field}_trgm_idx ON "{table}" '
+                    f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+                )
+    except DatabaseError as e:
+        logging.warning(f'Не удалось создать триграммные индексы (требуется расширение pg_trgm): {e}')
+        return
+    logging.info(f'Триграммные индексы для полей {TRIGRAM_INDEXED_FIELDS} созданы.')
+
+
+def create_search_index(sender, using: str, **kwargs):
+    """ Создаёт индекс для поиска транспортных средств по строке (см. utils.search). """
+    connection = connections[using]
+    match connection.vendor:
+        case 'sqlite':
+            create_sqlite_search_index(connection)
+        case 'postgresql':
+            create_postgresql_search_index(connection)
+
+
+def invalidate_vehicles_cache(sender, **kwargs):
+    """ Изменяет версию данных о транспортных средствах при сохранении или удалении записи. """
+    bump_data_version_on_commit()
@@ -1,3 +1,1168 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import contextmanager
+from unittest import mock
 
-# Create your tests here.
+import pandas
+import xlsxwriter
+from asgiref.sync import sync_to_async
+from prometheus_client import REGISTRY
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.module_loading import import_string
+from rest_framework.test import APIClient
+
+from api.models import (
+    Vehicle, DataLog, ImportJob, ImportUpload, DATA_OPERATIONS_MAPPING, IMPORT_JOB_STATUSES_MAPPING,
+)
+from api.signals import apply_sqlite_pragmas
+from settings.cache import get_cache_configuration
+from utils.data import (
+    FileHeadersEnum, bulk_save_vehicles, import_vehicles_batch, parse_vehicles, pyarrow, read_csv_batches,
+    stream_file, stream_vehicles_csv, upsert_vehicles_batch, validate_vehicles_batches, validate_vehicles_dataframe,
+    write_vehicles_xlsx,
+)
+from utils.datalog import DataLogWriter, data_log_writer
+from utils.jobs import claim_import_job, process_import_job
+from utils.postgresql import copy_vehicles_batch, is_copy_import_available
+from utils.search import search_vehicle_ids
+from utils.synthetic import generate_fleet, generate_vehicles, get_vin_check_digit
+from utils.transactions import immediate_atomic
+from utils.uploads import complete_upload, record_upload_progress
+
+
+# Тесты используют кэш в памяти процесса, а не кэш из настроек (файлы media/cache или Redis): очистка кэша
+# в тестах не должна удалять данные развёрнутого приложения
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class QueryBudgetMixin:
+    """ Проверка того, что блок кода выполняет не более заданного количества запросов к БД. """
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), budget, f'Выполнено запросов: {len(context)}, допустимо: {budget}.\n{queries}',
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class VehicleDetailWriteTestCase(TestCase):
+    """
+    Проверка количества запросов к БД при изменении и удалении записи о транспортном средстве.
+
+    Запросы SAVEPOINT и RELEASE SAVEPOINT относятся к транзакции представления: тест выполняется внутри транзакции.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+        self.vehicle = Vehicle.objects.create(created_by=self.user, updated_by=self.user, **generate_vehicles(1)[0])
+        self.url = f'/api/vehicles/{self.vehicle.id}/'
+
+    def assert_logged(self, operation: str):
+        """ Проверяет, что после фиксации транзакции в лог-таблицу записана операция `operation`. """
+        data_log_writer.flush()
+        log = DataLog.objects.get()
+        self.assertEqual(log.operation, DATA_OPERATIONS_MAPPING[operation])
+        self.assertEqual(log.vehicle_id, self.vehicle.id)
+        self.assertEqual(log.vin, self.vehicle.vin)
+
+    def test_patch(self):
+        # SAVEPOINT, SELECT записи вместе с пользователями, UPDATE, RELEASE SAVEPOINT
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(4):
+            response = self.client.patch(self.url, {'color': 'Белый'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['color'], 'Белый')
+        self.assertEqual(response.data['updated_by'], self.user.username)
+        self.assert_logged('modify')
+
+    def test_put(self):
+        data = generate_vehicles(1, prefix='P')[0]
+        data['vehicle_certificate_date'] = data['vehicle_certificate_date'].isoformat()
+
+        # Дополнительно к PATCH - проверка уникальности трёх полей
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(7):
+            response = self.client.put(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['vin'], data['vin'])
+        self.assertEqual(response.data['created_by'], self.user.username)
+        self.assert_logged('modify')
+
+    def test_delete(self):
+        # SAVEPOINT, SELECT записи вместе с пользователями, DELETE, RELEASE SAVEPOINT
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(4):
+            response = self.client.delete(self.url)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Vehicle.objects.exists())
+        self.assert_logged('remove')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DataLogWriterTestCase(TransactionTestCase):
+    """
+    Проверка буфера записей лог-таблицы: запись по заполнению буфера, по таймеру, по окончании запроса
+    и повторная запись после ошибки БД.
+
+    Используется TransactionTestCase: фоновый поток записи буфера работает в собственном соединении с БД.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester')
+        self.vehicle = Vehicle.objects.create(created_by=self.user, updated_by=self.user, **generate_vehicles(1)[0])
+
+    def create_writer(self, **kwargs) -> DataLogWriter:
+        writer = DataLogWriter(**kwargs)
+        self.addCleanup(lambda: writer._timer and writer._timer.cancel())
+        return writer
+
+    def create_log(self) -> DataLog:
+        return DataLog(
+            created_by=self.user,
+            operation=DATA_OPERATIONS_MAPPING['modify'],
+            description='Изменение данных',
+            vehicle_id=self.vehicle.id,
+            registration_number=self.vehicle.registration_number,
+            vin=self.vehicle.vin,
+            vehicle_certificate_number=self.vehicle.vehicle_certificate_number,
+        )
+
+    def test_buffer_size(self):
+        writer = self.create_writer(buffer_size=3, flush_interval=60)
+        writer.add(self.create_log())
+        writer.add(self.create_log())
+        self.assertEqual(DataLog.objects.count(), 0)
+
+        writer.add(self.create_log())
+        self.assertEqual(DataLog.objects.count(), 3)
+
+    def test_flush_interval(self):
+        writer = self.create_writer(buffer_size=100, flush_interval=0.05)
+        writer.add(self.create_log())
+        self.assertEqual(DataLog.objects.count(), 0)
+
+        deadline = time.monotonic() + 5
+        while not DataLog.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(DataLog.objects.count(), 1)
+
+    def test_request_finished(self):
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(self.user)
+        response = client.patch(f'/api/vehicles/{self.vehicle.id}/', {'color': 'Белый'}, format='json')
+
+        # Запись сохранена по окончании запроса, до истечения интервала записи буфера
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(DataLog.objects.get().operation, DATA_OPERATIONS_MAPPING['modify'])
+
+    def test_database_error(self):
+        writer = self.create_writer(buffer_size=2, flush_interval=60)
+        writer.add(self.create_log())
+        error = DatabaseError('database is locked')
+        with mock.patch.object(DataLog.objects, 'bulk_create', side_effect=error), self.assertLogs(level='WARNING'):
+            writer.add(self.create_log())
+        self.assertEqual(DataLog.objects.count(), 0)
+
+        # Записи, которые не удалось сохранить, сохраняются при следующей попытке вместе с новыми
+        writer.add(self.create_log())
+        writer.flush()
+        self.assertEqual(DataLog.objects.count(), 3)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ListQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """
+    Проверка количества запросов к БД при выводе списков.
+
+    Записи создаются разными пользователями: количество запросов не должно зависеть от количества записей и авторов.
+    """
+    page_size = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        users = [User.objects.create_user(username=f'user{number}') for number in range(5)]
+
+        vehicles = [
+            Vehicle(created_by=users[number % len(users)], updated_by=users[-number % len(users)], **vehicle)
+            for number, vehicle in enumerate(generate_vehicles(cls.page_size + 20))
+        ]
+        Vehicle.objects.bulk_create(vehicles)
+
+        DataLog.objects.bulk_create([
+            DataLog(created_by=users[number % len(users)], operation=DATA_OPERATIONS_MAPPING['add'], vehicle_id=number,
+                    registration_number=vehicle.registration_number, vin=vehicle.vin,
+                    vehicle_certificate_number=vehicle.vehicle_certificate_number)
+            for number, vehicle in enumerate(vehicles)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.admin)
+
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = self.settings(
+            MEDIA_ROOT=media_root.name, EXPORT_CACHE_DIR=os.path.join(media_root.name, 'exports'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_vehicle_list(self):
+        # COUNT(*) и выборка страницы вместе с пользователями
+        with self.assertQueryBudget(2):
+            response = self.client.get('/api/vehicles/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.page_size)
+        self.assertTrue(all(row['created_by'].startswith('user') for row in response.data['results']))
+
+    def test_vehicle_list_cursor(self):
+        with self.assertQueryBudget(1):
+            response = self.client.get('/api/vehicles/', {'cursor': ''})
+
+        self.assertEqual(len(response.data['results']), self.page_size)
+
+        with self.assertQueryBudget(1):
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_invalid_cursor(self):
+        def encode(position: list) -> str:
+            return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+        for url, position in (
+            ('/api/logs/', ['вчера', 1]),
+            ('/api/logs/', ['2020-01-01T00:00:00+00:00', 'один']),
+            ('/api/logs/', [5, 1]),
+            ('/api/vehicles/', ['Лада', 'Веста', 10 ** 30]),
+            ('/api/vehicles/', ['Лада', 'Веста', None]),
+        ):
+            with self.subTest(url=url, position=position):
+                self.assertEqual(self.client.get(url, {'cursor': encode(position)}).status_code, 404)
+
+        response = self.client.get('/api/logs/', {'cursor': encode(['2020-01-01T00:00:00+00:00', '1'])})
+        self.assertEqual(response.status_code, 200)
+
+    def test_vehicle_list_filtered(self):
+        with self.assertQueryBudget(2):
+            response = self.client.get('/api/vehicles/', {'make': 'a', 'color': 'ый'})
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_data_log_list(self):
+        with self.assertQueryBudget(2):
+            response = self.client.get('/api/logs/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.page_size)
+        self.assertTrue(all(row['created_by'].startswith('user') for row in response.data['results']))
+
+    def test_export(self):
+        for content_type in ('text/csv',
+                             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'):
+            with self.assertQueryBudget(1):
+                response = self.client.get('/api/vehicles/export/', HTTP_ACCEPT=content_type)
+                content = b''.join(response.streaming_content)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(content)
+
+    @unittest.skipIf(pyarrow is None, 'Не установлена библиотека pyarrow')
+    def test_export_columnar(self):
+        for content_type, file_type in (('application/vnd.apache.parquet', 'parquet'),
+                                        ('application/vnd.apache.arrow.stream', 'arrow')):
+            response = self.client.get('/api/vehicles/export/', HTTP_ACCEPT=content_type)
+            self.assertEqual(response.status_code, 200)
+
+            # Выгруженный файл читается импортом без изменений
+            content = io.BytesIO(b''.join(response.streaming_content))
+            dataframe = next(parse_vehicles(file_type, content))
+            self.assertEqual(sorted(dataframe['vin']), sorted(Vehicle.objects.values_list('vin', flat=True)))
+
+    def test_export_compressed(self):
+        response = self.client.get('/api/vehicles/export/', HTTP_ACCEPT='text/csv', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = gzip.decompress(b''.join(response.streaming_content))
+
+        # Повторная выгрузка отдаётся из кэша сжатой
+        response = self.client.get('/api/vehicles/export/', HTTP_ACCEPT='text/csv', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), content)
+
+        response = self.client.get('/api/vehicles/export/', HTTP_ACCEPT='text/csv')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), content)
+
+    def test_export_cached(self):
+        params = {'make': 'a'}
+        response = self.client.get('/api/vehicles/export/', params, HTTP_ACCEPT='text/csv')
+        content = b''.join(response.streaming_content)
+
+        # Повторная выгрузка отдаётся из кэша без обращения к БД
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/vehicles/export/', params, HTTP_ACCEPT='text/csv')
+            cached_content = b''.join(response.streaming_content)
+        self.assertEqual(cached_content, content)
+
+        with self.settings(EXPORT_CACHE_ACCEL_REDIRECT_LOCATION='/protected/exports/'):
+            response = self.client.get('/api/vehicles/export/', params, HTTP_ACCEPT='text/csv',
+                                       HTTP_X_SENDFILE_TYPE='X-Accel-Redirect')
+        self.assertTrue(response['X-Accel-Redirect'].startswith('/protected/exports/'))
+        self.assertFalse(response.content)
+
+        # После изменения данных файл формируется заново, устаревший файл удаляется из кэша
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.filter(make__icontains='a').first().delete()
+
+        response = self.client.get('/api/vehicles/export/', params, HTTP_ACCEPT='text/csv')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), len(content.splitlines()) - 1)
+        self.assertEqual(len(os.listdir(settings.EXPORT_CACHE_DIR)), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class VehicleListFilterTestCase(TestCase):
+    """ Проверка фильтрации списка транспортных средств по идентификаторам без учёта регистра. """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+        vehicle = generate_vehicles(1)[0]
+        vehicle.update(registration_number='а123вс77', vin=vehicle['vin'].lower())
+        self.vehicle = Vehicle.objects.create(created_by=self.user, updated_by=self.user, **vehicle)
+
+    def test_cyrillic_registration_number(self):
+        # Значения фильтра и поля приводятся к верхнему регистру одной функцией БД
+        response = self.client.get('/api/vehicles/', {'registration_number': 'а123вс77'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.vehicle.id])
+
+        response = self.client.get('/api/vehicles/', {'vin': self.vehicle.vin.upper()})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.vehicle.id])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResponseCacheTestCase(TestCase):
+    """ Проверка кэширования ответов API и его сброса при изменении данных. """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+        self.vehicle = Vehicle.objects.create(created_by=self.user, updated_by=self.user, **generate_vehicles(1)[0])
+
+    def test_cached_list(self):
+        response = self.client.get('/api/vehicles/', {'make': self.vehicle.make, 'page': 1})
+        self.assertEqual(response.data['count'], 1)
+
+        # Порядок параметров запроса не влияет на ключ кэша
+        with self.assertNumQueries(0):
+            cached_response = self.client.get('/api/vehicles/', {'page': 1, 'make': self.vehicle.make})
+
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(cached_response['ETag'], response['ETag'])
+
+    def test_not_modified(self):
+        url = f'/api/vehicles/{self.vehicle.id}/'
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalidated_by_save(self):
+        url = f'/api/vehicles/{self.vehicle.id}/'
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'color': 'Белый'}, format='json')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['color'], 'Белый')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_invalidated_by_import(self):
+        self.assertEqual(self.client.get('/api/vehicles/').data['count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicles = [Vehicle(**vehicle) for vehicle in generate_vehicles(3, prefix='I')]
+            bulk_save_vehicles(vehicles, user=self.user)
+
+        self.assertEqual(self.client.get('/api/vehicles/').data['count'], 4)
+
+    def test_invalidated_in_other_process(self):
+        # Кэш по умолчанию общий для процессов: каждый рабочий процесс создаёт собственный клиент кэша
+        with tempfile.TemporaryDirectory() as directory:
+            configuration = get_cache_configuration(None, default_location=directory)
+            worker_caches = [
+                import_string(configuration['BACKEND'])(configuration['LOCATION'], {}) for _ in range(2)
+            ]
+            url = f'/api/vehicles/{self.vehicle.id}/'
+
+            with mock.patch('utils.cache.cache', worker_caches[0]):
+                etag = self.client.get(url)['ETag']
+
+            with mock.patch('utils.cache.cache', worker_caches[1]), self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(url, {'color': 'Белый'}, format='json')
+
+            with mock.patch('utils.cache.cache', worker_caches[0]):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['color'], 'Белый')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class VehicleSearchTestCase(TestCase):
+    """ Проверка поиска транспортных средств по строке и обновления индекса при изменении данных. """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+        vehicles = [Vehicle(created_by=self.user, updated_by=self.user, **vehicle) for vehicle in generate_vehicles(20)]
+        bulk_save_vehicles(vehicles, user=self.user)
+        self.vehicle = Vehicle.objects.get(vin=vehicles[7].vin)
+
+    def search(self, query: str) -> list[str]:
+        response = self.client.get('/api/vehicles/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['vin'] for row in response.data['results']]
+
+    def test_search(self):
+        # Часть VIN без учёта регистра
+        self.assertEqual(self.search(self.vehicle.vin[-6:].lower()), [self.vehicle.vin])
+
+        # Несколько слов: каждое должно входить в одно из полей записи
+        query = f'{self.vehicle.make} {self.vehicle.color.lower()} {self.vehicle.registration_number[-5:]}'
+        self.assertEqual(self.search(query), [self.vehicle.vin])
+
+        self.assertEqual(self.search('отсутствует'), [])
+
+    def test_index_updated(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.filter(pk=self.vehicle.pk).update(color='Фиолетовый')
+        self.assertEqual(self.search('фиолет'), [self.vehicle.vin])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.delete()
+        self.assertEqual(self.search('фиолет'), [])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class VehicleStatsTestCase(TestCase):
+    """ Проверка статистики по транспортным средствам. """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+        Vehicle.objects.bulk_create([
+            Vehicle(created_by=self.user, updated_by=self.user, **vehicle) for vehicle in generate_vehicles(50)
+        ])
+
+    def test_group_by(self):
+        response = self.client.get('/api/vehicles/stats/', {'group_by': 'make,year_of_manufacture', 'color': 'ый'})
+        self.assertEqual(response.status_code, 200)
+
+        vehicles = Vehicle.objects.filter(color__contains='ый')
+        self.assertEqual(response.data['total'], vehicles.count())
+        for row in response.data['results']:
+            group = vehicles.filter(make=row['make'], year_of_manufacture=row['year_of_manufacture'])
+            self.assertEqual(row['count'], group.count())
+            self.assertEqual(row['min_year_of_manufacture'], row['year_of_manufacture'])
+
+    def test_total(self):
+        response = self.client.get('/api/vehicles/stats/')
+        self.assertEqual(response.data['total'], 50)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class VehicleValidationTestCase(TestCase):
+    """ Проверка данных о транспортных средствах по колонкам DataFrame. """
+
+    def validate_dates(self, values: list) -> list:
+        vehicles = generate_vehicles(len(values))
+        for vehicle, value in zip(vehicles, values):
+            vehicle['vehicle_certificate_date'] = value
+
+        cleaned, errors = validate_vehicles_dataframe(pandas.DataFrame(vehicles))
+        dates = cleaned['vehicle_certificate_date'].where(errors['vehicle_certificate_date'].isna(), None)
+        return dates.tolist()
+
+    def test_certificate_date_strings(self):
+        # Формат строки не угадывается: день и месяц не переставляются, год не становится датой
+        self.assertEqual(
+            self.validate_dates(['2020-06-05', ' 2020-1-13 ', '05.06.2020', '13.01.2020', '2020', '2020-01-13 10:00']),
+            [datetime.date(2020, 6, 5), datetime.date(2020, 1, 13), None, None, None, None],
+        )
+
+    def test_certificate_date_types(self):
+        # Даты из ячеек XLSX принимаются как есть, числа - нет
+        self.assertEqual(
+            self.validate_dates([
+                datetime.date(2020, 6, 5), datetime.datetime(2020, 6, 5, 10, 30), pandas.Timestamp('2020-06-05'),
+                2020, 20200605, None,
+            ]),
+            [datetime.date(2020, 6, 5)] * 3 + [None] * 3,
+        )
+
+    def test_empty_text_column(self):
+        # Пустая колонка XLS или колонка double в Parquet читается как float
+        dataframe = pandas.DataFrame(generate_vehicles(3))
+        dataframe['color'] = float('nan')
+        dataframe['model'] = [1.5, float('nan'), 2.0]
+
+        cleaned, errors = validate_vehicles_dataframe(dataframe)
+        self.assertEqual(errors['color'].tolist(), ['Обязательное поле.'] * 3)
+        self.assertEqual(errors['model'].notna().tolist(), [False, True, False])
+        self.assertEqual(cleaned['model'][0], '1.5')
+
+    def test_year_out_of_range(self):
+        dataframe = pandas.DataFrame(generate_vehicles(5))
+        dataframe['year_of_manufacture'] = [1e30, 1e20, float('inf'), -float('inf'), 2010.0]
+
+        cleaned, errors = validate_vehicles_dataframe(dataframe)
+        self.assertEqual(errors['year_of_manufacture'].notna().tolist(), [True] * 4 + [False])
+        self.assertEqual(cleaned['year_of_manufacture'].tolist()[4], 2010)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BulkImportTestCase(TestCase):
+    """ Проверка пакетного импорта: сохранение корректных строк, ошибки с номерами строк файла, лог-таблица. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester')
+        self.vehicles = generate_vehicles(10)
+
+    def test_import_batch(self):
+        Vehicle.objects.create(created_by=self.user, updated_by=self.user, **self.vehicles[3])
+        self.vehicles[5]['vin'] = 'КОРОТКИЙ'
+        self.vehicles[7]['year_of_manufacture'] = 1800
+
+        imported, errors = import_vehicles_batch(pandas.DataFrame(self.vehicles), user=self.user)
+        self.assertEqual(imported, 7)
+        # Первая строка файла - заголовки, данные начинаются со второй
+        self.assertEqual(sorted(errors), [5, 7, 9])
+        self.assertIn('vin', errors[7])
+        self.assertIn('year_of_manufacture', errors[9])
+        self.assertEqual(Vehicle.objects.count(), 8)
+        self.assertEqual(DataLog.objects.filter(operation=DATA_OPERATIONS_MAPPING['import']).count(), 7)
+
+    def test_benchmark_import(self):
+        output = io.StringIO()
+        call_command('benchmark_import', rows=20, stdout=output)
+
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+        # Записи, созданные при измерении, удаляются
+        self.assertFalse(Vehicle.objects.exists())
+        self.assertFalse(DataLog.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class UpsertImportTestCase(TestCase):
+    """ Проверка импорта в режиме upsert средствами ORM (без COPY). """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester')
+        self.vehicles = generate_vehicles(8)
+        Vehicle.objects.bulk_create([
+            Vehicle(created_by=self.user, updated_by=self.user, **vehicle) for vehicle in self.vehicles[:4]
+        ])
+
+    def test_upsert(self):
+        self.vehicles[0]['color'] = 'Фиолетовый'
+        self.vehicles[1]['model'] = 'Другая'
+        # Новая запись с регистрационным номером, принадлежащим записи, отсутствующей в файле
+        self.vehicles[7]['registration_number'] = self.vehicles[2]['registration_number']
+        rows = self.vehicles[:2] + self.vehicles[3:]
+
+        created, updated, unchanged, errors = upsert_vehicles_batch(pandas.DataFrame(rows), user=self.user, key='vin')
+        self.assertEqual((created, updated, unchanged), (3, 2, 1))
+        self.assertEqual(list(errors), [8])
+        self.assertEqual(errors[8]['registration_number'], ['Транспортное средство с таким значением уже существует.'])
+
+        self.assertEqual(Vehicle.objects.count(), 7)
+        self.assertEqual(Vehicle.objects.get(vin=self.vehicles[0]['vin']).color, 'Фиолетовый')
+        self.assertEqual(Vehicle.objects.get(vin=self.vehicles[1]['vin']).model, 'Другая')
+
+        # Запись в лог-таблице для каждой созданной и изменённой записи
+        logs = DataLog.objects.values_list('operation', 'vin')
+        self.assertEqual(
+            sorted(vin for operation, vin in logs if operation == DATA_OPERATIONS_MAPPING['add']),
+            sorted(vehicle['vin'] for vehicle in self.vehicles[4:7]),
+        )
+        self.assertEqual(
+            sorted(vin for operation, vin in logs if operation == DATA_OPERATIONS_MAPPING['modify']),
+            sorted(vehicle['vin'] for vehicle in self.vehicles[:2]),
+        )
+
+    def test_key_field(self):
+        # Ключ - регистрационный номер: VIN, принадлежащий записи с другим номером, не может быть перезаписан
+        self.vehicles[0]['vin'] = self.vehicles[1]['vin']
+        self.vehicles[2]['color'] = 'Фиолетовый'
+        rows = [self.vehicles[0], *self.vehicles[2:4]]
+
+        created, updated, unchanged, errors = upsert_vehicles_batch(
+            pandas.DataFrame(rows), user=self.user, key='registration_number',
+        )
+        self.assertEqual((created, updated, unchanged), (0, 1, 1))
+        self.assertEqual(list(errors), [2])
+        self.assertIn('vin', errors[2])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ChunkedImportTestCase(TestCase):
+    """ Проверка импорта файла, содержащего больше строк, чем размер пакета. """
+
+    batch_size = 7
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester')
+        self.vehicles = generate_vehicles(25)
+        self.vehicles[3]['vin'] = 'КОРОТКИЙ'
+        self.vehicles[18]['year_of_manufacture'] = 1800
+        # Повтор строки из первого пакета обнаруживается проверкой по БД, так как первый пакет уже сохранён
+        self.vehicles[20] = dict(self.vehicles[0])
+
+    def get_csv(self) -> io.BytesIO:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow([item.value for item in FileHeadersEnum])
+        writer.writerows([vehicle[item.name] for item in FileHeadersEnum] for vehicle in self.vehicles)
+        return io.BytesIO(buffer.getvalue().encode('utf-8'))
+
+    def get_xlsx(self) -> io.BytesIO:
+        data = io.BytesIO()
+        workbook = xlsxwriter.Workbook(data)
+        worksheet = workbook.add_worksheet()
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        worksheet.write_row(0, 0, [item.value for item in FileHeadersEnum])
+        for row_number, vehicle in enumerate(self.vehicles, start=1):
+            for column_number, item in enumerate(FileHeadersEnum):
+                worksheet.write(row_number, column_number, vehicle[item.name],
+                                date_format if item.name == 'vehicle_certificate_date' else None)
+        workbook.close()
+        data.seek(0)
+        return data
+
+    def assert_imported(self, file_type: str, data: io.BytesIO):
+        imported, errors, batches = 0, {}, 0
+        for dataframe in parse_vehicles(file_type, data, batch_size=self.batch_size):
+            batch_imported, batch_errors = import_vehicles_batch(dataframe, user=self.user)
+            imported += batch_imported
+            errors.update(batch_errors)
+            batches += 1
+
+        self.assertEqual(batches, 4)
+        self.assertEqual(imported, 22)
+        self.assertEqual(sorted(errors), [5, 20, 22])
+        self.assertIn('vin', errors[22])
+        self.assertEqual(Vehicle.objects.count(), 22)
+
+    def test_csv(self):
+        engines = ['c', 'pyarrow'] if pyarrow is not None else ['c']
+        for engine in engines:
+            with self.subTest(engine=engine), self.settings(CSV_IMPORT_ENGINE=engine), transaction.atomic():
+                self.assert_imported('csv', self.get_csv())
+                transaction.set_rollback(True)
+
+    def test_xlsx(self):
+        self.assert_imported('xlsx', self.get_xlsx())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ExportStreamTestCase(TestCase):
+    """ Проверка потоковой выгрузки: все записи по порядку независимо от границ порций. """
+
+    def setUp(self):
+        user = User.objects.create_user(username='tester')
+        Vehicle.objects.bulk_create([
+            Vehicle(created_by=user, updated_by=user, **vehicle) for vehicle in generate_vehicles(30)
+        ])
+        self.queryset = Vehicle.objects.order_by('-vin')
+        self.vins = list(self.queryset.values_list('vin', flat=True))
+
+    def test_csv(self):
+        chunks = list(stream_vehicles_csv(self.queryset, chunk_size=7))
+
+        # Заголовки и 4 полные порции по 7 строк, затем остаток; строки не разрезаются границей порции
+        self.assertEqual(len(chunks), 5)
+        self.assertTrue(all(chunk.endswith('\n') for chunk in chunks))
+        dataframe = next(parse_vehicles('csv', io.BytesIO(''.join(chunks).encode('utf-8'))))
+        self.assertEqual(dataframe['vin'].tolist(), self.vins)
+
+    def test_xlsx(self):
+        content = b''.join(stream_file(write_vehicles_xlsx(self.queryset, chunk_size=7), block_size=1024))
+
+        dataframe = next(parse_vehicles('xlsx', io.BytesIO(content)))
+        self.assertEqual(dataframe['vin'].tolist(), self.vins)
+        self.assertEqual(
+            dataframe['vehicle_certificate_date'].dt.date.tolist(),
+            list(self.queryset.values_list('vehicle_certificate_date', flat=True)),
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CsvReaderTestCase(TestCase):
+    """ Проверка разбора файлов CSV: кодировка, типы значений и выбор столбцов. """
+
+    def setUp(self):
+        headers = ';'.join(['Примечание'] + [item.value for item in FileHeadersEnum])
+        self.content = f'{headers}\n123;Лада;Веста;Белый;А001АА77;2020;XTA00000000000001;0012 345678;2020-01-02\n'
+
+    def test_encodings(self):
+        engines = ['c', 'pyarrow'] if pyarrow is not None else ['c']
+        for engine in engines:
+            for encoding in ('utf-8', 'utf-8-sig', 'cp1251'):
+                with self.subTest(engine=engine, encoding=encoding):
+                    data = io.BytesIO(self.content.encode(encoding))
+                    dataframe = next(read_csv_batches(data, engine=engine))
+
+                    # Читаются только нужные столбцы, номера остаются строками с ведущими нулями
+                    self.assertEqual(list(dataframe.columns), [item.value for item in FileHeadersEnum])
+                    self.assertEqual(dataframe.iloc[0]['Марка'], 'Лада')
+                    self.assertEqual(dataframe.iloc[0]['Номер СТС'], '0012 345678')
+                    self.assertEqual(dataframe.iloc[0]['Год выпуска'], '2020')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImportJobTestCase(TestCase):
+    """ Проверка импорта в фоновом режиме: загрузка файла, взятие задания в обработку, состояние и отчёт об ошибках. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        vehicles = generate_vehicles(12)
+        vehicles[4]['vin'] = 'КОРОТКИЙ'
+        vehicles[9]['year_of_manufacture'] = 'год'
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow([item.value for item in FileHeadersEnum])
+        writer.writerows([vehicle[item.name] for item in FileHeadersEnum] for vehicle in vehicles)
+        self.content = buffer.getvalue().encode('utf-8')
+
+    def test_import_job(self):
+        response = self.client.put(
+            '/api/vehicles/import/', self.content, content_type='text/csv',
+            HTTP_CONTENT_DISPOSITION='attachment; filename=v.csv',
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], IMPORT_JOB_STATUSES_MAPPING['pending'])
+        self.assertFalse(Vehicle.objects.exists())
+
+        # Задание берёт в обработку только один обработчик
+        job = claim_import_job()
+        self.assertEqual(job.id, response.data['id'])
+        self.assertEqual(job.status, IMPORT_JOB_STATUSES_MAPPING['running'])
+        self.assertIsNone(claim_import_job())
+
+        process_import_job(job)
+
+        response = self.client.get(f'/api/vehicles/import/{job.id}/')
+        self.assertEqual(response.data['status'], IMPORT_JOB_STATUSES_MAPPING['completed'])
+        self.assertEqual(
+            (response.data['rows_processed'], response.data['rows_imported'], response.data['rows_failed']),
+            (12, 10, 2),
+        )
+        self.assertTrue(response.data['has_errors'])
+        self.assertEqual(Vehicle.objects.count(), 10)
+
+        response = self.client.get(f'/api/vehicles/import/{job.id}/errors/')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8')), delimiter=';'))
+        self.assertEqual(rows[0], ['Строка', 'Поле', 'Ошибка'])
+        self.assertEqual([(row[0], row[1]) for row in rows[1:]], [('6', 'vin'), ('11', 'year_of_manufacture')])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImportUploadTestCase(TestCase):
+    """ Проверка загрузки файла для импорта по частям и повторной загрузки того же файла. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = self.settings(
+            MEDIA_ROOT=media_root.name, IMPORT_UPLOAD_DIR=os.path.join(media_root.name, 'uploads'),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        with open(os.path.join(settings.BASE_DIR.parent, 'data', 'vehicles.csv'), 'rb') as file:
+            self.content = file.read()
+        self.checksum = hashlib.sha256(self.content).hexdigest()
+
+    def create_upload(self):
+        return self.client.post(
+            '/api/vehicles/import/uploads/',
+            {'content_type': 'text/csv', 'size': len(self.content), 'checksum': self.checksum, 'filename': 'v.csv'},
+            format='json',
+        )
+
+    def put_range(self, upload_id: int, start: int, end: int):
+        return self.client.generic(
+            'PUT', f'/api/vehicles/import/uploads/{upload_id}/', self.content[start:end + 1],
+            content_type='application/octet-stream', HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.content)}',
+        )
+
+    def test_resumable_upload(self):
+        response = self.create_upload()
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['id']
+
+        self.assertEqual(self.put_range(upload_id, 0, 499).data['received'], 500)
+        # Часть, не продолжающая полученные данные, не принимается
+        self.assertEqual(self.put_range(upload_id, 700, 899).status_code, 416)
+        # Повторная передача уже полученных байт допускается
+        self.assertEqual(self.put_range(upload_id, 300, len(self.content) - 1).data['received'], len(self.content))
+
+        response = self.client.post(f'/api/vehicles/import/uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(id=response.data['job']['id'])
+        self.assertEqual(job.checksum, self.checksum)
+        with job.file.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+        # Повторная загрузка того же файла до выполнения задания возвращает существующее задание
+        response = self.create_upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['job']['id'], job.id)
+
+        response = self.client.put(
+            '/api/vehicles/import/', self.content, content_type='text/csv',
+            HTTP_CONTENT_DISPOSITION='attachment; filename=v.csv',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], job.id)
+        self.assertEqual(ImportJob.objects.count(), 1)
+
+    def test_reimport(self):
+        def put_file(query: str = ''):
+            return self.client.put(
+                f'/api/vehicles/import/{query}', self.content, content_type='text/csv',
+                HTTP_CONTENT_DISPOSITION='attachment; filename=v.csv',
+            )
+
+        job_id = put_file().data['id']
+        # Параметр dedupe=false создаёт новое задание, даже если задание на импорт того же файла не выполнено
+        response = put_file('?dedupe=false')
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.data['id'], job_id)
+
+        # После завершения заданий тот же файл импортируется заново
+        ImportJob.objects.update(status=IMPORT_JOB_STATUSES_MAPPING['completed'])
+        response = put_file()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ImportJob.objects.count(), 3)
+
+        response = self.create_upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['job']['id'], ImportJob.objects.latest('id').id)
+        response = self.client.post('/api/vehicles/import/uploads/?dedupe=false', {
+            'content_type': 'text/csv', 'size': len(self.content), 'checksum': self.checksum,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        upload_id = response.data['id']
+        self.put_range(upload_id, 0, len(self.content) - 1)
+        response = self.client.post(f'/api/vehicles/import/uploads/{upload_id}/complete/?dedupe=false')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ImportJob.objects.count(), 4)
+
+    def test_concurrent_requests(self):
+        upload_id = self.create_upload().data['id']
+        self.put_range(upload_id, 0, len(self.content) - 1)
+
+        # Запросы работают с прочитанными до изменения экземплярами загрузки
+        uploads = [ImportUpload.objects.get(id=upload_id) for _ in range(3)]
+        self.assertTrue(record_upload_progress(uploads[0], 100))
+        self.assertEqual(ImportUpload.objects.get(id=upload_id).received, len(self.content))
+
+        job, created = complete_upload(uploads[1])
+        self.assertTrue(created)
+        self.assertEqual(complete_upload(uploads[2]), (job, False))
+        self.assertFalse(record_upload_progress(uploads[0], len(self.content)))
+        self.assertEqual(ImportJob.objects.count(), 1)
+        with job.file.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImportDryRunTestCase(TestCase):
+    """ Проверка файла для импорта без сохранения данных. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+        self.vehicles = generate_vehicles(30)
+        Vehicle.objects.bulk_create([
+            Vehicle(created_by=self.user, updated_by=self.user, **vehicle) for vehicle in self.vehicles[:5]
+        ])
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow([item.value for item in FileHeadersEnum])
+        writer.writerows([vehicle[item.name] for item in FileHeadersEnum] for vehicle in self.vehicles)
+        self.content = buffer.getvalue().encode('utf-8')
+
+    def test_dry_run(self):
+        response = self.client.put(
+            '/api/vehicles/import/?dry_run=1', self.content, content_type='text/csv',
+            HTTP_CONTENT_DISPOSITION='attachment; filename=v.csv',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rows_processed'], 30)
+        self.assertEqual(sorted(response.data['errors']), [2, 3, 4, 5, 6])
+        self.assertEqual(Vehicle.objects.count(), 5)
+        self.assertFalse(ImportJob.objects.exists())
+
+        response = self.client.put(
+            '/api/vehicles/import/?dry_run=1&mode=upsert', self.content, content_type='text/csv',
+            HTTP_CONTENT_DISPOSITION='attachment; filename=v.csv', HTTP_ACCEPT='text/csv',
+        )
+        self.assertEqual(response.content.decode('utf-8').splitlines(), ['Строка;Поле;Ошибка'])
+
+    def test_csv_report_only_for_dry_run(self):
+        # Ошибка при проверке файла возвращается в JSON, даже если запрошен отчёт в CSV
+        response = self.client.put(
+            '/api/vehicles/import/?dry_run=1&mode=unknown', self.content, content_type='text/csv',
+            HTTP_CONTENT_DISPOSITION='attachment; filename=v.csv', HTTP_ACCEPT='text/csv',
+        )
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('режим импорта', response.json()['detail'])
+
+        # Задание на импорт в формате CSV не описывается
+        response = self.client.put(
+            '/api/vehicles/import/', self.content, content_type='text/csv',
+            HTTP_CONTENT_DISPOSITION='attachment; filename=v.csv', HTTP_ACCEPT='text/csv',
+        )
+        self.assertEqual(response.status_code, 406)
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_duplicates_between_batches(self):
+        dataframe = pandas.DataFrame(self.vehicles[5:] + self.vehicles[10:12])
+        batches = [dataframe.iloc[start:start + 10] for start in range(0, len(dataframe), 10)]
+
+        rows, errors = validate_vehicles_batches(batches)
+        self.assertEqual(rows, 27)
+        self.assertEqual(sorted(errors), [27, 28])
+        self.assertEqual(errors[27]['vin'], ['Значение повторяется в файле.'])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class GenerateFleetTestCase(TestCase):
+    """ Проверка генератора синтетического флота. """
+
+    def test_generate_fleet(self):
+        vehicles = generate_fleet(2000) + generate_fleet(1000, start=2000)
+        for field in ('registration_number', 'vin', 'vehicle_certificate_number'):
+            self.assertEqual(len({vehicle[field] for vehicle in vehicles}), len(vehicles))
+        self.assertTrue(all(get_vin_check_digit(vehicle['vin']) == vehicle['vin'][8] for vehicle in vehicles))
+        self.assertEqual(generate_fleet(10, start=5, seed=1), generate_fleet(10, start=5, seed=1))
+
+        rows, errors = validate_vehicles_batches([pandas.DataFrame(vehicles)])
+        self.assertEqual((rows, errors), (3000, {}))
+
+
+@unittest.skipUnless(is_copy_import_available(), 'Загрузка через COPY поддерживается только на PostgreSQL')
+@override_settings(CACHES=TEST_CACHES)
+class CopyImportTestCase(TestCase):
+    """ Проверка пакетной загрузки данных через COPY. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester')
+        self.vehicles = generate_vehicles(10)
+        Vehicle.objects.bulk_create([
+            Vehicle(created_by=self.user, updated_by=self.user, **vehicle) for vehicle in self.vehicles[:4]
+        ])
+
+    def test_create(self):
+        imported, updated, unchanged, errors = copy_vehicles_batch(pandas.DataFrame(self.vehicles), user=self.user)
+        self.assertEqual((imported, updated, unchanged), (6, 0, 0))
+        self.assertEqual(sorted(errors), [2, 3, 4, 5])
+        self.assertEqual(Vehicle.objects.count(), 10)
+        self.assertEqual(DataLog.objects.filter(operation=DATA_OPERATIONS_MAPPING['import']).count(), 6)
+
+    def test_upsert(self):
+        for vehicle in self.vehicles[:2]:
+            vehicle['color'] = 'Фиолетовый'
+
+        imported, updated, unchanged, errors = copy_vehicles_batch(
+            pandas.DataFrame(self.vehicles), user=self.user, key='vin',
+        )
+        self.assertEqual((imported, updated, unchanged, errors), (6, 2, 2, {}))
+        self.assertEqual(Vehicle.objects.filter(color='Фиолетовый').count(), 2)
+        self.assertEqual(DataLog.objects.filter(operation=DATA_OPERATIONS_MAPPING['modify']).count(), 2)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Параметры соединения применяются только к SQLite')
+@override_settings(CACHES=TEST_CACHES)
+class SqlitePragmasTestCase(TestCase):
+    """ Проверка применения профиля параметров SQLite к соединению. """
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4096, 'busy_timeout': 1000})
+    def test_pragmas_applied(self):
+        apply_sqlite_pragmas(sender=connection.__class__, connection=connection)
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA cache_size').fetchone()[0], -4096)
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone()[0], 1000)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Транзакции BEGIN IMMEDIATE используются только на SQLite')
+@override_settings(CACHES=TEST_CACHES, SQLITE_IMMEDIATE_TRANSACTIONS=True)
+class SqliteTransactionsTestCase(TransactionTestCase):
+    """ Проверка того, что блокировку записи в начале транзакции получают только транзакции записи. """
+
+    def get_transaction_statements(self, function) -> list[str]:
+        with CaptureQueriesContext(connection) as context:
+            function()
+        return [query['sql'] for query in context.captured_queries if query['sql'].startswith('BEGIN')]
+
+    def test_write_transaction(self):
+        def write():
+            with immediate_atomic():
+                Vehicle.objects.count()
+                # Вложенный блок - точка сохранения
+                with immediate_atomic():
+                    Vehicle.objects.count()
+
+        self.assertEqual(self.get_transaction_statements(write), ['BEGIN IMMEDIATE'])
+
+    def test_read(self):
+        def read():
+            with transaction.atomic():
+                Vehicle.objects.count()
+
+        self.assertEqual(self.get_transaction_statements(read), ['BEGIN'])
+        self.assertEqual(self.get_transaction_statements(lambda: search_vehicle_ids('Лада')), [])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncReadViewTestCase(TransactionTestCase):
+    """ Проверка асинхронных представлений на чтение. """
+
+    def setUp(self):
+        # Соединения потоков пула закрываются после каждого запроса, иначе тестовую базу данных нельзя удалить
+        self.addCleanup(connection.settings_dict.__setitem__, 'CONN_MAX_AGE', connection.settings_dict['CONN_MAX_AGE'])
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+
+        cache.clear()
+        self.user = User.objects.create_user(username='tester')
+        self.vehicles = Vehicle.objects.bulk_create([
+            Vehicle(created_by=self.user, updated_by=self.user, **vehicle) for vehicle in generate_vehicles(5)
+        ])
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    async def test_read(self):
+        response = await self.async_client.get('/api/async/vehicles/', {'make': self.vehicles[0].make})
+        expected = await sync_to_async(self.client.get)('/api/vehicles/', {'make': self.vehicles[0].make})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
+
+        response = await self.async_client.get(f'/api/async/vehicles/{self.vehicles[1].pk}/')
+        self.assertEqual(response.json()['vin'], self.vehicles[1].vin)
+
+        # Журнал доступен только администраторам, изменяющие запросы не принимаются
+        response = await self.async_client.get('/api/async/logs/')
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.delete(f'/api/async/vehicles/{self.vehicles[1].pk}/')
+        self.assertEqual(response.status_code, 405)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MetricsTestCase(TestCase):
+    """ Проверка метрик Prometheus. """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tester')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+        Vehicle.objects.bulk_create([
+            Vehicle(created_by=self.user, updated_by=self.user, **vehicle) for vehicle in generate_vehicles(5)
+        ])
+
+    @staticmethod
+    def get_value(name: str, **labels) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_metrics(self):
+        labels = {'view': 'VehicleList', 'method': 'GET', 'status': '200'}
+        count = self.get_value('vehicle_manager_request_duration_seconds_count', **labels)
+        queries = self.get_value('vehicle_manager_request_db_queries_sum', view='VehicleList')
+
+        self.client.get('/api/vehicles/')
+        self.assertEqual(self.get_value('vehicle_manager_request_duration_seconds_count', **labels), count + 1)
+        self.assertGreater(self.get_value('vehicle_manager_request_db_queries_sum', view='VehicleList'), queries)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'vehicle_manager_request_duration_seconds_bucket{', response.content)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_export_metrics(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(MEDIA_ROOT=directory, EXPORT_CACHE_DIR=os.path.join(directory, 'exports')):
+            exported = self.get_value('vehicle_manager_export_bytes_total', file_type='csv', source='generated')
+            response = self.client.get('/api/vehicles/export/', HTTP_ACCEPT='text/csv')
+            content = b''.join(response.streaming_content)
+            self.assertEqual(
+                self.get_value('vehicle_manager_export_bytes_total', file_type='csv', source='generated'),
+                exported + len(content),
+            )
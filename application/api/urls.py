@@ -1,14 +1,30 @@
 from django.urls import path
 
-from api.views.data import ImportDataView, ExportDataView
+from api.views.data import (
+    ImportDataView, ExportDataView, ImportJobView, ImportJobErrorsView, ImportUploadListView, ImportUploadView,
+    ImportUploadCompleteView,
+)
 from api.views.datalog import DataLogView
-from api.views.vehicle import VehicleList, VehicleDetail
+from api.views.vehicle import VehicleList, VehicleSearch, VehicleStats, VehicleDetail
+from utils.asynchronous import async_read_view
 
 
 urlpatterns = [
     path('vehicles/', VehicleList.as_view()),
     path('vehicles/import/', ImportDataView.as_view()),
+    path('vehicles/import/<int:job_id>/', ImportJobView.as_view()),
+    path('vehicles/import/<int:job_id>/errors/', ImportJobErrorsView.as_view()),
+    path('vehicles/import/uploads/', ImportUploadListView.as_view()),
+    path('vehicles/import/uploads/<int:upload_id>/', ImportUploadView.as_view()),
+    path('vehicles/import/uploads/<int:upload_id>/complete/', ImportUploadCompleteView.as_view()),
     path('vehicles/export/', ExportDataView.as_view()),
+    path('vehicles/search/', VehicleSearch.as_view()),
+    path('vehicles/stats/', VehicleStats.as_view()),
     path('vehicles/<int:pk>/', VehicleDetail.as_view()),
     path('logs/', DataLogView.as_view()),
+
+    # Асинхронные представления на чтение для развёртывания под ASGI
+    path('async/vehicles/', async_read_view(VehicleList)),
+    path('async/vehicles/<int:pk>/', async_read_view(VehicleDetail)),
+    path('async/logs/', async_read_view(DataLogView)),
 ]
@@ -1,27 +1,124 @@
+import csv
+import io
 import logging
+import os
+import time
 
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework import views, status, generics, permissions
-from rest_framework.exceptions import ParseError
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import get_object_or_404
 from rest_framework.parsers import FileUploadParser
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from api.exceptions import VehicleAPIException
+from api.exceptions import VehicleAPIException, UploadRangeException
 from api.filters import vehicle_list_filter
-from api.models import Vehicle, DATA_OPERATIONS_MAPPING
-from api.renderers import XLSXFileRenderer, CSVFileRenderer
-from api.serializers import VehicleSerializer
+from api.models import Vehicle, ImportJob, ImportUpload, IMPORT_MODES_MAPPING, IMPORT_UPLOAD_STATUSES_MAPPING
+from api.renderers import XLSXFileRenderer, CSVFileRenderer, ParquetFileRenderer, ArrowStreamFileRenderer
+from api.serializers import VehicleSerializer, ImportJobSerializer, ImportUploadSerializer
 from utils.data import (
-    parse_vehicles, save_vehicle, file_type_from_content_type, CONTENT_TYPE_TO_FILE_TYPE_MAPPING,
-    transform_vehicles, export_vehicles,
+    file_type_from_content_type, is_file_type_available, CONTENT_TYPE_TO_FILE_TYPE_MAPPING, EXPORT_FILE_TYPES,
+    COMPRESSIBLE_FILE_TYPES, UNIQUE_VEHICLE_FIELDS, export_vehicles, parse_vehicles, validate_vehicles_batches,
 )
-from utils.views import log_data_modification
+from utils.compression import choose_content_encoding, compress_chunks, open_decompressed, UPLOAD_CONTENT_ENCODINGS
+from utils.export_cache import get_export_filename, get_cached_export, cache_export, export_file_response
+from utils.jobs import ERRORS_FILE_HEADERS, write_row_errors
+from utils.metrics import EXPORT_BYTES, EXPORT_DURATION, observe_export
+from utils.uploads import (
+    CHECKSUM_PATTERN, get_file_checksum, find_duplicate_import_job, parse_content_range, write_upload_range,
+    record_upload_progress, complete_upload, delete_upload,
+)
+
+
+def get_import_file_type(content_type: str) -> str:
+    """ Определяет тип загружаемого файла по заголовку Content-Type и проверяет, что формат поддерживается. """
+    try:
+        file_type = file_type_from_content_type(content_type)
+    except KeyError:
+        error_message = f"""
+            Указан некорректный или неподдерживаемый тип данных.\n
+            Необходимо указать значение заголовка Content-Type, соответствующее формату передаваемого файла:\n
+            {CONTENT_TYPE_TO_FILE_TYPE_MAPPING}
+        """
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    if not is_file_type_available(file_type):
+        error_message = f'Загрузка файлов в формате {file_type} недоступна: не установлена библиотека pyarrow.'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    return file_type
+
+
+def get_upload_content_encoding(value: str) -> str:
+    """ Проверяет способ сжатия загружаемого файла (заголовок Content-Encoding); пустая строка - файл не сжат. """
+    content_encoding = value.strip().lower()
+    if content_encoding == 'identity':
+        content_encoding = ''
+    if content_encoding and content_encoding not in UPLOAD_CONTENT_ENCODINGS:
+        error_message = f'Указан неподдерживаемый способ сжатия файла {content_encoding}. ' \
+                        f'Допустимые значения заголовка Content-Encoding: {list(UPLOAD_CONTENT_ENCODINGS)}'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    return content_encoding
+
+
+def get_import_mode(request) -> tuple[str, str]:
+    """ Возвращает режим импорта и ключевое поле для сопоставления с существующими записями из параметров запроса. """
+    mode = request.query_params.get('mode', IMPORT_MODES_MAPPING['create'])
+    if mode not in IMPORT_MODES_MAPPING:
+        error_message = f'Указан неподдерживаемый режим импорта {mode}. ' \
+                        f'Допустимые значения: {list(IMPORT_MODES_MAPPING)}'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    key_field = request.query_params.get('key', 'vin')
+    if key_field not in UNIQUE_VEHICLE_FIELDS:
+        error_message = f'Указано неподдерживаемое ключевое поле {key_field}. ' \
+                        f'Допустимые значения: {UNIQUE_VEHICLE_FIELDS}'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    return mode, key_field
+
+
+def get_import_dedupe(request) -> bool:
+    """
+    Возвращает признак поиска невыполненного задания на импорт того же файла (см. `find_duplicate_import_job`).
+
+    Параметр запроса `dedupe=false` отключает поиск: задание создаётся в любом случае.
+    """
+    return request.query_params.get('dedupe', '').lower() not in ('0', 'false', 'no')
+
+
+def is_dry_run(request) -> bool:
+    """ Возвращает признак проверки файла для импорта без сохранения данных (параметр запроса `dry_run`). """
+    return request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
 
 
 class ImportDataView(views.APIView):
     parser_classes = [FileUploadParser, ]
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_renderers(self):
+        """ Отчёт в формате CSV (`Accept: text/csv`) доступен только при проверке файла без сохранения данных. """
+        renderers = super().get_renderers()
+        if is_dry_run(self.request):
+            renderers.append(CSVFileRenderer())
+        return renderers
+
+    def handle_exception(self, exc):
+        """ Ошибки возвращаются в JSON, в том числе если запрошен отчёт о проверке файла в формате CSV. """
+        response = super().handle_exception(exc)
+        if isinstance(getattr(self.request, 'accepted_renderer', None), CSVFileRenderer):
+            self.request.accepted_renderer = JSONRenderer()
+            self.request.accepted_media_type = JSONRenderer.media_type
+        return response
+
     def put(self, request, format=None):
         # Получить передаваемый файлы
         try:
@@ -31,50 +128,210 @@ class ImportDataView(views.APIView):
             logging.error(error_message)
             raise VehicleAPIException(error_message)
 
-        # Определить тип полученного файла
-        try:
-            file_type = file_type_from_content_type(request.content_type)
-        except KeyError:
-            error_message = f"""
-                Указан некорректный или неподдерживаемый тип данных.\n
-                Необходимо указать значение заголовка Content-Type, соответствующее формату передаваемого файла:\n
-                {CONTENT_TYPE_TO_FILE_TYPE_MAPPING}
-            """
+        # Определить тип полученного файла, способ сжатия и режим импорта.
+        # Сжатый файл сохраняется как есть и распаковывается при обработке задания
+        file_type = get_import_file_type(request.content_type)
+        content_encoding = get_upload_content_encoding(request.headers.get('Content-Encoding', ''))
+        mode, key_field = get_import_mode(request)
+
+        # Проверка файла без сохранения: отчёт об ошибках возвращается сразу, задание не создаётся
+        if is_dry_run(request):
+            return self.dry_run(request, file_data, file_type, content_encoding, mode, key_field)
+
+        # Повторно загруженный файл, импорт которого ещё не выполнен, не разбирается заново:
+        # возвращается существующее задание
+        checksum = get_file_checksum(file_data)
+        file_data.seek(0)
+        job = find_duplicate_import_job(
+            request.user, checksum, file_type=file_type, content_encoding=content_encoding, mode=mode,
+            key_field=key_field,
+        ) if get_import_dedupe(request) else None
+        if job is not None:
+            return Response(data=ImportJobSerializer(job).data, status=status.HTTP_200_OK)
+
+        # Сохранить файл и поставить задание на импорт в очередь обработки
+        job = ImportJob.objects.create(
+            created_by=request.user, file=file_data, file_type=file_type, content_encoding=content_encoding,
+            checksum=checksum, mode=mode, key_field=key_field,
+        )
+
+        return Response(data=ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @staticmethod
+    def dry_run(request, file_data, file_type: str, content_encoding: str, mode: str, key_field: str):
+        """
+        Проверяет файл так же, как при импорте, не сохраняя данные (см. `validate_vehicles_batches`).
+
+        Возвращает количество проверенных строк и ошибки в строках (JSON) либо отчёт об ошибках в формате CSV,
+        если запрошен заголовком `Accept: text/csv`.
+        """
+        file = open_decompressed(file_data.file, content_encoding)
+        key = key_field if mode == IMPORT_MODES_MAPPING['upsert'] else None
+        rows, errors = validate_vehicles_batches(parse_vehicles(file_type, file), key=key)
+
+        if request.accepted_renderer.format == 'csv':
+            report = io.StringIO()
+            writer = csv.writer(report, delimiter=';')
+            writer.writerow(ERRORS_FILE_HEADERS)
+            write_row_errors(writer, errors)
+            return Response(data=report.getvalue())
+
+        return Response(data={
+            'rows_processed': rows,
+            'rows_valid': rows - len(errors),
+            'rows_failed': len(errors),
+            'errors': errors,
+        })
+
+
+class ImportUploadListView(generics.GenericAPIView):
+    """
+    API: Создание загрузки файла для импорта по частям.
+
+    Тело запроса (JSON) содержит тип файла, его размер и контрольную сумму SHA-256. Если задание пользователя
+    на импорт файла с той же контрольной суммой и параметрами импорта ещё не выполнено, загрузка не создаётся
+    и возвращается существующее задание (параметр `dedupe=false` отключает поиск такого задания).
+    """
+    serializer_class = ImportUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        file_type = get_import_file_type(request.data.get('content_type', ''))
+        content_encoding = get_upload_content_encoding(request.data.get('content_encoding') or '')
+        mode, key_field = get_import_mode(request)
+
+        checksum = str(request.data.get('checksum', '')).lower()
+        if not CHECKSUM_PATTERN.match(checksum):
+            error_message = 'Необходимо указать контрольную сумму файла checksum (SHA-256 в шестнадцатеричном виде).'
             logging.error(error_message)
             raise VehicleAPIException(error_message)
 
-        # Разобрать файл и получить данные
         try:
-            vehicles = parse_vehicles(file_type, file_data)
-        except VehicleAPIException as e:
-            raise ParseError(detail=str(e))
-
-        # Подготовить данные для сохранения в БД
-        vehicles = transform_vehicles(vehicles)
-
-        # Сохранить данные в БД
-        for vehicle in vehicles:
-            vehicle_instance = save_vehicle(vehicle, created_by=request.user, updated_by=request.user)
-
-            # Записать в лог информацию об обновлении существующей записи
-            vehicle_data = VehicleSerializer(vehicle_instance).data
-            log_data_modification(
-                vehicle=vehicle_data,
-                username=request.user,
-                operation=DATA_OPERATIONS_MAPPING['import'],
-                description='Импортированы данные о транспортном средстве.',
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            size = 0
+        if size <= 0:
+            error_message = 'Необходимо указать размер файла size (положительное целое число байт).'
+            logging.error(error_message)
+            raise VehicleAPIException(error_message)
+
+        job = find_duplicate_import_job(
+            request.user, checksum, file_type=file_type, content_encoding=content_encoding, mode=mode,
+            key_field=key_field,
+        ) if get_import_dedupe(request) else None
+        if job is not None:
+            return Response(data={'job': ImportJobSerializer(job).data}, status=status.HTTP_200_OK)
+
+        upload = ImportUpload.objects.create(
+            created_by=request.user, filename=os.path.basename(str(request.data.get('filename', '')))[:255],
+            file_type=file_type, content_encoding=content_encoding, mode=mode, key_field=key_field, size=size,
+            checksum=checksum,
+        )
+
+        return Response(data=self.get_serializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+class ImportUploadView(generics.RetrieveDestroyAPIView):
+    """
+    API: Загрузка файла для импорта по частям.
+
+    GET возвращает состояние загрузки (в том числе количество полученных байт, с которого загрузка продолжается),
+    PUT принимает часть файла с указанием её положения в заголовке Content-Range, DELETE отменяет загрузку.
+    """
+    serializer_class = ImportUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_url_kwarg = 'upload_id'
+
+    def get_queryset(self):
+        """ Пользователям доступны только собственные загрузки. """
+        return ImportUpload.objects.filter(created_by=self.request.user)
+
+    def put(self, request, *args, **kwargs):
+        # Часть файла записывается вне транзакции: получение тела запроса не блокирует запись в БД других запросов.
+        # Полученные байты учитываются условным UPDATE, поэтому параллельные запросы не уменьшают их количество
+        upload = get_object_or_404(self.get_queryset(), id=kwargs['upload_id'])
+        if upload.status != IMPORT_UPLOAD_STATUSES_MAPPING['active']:
+            error_message = f'Загрузка {upload.id} уже завершена.'
+            logging.error(error_message)
+            raise VehicleAPIException(error_message)
+
+        start, length = parse_content_range(request.headers.get('Content-Range', ''), upload.size)
+        if start > upload.received:
+            raise UploadRangeException(
+                detail=f'Часть файла должна начинаться не дальше смещения {upload.received} (получено байт).'
             )
 
-        return Response(status=status.HTTP_201_CREATED)
+        written = write_upload_range(upload, request.stream, start, length)
+        if not record_upload_progress(upload, start + written):
+            error_message = f'Загрузка {upload.id} завершена или отменена во время передачи части файла.'
+            logging.error(error_message)
+            raise VehicleAPIException(error_message)
+
+        upload.refresh_from_db()
+        return Response(data=self.get_serializer(upload).data)
+
+    def perform_destroy(self, upload: ImportUpload):
+        delete_upload(upload)
+
+
+class ImportUploadCompleteView(ImportUploadView):
+    """ API: Завершение загрузки файла по частям: проверка контрольной суммы и постановка задания в очередь. """
+    http_method_names = ['post', 'options']
+
+    def post(self, request, *args, **kwargs):
+        upload = get_object_or_404(self.get_queryset(), id=kwargs['upload_id'])
+        if upload.job_id is not None:
+            return Response(data=self.get_serializer(upload).data, status=status.HTTP_200_OK)
+
+        job, created = complete_upload(upload, dedupe=get_import_dedupe(request))
+        return Response(
+            data=self.get_serializer(upload).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
+
+
+class ImportJobView(generics.RetrieveAPIView):
+    """ API: Просмотр состояния задания на импорт. """
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_url_kwarg = 'job_id'
+
+    def get_queryset(self):
+        """ Пользователям доступны только собственные задания, администраторам - все задания. """
+        queryset = ImportJob.objects.select_related('created_by')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(created_by=self.request.user)
+
+        return queryset
+
+
+class ImportJobErrorsView(ImportJobView):
+    """ API: Получение отчёта об ошибках задания на импорт в формате CSV. """
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        if not job.errors_file:
+            raise NotFound(detail='Отчёт об ошибках для задания отсутствует.')
+
+        return FileResponse(
+            job.errors_file.open('rb'),
+            as_attachment=True,
+            filename=f'import_{job.id}_errors.csv',
+            content_type='text/csv; charset=utf-8',
+        )
 
 
 class ExportDataView(generics.ListAPIView):
     queryset = Vehicle.objects.all()
     serializer_class = VehicleSerializer
     permission_classes = [permissions.IsAuthenticated]
-    renderer_classes = (JSONRenderer, XLSXFileRenderer, CSVFileRenderer, )
+    renderer_classes = (
+        JSONRenderer, XLSXFileRenderer, CSVFileRenderer, ParquetFileRenderer, ArrowStreamFileRenderer,
+    )
 
     def get(self, request, *args, **kwargs):
+        started_at = time.perf_counter()
+
         # Определить тип запрашиваемого файла
         content_type = request.headers.get('Accept')
         try:
@@ -88,17 +345,44 @@ class ExportDataView(generics.ListAPIView):
             logging.error(error_message)
             raise VehicleAPIException(detail=error_message)
 
-        if file_type not in ('xlsx', 'csv'):
+        if file_type not in EXPORT_FILE_TYPES or not is_file_type_available(file_type):
             raise VehicleAPIException(detail=f'Выгрузка в формате {file_type} в данный момент не поддерживается.')
 
-        # Экспортировать данные
+        # Определить способ сжатия ответа (форматы XLSX и Parquet уже сжаты)
+        content_encoding = None
+        if file_type in COMPRESSIBLE_FILE_TYPES:
+            content_encoding = choose_content_encoding(request.headers.get('Accept-Encoding', ''))
+
+        # Отдать файл из кэша выгрузок, если он уже сформирован для тех же параметров и версии данных
         filename = f'vehicles.{file_type}'
+        charset = request.accepted_renderer.charset
+        content_type = f'{content_type}; charset={charset}' if charset else content_type
+        cache_filename = get_export_filename(request, file_type, content_encoding=content_encoding)
+
+        cached_path = get_cached_export(cache_filename)
+        if cached_path is not None:
+            response = export_file_response(
+                request, cached_path, filename=filename, content_type=content_type, content_encoding=content_encoding,
+            )
+            patch_vary_headers(response, ('Accept-Encoding', ))
+            EXPORT_BYTES.labels(file_type, 'cache').inc(os.path.getsize(cached_path))
+            EXPORT_DURATION.labels(file_type, 'cache').observe(time.perf_counter() - started_at)
+            return response
+
+        # Экспортировать данные, одновременно сжимая их и сохраняя файл в кэш выгрузок
         data = export_vehicles(self.get_queryset(), file_type=file_type)
-        response = Response(
-            data=data,
+        if content_encoding:
+            data = compress_chunks(data, encoding=content_encoding, charset=charset)
+        data = cache_export(cache_filename, data, charset=charset)
+
+        response = StreamingHttpResponse(
+            streaming_content=observe_export(data, file_type, started_at),
             headers={'Content-Disposition': f'attachment; filename="{filename}"', },
             content_type=content_type,
         )
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+        patch_vary_headers(response, ('Accept-Encoding', ))
 
         return response
 
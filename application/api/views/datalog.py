@@ -2,11 +2,13 @@ from rest_framework import generics
 from rest_framework import permissions
 
 from api.models import DataLog
-from api.serializers import DataLogSerializer
+from api.pagination import DataLogPagination
+from api.serializers import DataLogListSerializer
 
 
 class DataLogView(generics.ListAPIView):
     """ API: просмотр лога доступа к данным о транспортных средствах. """
-    queryset = DataLog.objects.all()
-    serializer_class = DataLogSerializer
+    queryset = DataLog.objects.select_related('created_by')
+    serializer_class = DataLogListSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = DataLogPagination
@@ -0,0 +1,24 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from utils.metrics import generate_metrics
+
+
+@require_GET
+def metrics_view(request):
+    """
+    API: метрики приложения в текстовом формате Prometheus.
+
+    Если задан параметр METRICS_TOKEN, запрос должен содержать заголовок `Authorization: Bearer <токен>`.
+    Представление не использует аутентификацию DRF, чтобы частый опрос не проверял пароль при каждом запросе.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'.encode()
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+            return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+
+    return HttpResponse(generate_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -1,20 +1,30 @@
 import logging
 
 import django_filters
+from django.db.models import Count, Max, Min
 from rest_framework import generics
 from rest_framework import permissions
+from rest_framework import views
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
 
+from api.exceptions import VehicleAPIException
 from api.filters import vehicle_list_filter
 from api.models import Vehicle, DATA_OPERATIONS_MAPPING
-from api.serializers import VehicleSerializer
-from utils.views import log_data_modification, build_field_lookup
+from api.pagination import VehiclePagination
+from api.serializers import VehicleSerializer, VehicleListSerializer
+from utils.cache import CachedResponseMixin
+from utils.search import search_vehicle_ids
+from utils.transactions import immediate_atomic
+from utils.views import log_data_modification, build_field_lookup, get_vehicle_log_data, get_group_by_fields
 
 
-class VehicleList(generics.ListCreateAPIView):
+class VehicleList(CachedResponseMixin, generics.ListCreateAPIView):
     """ API: Просмотр списка транспортных средств; Создание новой записи о транспортном средстве. """
     queryset = Vehicle.objects.all()
     serializer_class = VehicleSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = VehiclePagination
 
     def post(self, request, *args, **kwargs):
         # Создать новую запись
@@ -38,24 +48,93 @@ class VehicleList(generics.ListCreateAPIView):
         serializer.save(created_by=self.request.user, updated_by=self.request.user)
 
     def get_queryset(self):
-        """ Реализует поиск данных по параметрам, переданным в запросе. """
-        return vehicle_list_filter(self.request)
+        """
+        Реализует поиск данных по параметрам, переданным в запросе.
 
+        Пользователи created_by и updated_by загружаются в том же запросе, что и записи.
+        """
+        return vehicle_list_filter(self.request).select_related('created_by', 'updated_by')
 
-class VehicleDetail(generics.RetrieveUpdateDestroyAPIView):
-    """ API: Просмотр выбранного транспортного средства; Редактирование и удаление записи о транспортном средстве. """
-    queryset = Vehicle.objects.all()
+    def get_serializer_class(self):
+        """ Для вывода списка используется облегчённый сериализатор только для чтения. """
+        if self.request.method == 'GET':
+            return VehicleListSerializer
+        return super().get_serializer_class()
+
+
+class VehicleSearch(CachedResponseMixin, generics.ListAPIView):
+    """
+    API: Поиск транспортных средств по строке (параметр `q`).
+
+    Каждое слово строки ищется по вхождению в марку, модель, цвет, регистрационный номер или VIN.
+    Результаты упорядочены по релевантности; выводится не более `SEARCH_RESULTS_LIMIT` записей.
+    """
+    serializer_class = VehicleListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PageNumberPagination
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            error_message = 'Не указана строка поиска. Передайте её в параметре запроса q.'
+            logging.error(error_message)
+            raise VehicleAPIException(detail=error_message)
+
+        # Найти идентификаторы записей в порядке релевантности и загрузить записи только для текущей страницы
+        page = self.paginate_queryset(search_vehicle_ids(query))
+        vehicles = Vehicle.objects.select_related('created_by', 'updated_by').in_bulk(page)
+        serializer = self.get_serializer([vehicles[pk] for pk in page if pk in vehicles], many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+
+class VehicleStats(CachedResponseMixin, views.APIView):
+    """
+    API: Статистика по транспортным средствам.
+
+    Принимает те же параметры фильтрации, что и список транспортных средств, и параметр `group_by` - поля
+    группировки. Для каждой группы вычисляются количество записей и минимальный/максимальный год выпуска.
+    Агрегаты вычисляются в БД; ответ кэшируется до изменения данных (см. CachedResponseMixin).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_uncached_response(self, request, *args, **kwargs) -> Response:
+        group_by = get_group_by_fields(request)
+        queryset = vehicle_list_filter(request)
+        aggregates = {
+            'count': Count('id'),
+            'min_year_of_manufacture': Min('year_of_manufacture'),
+            'max_year_of_manufacture': Max('year_of_manufacture'),
+        }
+
+        if group_by:
+            results = list(queryset.values(*group_by).annotate(**aggregates).order_by('-count', *group_by))
+        else:
+            results = [queryset.aggregate(**aggregates)]
+
+        return Response({
+            'group_by': group_by,
+            'total': sum(row['count'] for row in results),
+            'results': results,
+        })
+
+
+class VehicleDetail(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    API: Просмотр выбранного транспортного средства; Редактирование и удаление записи о транспортном средстве.
+
+    Запись загружается из БД один раз (вместе с пользователями created_by и updated_by) и используется как для записи
+    в лог, так и для изменения; чтение, изменение и запись в лог выполняются в одной транзакции.
+    """
+    queryset = Vehicle.objects.select_related('created_by', 'updated_by')
     serializer_class = VehicleSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @immediate_atomic()
     def put(self, request, *args, **kwargs):
-        # Получить обновляемую запись
-        vehicle = self.get_object()
-        vehicle_data = VehicleSerializer(vehicle).data
-
         # Записать в лог информацию об обновлении существующей записи
         log_data_modification(
-            vehicle=vehicle_data,
+            vehicle=get_vehicle_log_data(self.get_object()),
             username=request.user,
             operation=DATA_OPERATIONS_MAPPING['modify'],
             description='Изменена запись о транспортном средстве.',
@@ -66,14 +145,11 @@ class VehicleDetail(generics.RetrieveUpdateDestroyAPIView):
 
         return response
 
+    @immediate_atomic()
     def patch(self, request, *args, **kwargs):
-        # Получить обновляемую запись
-        vehicle = self.get_object()
-        vehicle_data = VehicleSerializer(vehicle).data
-
         # Записать в лог информацию об обновлении существующей записи
         log_data_modification(
-            vehicle=vehicle_data,
+            vehicle=get_vehicle_log_data(self.get_object()),
             username=request.user,
             operation=DATA_OPERATIONS_MAPPING['modify'],
             description='Изменена запись о транспортном средстве.',
@@ -84,14 +160,11 @@ class VehicleDetail(generics.RetrieveUpdateDestroyAPIView):
 
         return response
 
+    @immediate_atomic()
     def delete(self, request, *args, **kwargs):
-        # Получить удаляемую запись
-        vehicle = self.get_object()
-        vehicle_data = VehicleSerializer(vehicle).data
-
-        # Записать в лог информацию об обновлении существующей записи
+        # Записать в лог информацию об удалении существующей записи
         log_data_modification(
-            vehicle=vehicle_data,
+            vehicle=get_vehicle_log_data(self.get_object()),
             username=request.user,
             operation=DATA_OPERATIONS_MAPPING['remove'],
             description='Удалена запись о транспортном средстве.',
@@ -102,6 +175,16 @@ class VehicleDetail(generics.RetrieveUpdateDestroyAPIView):
 
         return response
 
+    def get_object(self) -> Vehicle:
+        """
+        Переопределяет функцию get_object класса GenericAPIView.
+
+        Запоминает загруженную запись, чтобы повторные вызовы в рамках запроса не обращались к БД.
+        """
+        if not hasattr(self, '_vehicle'):
+            self._vehicle = super().get_object()
+        return self._vehicle
+
     def perform_update(self, serializer):
         """
         Переопределяет функцию perform_update класса UpdateModelMixin.
@@ -0,0 +1,40 @@
+import os
+from typing import Optional, Union
+from urllib.parse import urlsplit
+
+
+# Соответствие схемы адреса кэша и класса бэкенда Django
+CACHE_BACKENDS_MAPPING = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+}
+
+
+def get_cache_configuration(cache_url: Optional[str], default_location: Union[str, os.PathLike]) -> dict:
+    """
+    Формирует настройки кэша Django по адресу вида `<схема>://<расположение>`.
+
+    Если адрес не указан, используется файловый кэш в каталоге `default_location`: он общий для всех процессов
+    сервера, поэтому изменение версии данных (см. utils.cache) в одном рабочем процессе сразу видно остальным.
+    Кэш в памяти процесса (`locmem://`) подходит только для запуска в одном процессе.
+    """
+    if not cache_url:
+        return {'BACKEND': CACHE_BACKENDS_MAPPING['file'], 'LOCATION': default_location}
+
+    url = urlsplit(cache_url)
+    try:
+        backend = CACHE_BACKENDS_MAPPING[url.scheme]
+    except KeyError:
+        raise ValueError(f'Неподдерживаемая схема адреса кэша: {url.scheme}. '
+                         f'Допустимые значения: {list(CACHE_BACKENDS_MAPPING)}')
+
+    if url.scheme == 'file':
+        location = url.path
+    elif url.scheme == 'locmem':
+        location = url.netloc
+    else:
+        location = cache_url
+
+    return {'BACKEND': backend, 'LOCATION': location}
@@ -0,0 +1,72 @@
+import os
+from typing import Optional, Union
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+
+# Соответствие схемы адреса базы данных и бэкенда Django
+DATABASE_BACKENDS_MAPPING = {
+    'sqlite': 'vehicle_manager.backends.sqlite3',     # django.db.backends.sqlite3 с транзакциями записи BEGIN IMMEDIATE
+    'postgres': 'django.db.backends.postgresql',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+# Параметры (PRAGMA), применяемые к каждому новому соединению с SQLite, для профилей `SqliteProfileEnum`.
+# default - стандартные параметры SQLite: журнал отката, при записи блокируется вся база данных.
+# performance - журнал WAL (чтение не блокируется записью и не блокирует её), синхронизация с диском только
+# при контрольной точке журнала, отображение файла в память, увеличенный кэш страниц (в КиБ при отрицательном
+# значении), временные таблицы в памяти и ожидание освобождения блокировки другим процессом до 30 с;
+# транзакции записи сразу получают блокировку записи (см. SQLITE_IMMEDIATE_TRANSACTIONS_PROFILES
+# и utils.transactions.immediate_atomic).
+SQLITE_PROFILES_MAPPING = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30 * 1000,
+        'journal_size_limit': 64 * 1024 * 1024,
+    },
+}
+
+SQLITE_IMMEDIATE_TRANSACTIONS_PROFILES = ('performance', )
+
+
+def get_database_configuration(database_url: Optional[str], default_path: Union[str, os.PathLike],
+                               conn_max_age: Optional[int] = 0, statement_timeout: Optional[int] = None) -> dict:
+    """
+    Формирует настройки базы данных Django по адресу вида `<схема>://<пользователь>:<пароль>@<хост>:<порт>/<имя>`.
+
+    Для SQLite путь к файлу указывается после `sqlite:///` (`sqlite:////abs/path.sqlite3` - абсолютный путь);
+    если адрес не указан, используется файл `default_path`. Для PostgreSQL параметры запроса адреса передаются
+    драйверу (например, `?host=/var/run/postgresql&sslmode=require`), а `statement_timeout` (миллисекунд)
+    ограничивает время выполнения каждого запроса.
+    """
+    if not database_url:
+        return {'ENGINE': DATABASE_BACKENDS_MAPPING['sqlite'], 'NAME': default_path, 'CONN_MAX_AGE': conn_max_age}
+
+    url = urlsplit(database_url)
+    try:
+        backend = DATABASE_BACKENDS_MAPPING[url.scheme]
+    except KeyError:
+        raise ValueError(f'Неподдерживаемая схема адреса базы данных: {url.scheme}. '
+                         f'Допустимые значения: {list(DATABASE_BACKENDS_MAPPING)}')
+
+    if backend == DATABASE_BACKENDS_MAPPING['sqlite']:
+        return {'ENGINE': backend, 'NAME': unquote(url.path[1:]) or default_path, 'CONN_MAX_AGE': conn_max_age}
+
+    options = dict(parse_qsl(url.query))
+    if statement_timeout:
+        options['options'] = f'-c statement_timeout={statement_timeout}'
+
+    return {
+        'ENGINE': backend,
+        'NAME': unquote(url.path[1:]),
+        'USER': unquote(url.username or ''),
+        'PASSWORD': unquote(url.password or ''),
+        'HOST': options.pop('host', url.hostname or ''),
+        'PORT': url.port or '',
+        'CONN_MAX_AGE': conn_max_age,
+        'OPTIONS': options,
+    }
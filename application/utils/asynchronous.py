@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed
+from rest_framework.views import APIView
+
+
+# Константы
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', )
+
+# Пул потоков, в которых выполняются запросы к БД и сериализация асинхронных представлений.
+# Каждый поток использует своё соединение с БД, поэтому размер пула ограничивает количество соединений процесса
+READ_EXECUTOR = ThreadPoolExecutor(max_workers=settings.ASYNC_READ_THREADS, thread_name_prefix='async-read')
+
+
+def dispatch_read_view(view: Callable, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+    """
+    Выполняет представление и формирует тело ответа в потоке пула `READ_EXECUTOR`.
+
+    Соединения с БД потока закрываются по тем же правилам, что и по сигналам начала и завершения запроса
+    (с учётом CONN_MAX_AGE), так как эти сигналы обрабатываются в другом потоке.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view_class: type[APIView]) -> Callable:
+    """
+    Возвращает асинхронное представление (для ASGI) для запросов на чтение к представлению DRF `view_class`.
+
+    Обработка запроса - аутентификация, кэш ответов, запросы к БД и сериализация - выполняется представлением
+    DRF в пуле потоков `READ_EXECUTOR`, а цикл событий в это время обслуживает другие соединения. Поэтому один
+    процесс сервера ASGI удерживает тысячи ожидающих ответа клиентов, а синхронные представления под ASGI
+    выполняются по одному в общем потоке. Изменяющие запросы отклоняются со статусом 405.
+    """
+    view = view_class.as_view()
+
+    async def async_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in SAFE_METHODS:
+            return HttpResponseNotAllowed(SAFE_METHODS)
+        return await sync_to_async(dispatch_read_view, thread_sensitive=False, executor=READ_EXECUTOR)(
+            view, request, *args, **kwargs,
+        )
+
+    # Представления DRF не проверяют CSRF-токен (используется аутентификация DRF)
+    async_view.csrf_exempt = True
+    async_view.__doc__ = view_class.__doc__
+    # Имя представления используется как метка в метриках (см. api.middleware)
+    async_view.__name__ = async_view.__qualname__ = f'Async{view_class.__name__}'
+    return async_view
@@ -0,0 +1,99 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+# Константы
+DATA_VERSION_CACHE_KEY = 'vehicles:data_version'
+RESPONSE_CACHE_KEY_PREFIX = 'vehicles:response'
+
+
+def get_data_version() -> int:
+    """
+    Возвращает текущую версию данных о транспортных средствах.
+
+    Версия изменяется при каждом изменении таблицы и входит в ключи кэша, поэтому после изменения данных
+    ранее сохранённые в кэше ответы не используются. Начальное значение берётся из текущего времени (в наносекундах),
+    чтобы после потери ключа (вытеснение, перезапуск кэша) версия не совпала ни с одной из использованных ранее.
+    """
+    version = cache.get(DATA_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+        version = cache.get(DATA_VERSION_CACHE_KEY)
+    return version
+
+
+def bump_data_version():
+    """ Изменяет версию данных о транспортных средствах. """
+    try:
+        cache.incr(DATA_VERSION_CACHE_KEY)
+    except ValueError:
+        # Ключ отсутствует в кэше
+        cache.add(DATA_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+
+
+def bump_data_version_on_commit():
+    """
+    Изменяет версию данных после фиксации текущей транзакции.
+
+    Если изменить версию до фиксации, параллельный запрос может сохранить в кэше ещё не изменённые данные
+    под новой версией.
+    """
+    transaction.on_commit(bump_data_version)
+
+
+def get_query_parameters(request: Request) -> list[tuple[str, list[str]]]:
+    """
+    Возвращает параметры запроса, упорядоченные по имени.
+
+    Порядок значений одного параметра сохраняется, так как при фильтрации используется последнее значение.
+    """
+    return sorted((key, request.query_params.getlist(key)) for key in request.query_params)
+
+
+def get_request_digest(request: Request) -> str:
+    """ Возвращает хэш запроса: адрес, параметры запроса (упорядоченные по имени) и формат ответа. """
+    media_type = request.accepted_renderer.media_type if hasattr(request, 'accepted_renderer') else ''
+    data = repr((request.get_host(), request.path, get_query_parameters(request), media_type))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class CachedResponseMixin:
+    """
+    Кэширование ответов на GET-запросы представлений DRF.
+
+    Данные ответа сохраняются в кэше по ключу из версии данных и хэша запроса (см. `get_request_digest`).
+    Ответ содержит заголовок ETag из тех же значений, поэтому запрос с совпадающим заголовком If-None-Match
+    обрабатывается без обращения к БД и получает ответ 304. Кэшируются только ответы со статусом 200.
+    """
+    cache_key_prefix = RESPONSE_CACHE_KEY_PREFIX
+
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        digest = get_request_digest(request)
+        version = get_data_version()
+        etag = f'W/"{version}-{digest}"'
+
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        cache_key = f'{self.cache_key_prefix}:{version}:{digest}'
+        data = cache.get(cache_key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = self.get_uncached_response(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(cache_key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+        response['ETag'] = etag
+        return response
+
+    def get_uncached_response(self, request: Request, *args, **kwargs) -> Response:
+        """ Формирует ответ без использования кэша: по умолчанию - обработчиком GET базового класса представления. """
+        return super().get(request, *args, **kwargs)
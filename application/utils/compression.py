@@ -0,0 +1,75 @@
+import gzip
+import zlib
+from typing import Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:     # Сжатие zstd доступно только при установленной библиотеке zstandard
+    zstandard = None
+
+
+# Константы
+GZIP_COMPRESSION_LEVEL = 6
+ZSTD_COMPRESSION_LEVEL = 3
+CONTENT_ENCODING_TO_FILE_SUFFIX_MAPPING = {
+    'zstd': 'zst',
+    'gzip': 'gz',
+}
+UPLOAD_CONTENT_ENCODINGS = ('gzip', )   # Допустимые значения заголовка Content-Encoding при загрузке файла
+
+
+def get_available_encodings() -> list[str]:
+    """ Возвращает поддерживаемые способы сжатия ответа в порядке предпочтения. """
+    return [encoding for encoding in CONTENT_ENCODING_TO_FILE_SUFFIX_MAPPING if encoding != 'zstd' or zstandard]
+
+
+def choose_content_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Выбирает способ сжатия ответа по заголовку Accept-Encoding.
+
+    Учитываются веса (`gzip;q=0.5`); из способов с наибольшим весом выбирается первый в порядке предпочтения
+    (`get_available_encodings`). Возвращает None, если клиент не принимает ни один из поддерживаемых способов.
+    """
+    weights = dict()
+    for item in accept_encoding.split(','):
+        encoding, _, parameters = item.strip().partition(';')
+        try:
+            weight = float(parameters.strip()[2:]) if parameters.strip().startswith('q=') else 1.0
+        except ValueError:
+            continue
+        weights[encoding.strip().lower()] = weight
+
+    candidates = [
+        (weights.get(encoding, weights.get('*', 0)), -number, encoding)
+        for number, encoding in enumerate(get_available_encodings())
+    ]
+    weight, _, encoding = max(candidates)
+    return encoding if weight > 0 else None
+
+
+def compress_chunks(chunks: Iterator, encoding: str, charset: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Сжимает части файла по мере их получения (строки предварительно кодируются в `charset`).
+
+    Сжатый поток не формируется целиком в памяти: каждая часть передаётся дальше, как только компрессор
+    выдаёт очередной блок данных.
+    """
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).compressobj()
+    else:
+        compressor = zlib.compressobj(GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode(charset or 'utf-8')
+        if data := compressor.compress(chunk):
+            yield data
+
+    yield compressor.flush()
+
+
+def open_decompressed(file, encoding: str):
+    """ Возвращает объект для чтения распакованных данных файла, сжатого способом `encoding`. """
+    if encoding == 'gzip':
+        return gzip.GzipFile(fileobj=file, mode='rb')
+    return file
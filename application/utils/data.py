@@ -1,25 +1,67 @@
+import codecs
+import csv
 import datetime
+import gzip
 import io
+import itertools
 import logging
+import openpyxl
 import pandas
+import tempfile
+import xlsxwriter
+import zipfile
 
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.db import DatabaseError
 from enum import Enum
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 from django.db.models import QuerySet
+from django.utils import timezone
 from pandas import DataFrame
 
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:     # Форматы Parquet и Arrow доступны только при установленной библиотеке pyarrow
+    pyarrow = None
+
 from api.exceptions import VehicleAPIException
-from api.models import Vehicle
+from api.models import Vehicle, DATA_OPERATIONS_MAPPING, FIRST_CAR_MANUFACTURE_YEAR, VIN_LENGTH
 from api.serializers import VehicleSerializer
+from utils.cache import bump_data_version_on_commit
+from utils.transactions import immediate_atomic
+from utils.validators import get_current_year
+from utils.views import bulk_log_data_modification
 
 
 CONTENT_TYPE_TO_FILE_TYPE_MAPPING = {
     'text/csv': 'csv',
     'application/vnd.ms-excel': 'xls',
     'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
+    'application/vnd.apache.parquet': 'parquet',
+    'application/vnd.apache.arrow.stream': 'arrow',
 }
+EXPORT_FILE_TYPES = ('xlsx', 'csv', 'parquet', 'arrow', )
+COLUMNAR_FILE_TYPES = ('parquet', 'arrow', )    # Форматы, для которых требуется библиотека pyarrow
+COMPRESSIBLE_FILE_TYPES = ('csv', 'arrow', )    # Форматы выгрузки, которые сжимаются при передаче клиенту
+UNIQUE_VEHICLE_FIELDS = ('registration_number', 'vin', 'vehicle_certificate_number', )
+IMPORT_BATCH_SIZE = 10000       # Количество строк файла, читаемых и проверяемых за один раз при импорте
+BULK_BATCH_SIZE = 1000          # Количество записей, сохраняемых в БД одним запросом
+LOOKUP_BATCH_SIZE = 500         # Количество значений в одном условии `IN` (ограничение SQLite на число параметров)
+EXPORT_CHUNK_SIZE = 2000        # Количество записей, считываемых из БД за один раз при экспорте
+EXPORT_SPOOL_MAX_SIZE = 10 * 1024 * 1024    # Размер файла экспорта, после которого он сбрасывается на диск
+EXPORT_READ_BLOCK_SIZE = 64 * 1024          # Размер блока, которым файл экспорта передаётся клиенту
+COLUMNAR_BATCH_SIZE = 65536     # Количество записей в одном пакете (row group) файлов Parquet и Arrow
+CSV_ENCODINGS = ('utf-8', 'cp1251', )      # Кодировки файлов CSV в порядке проверки
+CSV_ENCODING_SAMPLE_SIZE = 64 * 1024        # Размер начала файла CSV, по которому определяется кодировка
+CSV_BLOCK_SIZE = 4 * 1024 * 1024            # Размер блока, которым файл CSV читается библиотекой pyarrow
+FIRST_DATA_ROW_NUMBER = 2       # Номер строки файла, с которой начинаются данные (первая строка - заголовки)
+DATE_PATTERN = r'\d{4}-\d{1,2}-\d{1,2}'    # Формат строки с датой (ISO 8601, как у DateField сериализатора)
+DATE_FORMAT = '%Y-%m-%d'
 
 
 def file_type_from_content_type(content_type: str) -> Optional[str]:
@@ -27,6 +69,11 @@ def file_type_from_content_type(content_type: str) -> Optional[str]:
     return CONTENT_TYPE_TO_FILE_TYPE_MAPPING[content_type]
 
 
+def is_file_type_available(file_type: str) -> bool:
+    """ Проверяет, установлены ли библиотеки, необходимые для работы с файлами указанного типа. """
+    return file_type not in COLUMNAR_FILE_TYPES or pyarrow is not None
+
+
 class FileHeadersEnum(Enum):
     """ Названия столбцов данных в файле, содержащем информацию о транспортных средствах. """
     make = 'Марка'
@@ -39,60 +86,432 @@ class FileHeadersEnum(Enum):
     vehicle_certificate_date = 'Дата выдачи СТС'
 
 
-def read_data_to_dataframe(file_type: str, data) -> pandas.DataFrame:
-    """ Читает файл (или другой поддерживаемый источник данных) в Pandas DataFrame. """
+def read_xlsx_batches(data, batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[DataFrame]:
+    """
+    Читает файл XLSX построчно (режим read_only библиотеки openpyxl) и возвращает пакеты строк по `batch_size` штук.
+
+    Индекс каждого пакета соответствует положению строки в файле, полностью пустые строки пропускаются.
+    """
+    workbook = openpyxl.load_workbook(data, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        width = len(header)
+
+        batch, index = [], []
+        is_empty = True
+        for position, row in enumerate(rows):
+            if all(value is None for value in row):
+                continue
+
+            batch.append(tuple(row[:width]) + (None, ) * (width - len(row)))
+            index.append(position)
+            if len(batch) == batch_size:
+                yield DataFrame(batch, columns=header, index=index)
+                batch, index = [], []
+                is_empty = False
+
+        # Файл без данных возвращается одним пустым пакетом, чтобы можно было проверить заголовки
+        if batch or is_empty:
+            yield DataFrame(batch, columns=header, index=index)
+    finally:
+        workbook.close()
+
+
+def read_columnar_batches(file_type: str, data, batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[DataFrame]:
+    """
+    Читает файл Parquet или Arrow IPC (stream) пакетами записей, не загружая файл в память целиком.
+
+    Индекс каждого пакета соответствует положению записи в файле.
+    """
+    if file_type == 'parquet':
+        parquet_file = pyarrow.parquet.ParquetFile(data)
+        schema = parquet_file.schema_arrow
+        batches = parquet_file.iter_batches(batch_size=batch_size)
+    else:
+        reader = pyarrow.ipc.open_stream(data)
+        schema = reader.schema
+        batches = (
+            batch.slice(offset, batch_size) for batch in reader for offset in range(0, batch.num_rows, batch_size)
+        )
+
+    start = 0
+    for batch in batches:
+        dataframe = batch.to_pandas()
+        dataframe.index = pandas.RangeIndex(start, start + len(dataframe))
+        start += len(dataframe)
+        yield dataframe
+
+    # Файл без данных возвращается одним пустым пакетом, чтобы можно было проверить заголовки
+    if start == 0:
+        yield schema.empty_table().to_pandas()
+
+
+def detect_csv_encoding(sample: bytes) -> str:
+    """
+    Определяет кодировку файла CSV по его началу.
+
+    Файл с BOM считается файлом в UTF-8, иначе выбирается первая из `CSV_ENCODINGS`, в которой начало файла
+    декодируется без ошибок (символ, разрезанный границей фрагмента, ошибкой не считается).
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+
+    for encoding in CSV_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=len(sample) < CSV_ENCODING_SAMPLE_SIZE)
+        except UnicodeDecodeError:
+            continue
+        return encoding
+
+    return CSV_ENCODINGS[-1]
+
+
+def read_csv_header(sample: bytes, encoding: str) -> list[str]:
+    """ Возвращает названия столбцов из первой строки файла CSV. """
+    text = sample.decode(encoding, errors='ignore')
+    return next(csv.reader(io.StringIO(text), delimiter=';', quotechar='"'), [])
+
+
+def get_csv_engine() -> str:
+    """
+    Возвращает библиотеку разбора файлов CSV: значение настройки `CSV_IMPORT_ENGINE` ('pyarrow' или 'c'),
+    а если она не задана - pyarrow при наличии библиотеки.
+    """
+    engine = settings.CSV_IMPORT_ENGINE or ('pyarrow' if pyarrow is not None else 'c')
+    if engine == 'pyarrow' and pyarrow is None:
+        logging.warning('Библиотека pyarrow не установлена, файлы CSV разбираются библиотекой pandas.')
+        return 'c'
+    return engine
+
+
+def read_csv_batches_pandas(data, encoding: str, columns: list[str],
+                            batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[DataFrame]:
+    """ Читает файл CSV пакетами строк средствами pandas (движок 'c'). """
+    with pandas.read_csv(
+        data, encoding=encoding, sep=';', quotechar='"', usecols=columns, dtype=str,
+        keep_default_na=False, na_values=[''], chunksize=batch_size,
+    ) as reader:
+        yield from reader
+
+
+def read_csv_batches_pyarrow(data, encoding: str, columns: list[str],
+                             batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[DataFrame]:
+    """
+    Читает файл CSV пакетами строк средствами pyarrow.
+
+    Файл разбирается блоками по `CSV_BLOCK_SIZE` байт в несколько потоков, блоки собираются в пакеты
+    по `batch_size` строк. Индекс каждого пакета соответствует положению строки в файле.
+    """
+    reader = pyarrow.csv.open_csv(
+        data,
+        read_options=pyarrow.csv.ReadOptions(
+            encoding='utf8' if encoding == 'utf-8-sig' else encoding, block_size=CSV_BLOCK_SIZE,
+        ),
+        parse_options=pyarrow.csv.ParseOptions(delimiter=';', quote_char='"'),
+        convert_options=pyarrow.csv.ConvertOptions(
+            include_columns=columns, column_types={column: pyarrow.string() for column in columns},
+            null_values=[''], strings_can_be_null=True,
+        ),
+    )
+
+    batches, rows, start = [], 0, 0
+    for batch in itertools.chain(reader, [None]):
+        if batch is not None:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows < batch_size:
+                continue
+
+        table = pyarrow.Table.from_batches(batches, schema=reader.schema)
+        while table.num_rows >= batch_size or (batch is None and table.num_rows):
+            dataframe = table.slice(0, batch_size).to_pandas()
+            dataframe.index = pandas.RangeIndex(start, start + len(dataframe))
+            start += len(dataframe)
+            table = table.slice(batch_size)
+            yield dataframe
+        batches, rows = table.to_batches(), table.num_rows
+
+    # Файл без данных возвращается одним пустым пакетом, чтобы можно было проверить заголовки
+    if start == 0:
+        yield reader.schema.empty_table().to_pandas()
+
+
+def read_csv_batches(data, batch_size: int = IMPORT_BATCH_SIZE, engine: Optional[str] = None) -> Iterator[DataFrame]:
+    """
+    Читает файл CSV пакетами строк по `batch_size` штук.
+
+    Кодировка определяется по началу файла (см. `detect_csv_encoding`). Читаются только столбцы `FileHeadersEnum`,
+    все значения читаются как строки: типы не определяются по содержимому, поэтому номера не преобразуются в числа
+    и не теряют ведущие нули. Год выпуска и дата выдачи СТС приводятся к нужным типам при проверке данных
+    (см. `validate_vehicles_dataframe`), где некорректное значение становится ошибкой в строке, а не в файле.
+    """
+    sample = data.read(CSV_ENCODING_SAMPLE_SIZE)
+    data.seek(0)
+
+    encoding = detect_csv_encoding(sample)
+    header = read_csv_header(sample, encoding)
+    columns = [item.value for item in FileHeadersEnum if item.value in header]
+    logging.debug(f'read_csv_batches({encoding=}, {columns=})')
+
+    if not columns:
+        # В файле нет ни одного из нужных столбцов: ошибка формируется при выборе столбцов
+        yield DataFrame(columns=header)
+        return
+
+    if (engine or get_csv_engine()) == 'pyarrow':
+        yield from read_csv_batches_pyarrow(data, encoding, columns, batch_size=batch_size)
+    else:
+        yield from read_csv_batches_pandas(data, encoding, columns, batch_size=batch_size)
+
+
+def read_data_batches(file_type: str, data, batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[DataFrame]:
+    """
+    Читает файл (или другой поддерживаемый источник данных) пакетами строк по `batch_size` штук.
+
+    Возвращает итератор по Pandas DataFrame; индекс строк сквозной для всего файла.
+    """
     match file_type:
         case 'csv':
-            dataframe = pandas.read_csv(data, encoding='cp1251', sep=';', quotechar='"')
+            yield from read_csv_batches(data, batch_size=batch_size)
         case 'xls':
+            # Формат XLS не поддерживает построчное чтение: файл читается целиком и разбивается на пакеты
             dataframe = pandas.read_excel(data, sheet_name=0, header=0, engine='xlrd')
+            for start in range(0, max(len(dataframe), 1), batch_size):
+                yield dataframe.iloc[start:start + batch_size]
         case 'xlsx':
-            dataframe = pandas.read_excel(data, sheet_name=0, header=0, engine='openpyxl')
+            yield from read_xlsx_batches(data, batch_size=batch_size)
+        case 'parquet' | 'arrow' if pyarrow is not None:
+            yield from read_columnar_batches(file_type, data, batch_size=batch_size)
         case _:
             error_message = f'Формат файла {file_type} не поддерживается.'
             logging.error(error_message)
             raise ValueError(error_message)
 
-    return dataframe
-
-
-def parse_vehicles(file_type: str, data) -> list[dict]:
-    """ Разбирает файл, содержащий информацию о транспортных средствах. """
-    logging.debug(f'parse_vehicles({file_type=}, {data=})')
 
+def _read_vehicle_batches(file_type: str, data, batch_size: int) -> Iterator[DataFrame]:
+    """ Читает пакеты строк из файла и выбирает из них колонки с данными о транспортных средствах. """
     try:
-        dataframe = read_data_to_dataframe(file_type, data)
-    except ValueError as e:
+        for dataframe in read_data_batches(file_type, data, batch_size=batch_size):
+            yield select_vehicle_columns(dataframe)
+    except (ValueError, zipfile.BadZipFile, gzip.BadGzipFile, EOFError) as e:
         error_message = f'Не удалось преобразовать данные в DataFrame: {e}'
         logging.error(error_message)
         raise VehicleAPIException(error_message)
 
-    try:
-        vehicles = [
-            {item.name: row[item.value] for item in FileHeadersEnum}
-            for _, row in dataframe.iterrows()
-        ]
-    except KeyError as e:
-        error_message = f'Некорректный формат файла. Не найдена колонка данных: {e}'
+
+def parse_vehicles(file_type: str, data, batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[DataFrame]:
+    """
+    Разбирает файл, содержащий информацию о транспортных средствах.
+
+    Возвращает итератор по пакетам строк (DataFrame), колонки которых переименованы в названия полей модели Vehicle.
+    Первый пакет читается сразу, поэтому ошибки формата файла обнаруживаются до начала импорта.
+    """
+    logging.debug(f'parse_vehicles({file_type=}, {data=}, {batch_size=})')
+
+    batches = _read_vehicle_batches(file_type, data, batch_size=batch_size)
+    first_batch = next(batches, None)
+    if first_batch is None:
+        return iter(())
+
+    return itertools.chain([first_batch], batches)
+
+
+def select_vehicle_columns(dataframe: DataFrame) -> DataFrame:
+    """ Выбирает из DataFrame колонки `FileHeadersEnum` и переименовывает их в названия полей модели Vehicle. """
+    columns = {item.value: item.name for item in FileHeadersEnum}
+
+    missing_columns = [column for column in columns if column not in dataframe.columns]
+    if missing_columns:
+        error_message = f'Некорректный формат файла. Не найдены колонки данных: {missing_columns}'
         logging.error(error_message)
         raise VehicleAPIException(error_message)
 
-    return vehicles
+    return dataframe[list(columns)].rename(columns=columns)
+
+
+def _add_errors(errors: DataFrame, field: str, mask: pandas.Series, message):
+    """
+    Записывает сообщение об ошибке в ячейки `errors[field]`, отмеченные маской `mask`.
+
+    Если для ячейки уже записана ошибка, она сохраняется: для каждого поля фиксируется первая найденная ошибка.
+    """
+    mask = mask & errors[field].isna()
+    if mask.any():
+        errors.loc[mask, field] = message[mask] if isinstance(message, pandas.Series) else message
+
+
+def parse_dates(series: pandas.Series) -> pandas.Series:
+    """
+    Приводит значения колонки с датами к datetime64; значения, не являющиеся датой, заменяются на NaT.
+
+    Строки принимаются только в формате YYYY-MM-DD (как DateField сериализатора): формат значения не угадывается,
+    поэтому '05.06.2020' или '2020' не становятся датами. Значения date, datetime и Timestamp (ячейки с датой
+    в файлах XLSX, Parquet и Arrow) принимаются как есть, значения других типов (например, числа) - нет.
+    """
+    if pandas.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    is_string = series.map(lambda value: isinstance(value, str))
+    # datetime и Timestamp - подклассы date
+    is_date = series.map(lambda value: isinstance(value, datetime.date))
+
+    result = pandas.Series(pandas.NaT, index=series.index, dtype='datetime64[ns]')
+    if is_string.any():
+        strings = series[is_string].str.strip()
+        strings = strings.where(strings.str.fullmatch(DATE_PATTERN))
+        result[is_string] = pandas.to_datetime(strings, format=DATE_FORMAT, errors='coerce')
+    if is_date.any():
+        result[is_date] = pandas.to_datetime(series[is_date], errors='coerce')
+
+    return result
+
+
+def validate_vehicles_dataframe(dataframe: DataFrame) -> tuple[DataFrame, DataFrame]:
+    """
+    Проверяет и преобразует данные о транспортных средствах целиком по колонкам, без обращения к базе данных.
+
+    Возвращает очищенный DataFrame с приведёнными к нужным типам значениями и DataFrame ошибок
+    с тем же индексом: в ячейке содержится сообщение об ошибке в соответствующем поле либо пустое значение.
+    Маска строк с ошибками: `errors.notna().any(axis=1)`.
+    """
+    logging.debug(f'validate_vehicles_dataframe({len(dataframe)=})')
+
+    fields = [item.name for item in FileHeadersEnum]
+    cleaned = DataFrame(index=dataframe.index)
+    errors = DataFrame(index=dataframe.index, columns=fields, dtype=object)
+
+    # Строковые поля: обязательность и максимальная длина
+    for field in fields:
+        if field in ('year_of_manufacture', 'vehicle_certificate_date', ):
+            continue
+
+        # Пустая колонка читается как float (NaN), числовая - как число: аксессор .str требует тип object
+        series = dataframe[field].astype(object)
+        series = series.where(series.isna(), series.astype(str).str.strip())
+        cleaned[field] = series
+
+        _add_errors(errors, field, series.isna() | (series == ''), 'Обязательное поле.')
+
+        max_length = Vehicle._meta.get_field(field).max_length
+        _add_errors(
+            errors, field, series.str.len() > max_length,
+            f'Убедитесь, что это значение содержит не более {max_length} символов.',
+        )
+
+    # VIN должен содержать ровно VIN_LENGTH символов
+    _add_errors(
+        errors, 'vin', cleaned['vin'].str.len() != VIN_LENGTH,
+        f'Строка должна содержать ровно {VIN_LENGTH} символов.',
+    )
+
+    # Год выпуска: целое число от FIRST_CAR_MANUFACTURE_YEAR до текущего года
+    year = pandas.to_numeric(dataframe['year_of_manufacture'], errors='coerce')
+    _add_errors(errors, 'year_of_manufacture', year.isna() | (year % 1 != 0), 'Введите правильное число.')
+    _add_errors(
+        errors, 'year_of_manufacture', (year < FIRST_CAR_MANUFACTURE_YEAR) | (year > get_current_year()),
+        f'Год выпуска должен быть в диапазоне от {FIRST_CAR_MANUFACTURE_YEAR} до текущего года включительно.',
+    )
+    # Значения вне диапазона (в том числе бесконечные и не помещающиеся в int64) уже отмечены как ошибки
+    year = year.where(year.between(FIRST_CAR_MANUFACTURE_YEAR, get_current_year()))
+    cleaned['year_of_manufacture'] = year.round().astype('Int64')
+
+    # Дата выдачи СТС: значения Timestamp, datetime или строки в формате YYYY-MM-DD приводятся к date
+    date = parse_dates(dataframe['vehicle_certificate_date'])
+    _add_errors(
+        errors, 'vehicle_certificate_date', date.isna(),
+        'Неправильный формат date. Используйте формат: YYYY-MM-DD.',
+    )
+    cleaned['vehicle_certificate_date'] = date.dt.date
+
+    # Повторяющиеся внутри файла значения уникальных полей
+    for field in UNIQUE_VEHICLE_FIELDS:
+        series = cleaned[field]
+        _add_errors(
+            errors, field, series.notna() & series.duplicated(keep='first'),
+            'Значение повторяется в файле.',
+        )
+
+    return cleaned[fields], errors
+
+
+def fetch_existing_values(field: str, values: list, *value_fields: str) -> list[tuple]:
+    """
+    Возвращает значения полей `value_fields` записей, у которых значение поля `field` входит в `values`.
+
+    Выборка выполняется несколькими запросами вида `field IN (...)` по `LOOKUP_BATCH_SIZE` значений.
+    """
+    result = []
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        lookup = {f'{field}__in': values[start:start + LOOKUP_BATCH_SIZE]}
+        result.extend(Vehicle.objects.filter(**lookup).values_list(*value_fields))
+
+    return result
+
+
+def check_vehicles_uniqueness(dataframe: DataFrame, errors: DataFrame, key: Optional[str] = None):
+    """
+    Проверяет, что значения полей `UNIQUE_VEHICLE_FIELDS` отсутствуют в базе данных.
+
+    Проверка выполняется несколькими запросами вида `field IN (...)` вместо запроса на каждую запись.
+    Если указано ключевое поле `key`, значение считается повтором, только если оно принадлежит записи
+    с другим значением ключа (запись с тем же ключом будет обновлена).
+    Найденные ошибки дописываются в DataFrame ошибок `errors`.
+    """
+    logging.debug(f'check_vehicles_uniqueness({len(dataframe)=}, {key=})')
+
+    for field in UNIQUE_VEHICLE_FIELDS:
+        if field == key:
+            continue
+
+        values = dataframe[field].dropna().unique().tolist()
+        if key is None:
+            existing_values = {value for value, in fetch_existing_values(field, values, field)}
+            duplicated = dataframe[field].isin(existing_values)
+        else:
+            owners = dict(fetch_existing_values(field, values, field, key))
+            owner = dataframe[field].map(owners)
+            duplicated = owner.notna() & (owner != dataframe[key])
+
+        _add_errors(errors, field, duplicated, 'Транспортное средство с таким значением уже существует.')
+
+
+def check_vehicles_duplicates(dataframe: DataFrame, errors: DataFrame, seen: dict[str, dict],
+                              key: Optional[str] = None):
+    """
+    Проверяет, что значения полей `UNIQUE_VEHICLE_FIELDS` не встречались в предыдущих пакетах файла.
+
+    Используется при проверке файла без сохранения: при импорте такие повторы обнаруживаются проверкой по базе
+    данных, так как предыдущие пакеты к этому моменту уже сохранены. `seen` содержит для каждого поля значения
+    корректных строк предыдущих пакетов (и значения ключевого поля `key` этих строк) и дополняется значениями
+    корректных строк текущего пакета. Найденные ошибки дописываются в DataFrame ошибок `errors`.
+    """
+    for field in UNIQUE_VEHICLE_FIELDS:
+        if field == key or not seen[field]:
+            continue
+
+        previous = dataframe[field].map(seen[field].get, na_action='ignore')
+        duplicated = previous.notna() if key is None else previous.notna() & (previous != dataframe[key])
+        _add_errors(errors, field, duplicated, 'Значение повторяется в файле.')
 
+    valid = dataframe[~errors.notna().any(axis=1)]
+    for field in UNIQUE_VEHICLE_FIELDS:
+        seen[field].update(zip(valid[field], valid[key or field]))
 
-def transform_vehicles(data: list[dict]) -> list[dict]:
-    """ Производит необходимые преобразования данных, подготавливая их к последующему сохранению в БД. """
-    logging.debug(f'transform_vehicles({data=})')
 
-    # Преобразовать тип данных для колонки 'Дата выдачи СТС' из Timestamp или datetime в date.
-    key = FileHeadersEnum.vehicle_certificate_date.name     # Соответствует колонке 'Дата выдачи СТС'
-    for item in data:
-        value = item[key]
-        if isinstance(value, (pandas.Timestamp, datetime.datetime)):
-            value = value.date()
-            item[key] = value
+def dataframe_errors_to_dict(errors: DataFrame) -> dict[int, dict]:
+    """ Преобразует DataFrame ошибок в словарь вида {номер строки файла: {поле: [ошибки]}}. """
+    result = dict()
+    for (index, field), message in errors.stack().dropna().items():
+        result.setdefault(index + FIRST_DATA_ROW_NUMBER, dict())[field] = [message]
 
-    return data
+    return result
+
+
+def dataframe_to_vehicles(dataframe: DataFrame) -> list[Vehicle]:
+    """ Формирует несохранённые объекты Vehicle из очищенного DataFrame. """
+    records = dataframe.astype(object).where(dataframe.notna(), None).to_dict('records')
+    return [Vehicle(**record) for record in records]
 
 
 def save_vehicle(data: dict, **kwargs) -> Vehicle:
@@ -121,43 +540,343 @@ def save_vehicle(data: dict, **kwargs) -> Vehicle:
     return vehicle
 
 
-def dataframe_to_xlsx_bytes(dataframe: DataFrame):
-    """ Преобразует данные из pandas.DataFrame в формат XLSX. Возвращает объект BytesIO. """
-    output = io.BytesIO()
-    writer = pandas.ExcelWriter(path=output, engine='xlsxwriter')
-    dataframe.to_excel(
-        excel_writer=writer,
-        sheet_name='Транспортные средства',
-        header=[field.value for field in FileHeadersEnum],
-        index=False,
-    )
-    writer.save()
-    xlsx_data = output.getvalue()
+def bulk_save_vehicles(vehicles: list[Vehicle], user: User, batch_size: int = BULK_BATCH_SIZE,
+                       operation: str = DATA_OPERATIONS_MAPPING['import'],
+                       description: str = 'Импортированы данные о транспортном средстве.') -> list[Vehicle]:
+    """
+    Сохраняет проверенные записи о транспортных средствах и записи лог-таблицы в одной транзакции.
+
+    Записи сохраняются пакетами по `batch_size` штук с помощью `bulk_create`.
+    """
+    logging.debug(f'bulk_save_vehicles({len(vehicles)=}, {batch_size=})')
 
-    return xlsx_data
+    for vehicle in vehicles:
+        vehicle.created_by = user
+        vehicle.updated_by = user
+
+    try:
+        with immediate_atomic():
+            Vehicle.objects.bulk_create(vehicles, batch_size=batch_size)
+
+            # Не все СУБД возвращают идентификаторы созданных записей - получить их отдельными запросами
+            missing_ids = [vehicle.vin for vehicle in vehicles if vehicle.pk is None]
+            for start in range(0, len(missing_ids), LOOKUP_BATCH_SIZE):
+                ids = dict(
+                    Vehicle.objects
+                    .filter(vin__in=missing_ids[start:start + LOOKUP_BATCH_SIZE])
+                    .values_list('vin', 'id')
+                )
+                for vehicle in vehicles:
+                    if vehicle.pk is None and vehicle.vin in ids:
+                        vehicle.pk = ids[vehicle.vin]
+
+            bulk_log_data_modification(
+                vehicles=[
+                    {field: getattr(vehicle, field) for field in ('id', *UNIQUE_VEHICLE_FIELDS)}
+                    for vehicle in vehicles
+                ],
+                username=user,
+                operation=operation,
+                description=description,
+                batch_size=batch_size,
+            )
+
+            # bulk_create не отправляет сигнал post_save - сбросить кэш ответов API явно
+            if vehicles:
+                bump_data_version_on_commit()
+    except DatabaseError as e:
+        error_message = f'При попытке записать данные о транспортных средствах возникла ошибка: {e}'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    return vehicles
 
 
-def dataframe_to_csv(dataframe: DataFrame):
-    """ Преобразует данные из pandas.DataFrame в формат XLSX. Возвращает объект BytesIO. """
-    csv_data = dataframe.to_csv(
-        sep=';',
-        header=[field.value for field in FileHeadersEnum],
-        index=False,
+def bulk_update_vehicles(vehicles: list[Vehicle], fields: list[str], user: User,
+                         batch_size: int = BULK_BATCH_SIZE) -> list[Vehicle]:
+    """
+    Обновляет поля `fields` существующих записей о транспортных средствах и сохраняет записи лог-таблицы
+    в одной транзакции.
+
+    Записи обновляются пакетами по `batch_size` штук с помощью `bulk_update`.
+    """
+    logging.debug(f'bulk_update_vehicles({len(vehicles)=}, {fields=}, {batch_size=})')
+
+    # bulk_update не заполняет поля с auto_now, поэтому дата изменения проставляется явно
+    updated_at = timezone.now()
+    for vehicle in vehicles:
+        vehicle.updated_by = user
+        vehicle.updated_at = updated_at
+
+    try:
+        with immediate_atomic():
+            Vehicle.objects.bulk_update(vehicles, fields=[*fields, 'updated_by', 'updated_at'], batch_size=batch_size)
+            bulk_log_data_modification(
+                vehicles=[
+                    {field: getattr(vehicle, field) for field in ('id', *UNIQUE_VEHICLE_FIELDS)}
+                    for vehicle in vehicles
+                ],
+                username=user,
+                operation=DATA_OPERATIONS_MAPPING['modify'],
+                description='Изменена запись о транспортном средстве при импорте.',
+                batch_size=batch_size,
+            )
+
+            # bulk_update не отправляет сигнал post_save - сбросить кэш ответов API явно
+            if vehicles:
+                bump_data_version_on_commit()
+    except DatabaseError as e:
+        error_message = f'При попытке записать данные о транспортных средствах возникла ошибка: {e}'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    return vehicles
+
+
+def import_vehicles_batch(dataframe: DataFrame, user: User, batch_size: int = BULK_BATCH_SIZE) -> tuple[int, dict]:
+    """
+    Проверяет пакет данных о транспортных средствах и сохраняет в базу данных только корректные записи.
+
+    Возвращает количество сохранённых записей и словарь ошибок вида {номер строки: {поле: [ошибки]}}.
+    """
+    logging.debug(f'import_vehicles_batch({len(dataframe)=})')
+
+    cleaned, errors = validate_vehicles_dataframe(dataframe)
+    check_vehicles_uniqueness(cleaned, errors)
+
+    invalid_rows = errors.notna().any(axis=1)
+    vehicles = bulk_save_vehicles(dataframe_to_vehicles(cleaned[~invalid_rows]), user=user, batch_size=batch_size)
+
+    return len(vehicles), dataframe_errors_to_dict(errors[invalid_rows])
+
+
+def upsert_vehicles_batch(dataframe: DataFrame, user: User, key: str = 'vin',
+                          batch_size: int = BULK_BATCH_SIZE) -> tuple[int, int, int, dict]:
+    """
+    Проверяет пакет данных о транспортных средствах и сохраняет корректные записи в режиме "upsert".
+
+    Существующие записи сопоставляются по значению ключевого поля `key`: у изменившихся записей обновляются
+    изменённые поля (в лог-таблицу вносится операция modify), записи без изменений пропускаются, отсутствующие
+    в базе данных записи создаются (операция add).
+    Возвращает количество созданных, обновлённых и пропущенных записей и словарь ошибок.
+    """
+    logging.debug(f'upsert_vehicles_batch({len(dataframe)=}, {key=})')
+
+    cleaned, errors = validate_vehicles_dataframe(dataframe)
+    check_vehicles_uniqueness(cleaned, errors, key=key)
+
+    invalid_rows = errors.notna().any(axis=1)
+    valid = cleaned[~invalid_rows]
+
+    # Получить текущие значения полей записей, совпадающих по ключевому полю
+    fields = [item.name for item in FileHeadersEnum]
+    existing = {
+        values[fields.index(key)]: (vehicle_id, values)
+        for vehicle_id, *values in fetch_existing_values(key, valid[key].tolist(), 'id', *fields)
+    }
+    is_existing = valid[key].isin(existing)
+
+    # Отобрать изменившиеся записи и изменившиеся в них поля
+    changed_vehicles, changed_fields = [], set()
+    for vehicle in dataframe_to_vehicles(valid[is_existing]):
+        vehicle_id, current_values = existing[getattr(vehicle, key)]
+        changed = {field for field, value in zip(fields, current_values) if getattr(vehicle, field) != value}
+        if changed:
+            vehicle.pk = vehicle_id
+            changed_vehicles.append(vehicle)
+            changed_fields.update(changed)
+
+    created = bulk_save_vehicles(
+        dataframe_to_vehicles(valid[~is_existing]), user=user, batch_size=batch_size,
+        operation=DATA_OPERATIONS_MAPPING['add'],
+        description='Создана запись о транспортном средстве при импорте.',
     )
+    if changed_vehicles:
+        bulk_update_vehicles(changed_vehicles, fields=sorted(changed_fields), user=user, batch_size=batch_size)
 
-    return csv_data
+    unchanged = int(is_existing.sum()) - len(changed_vehicles)
+    return len(created), len(changed_vehicles), unchanged, dataframe_errors_to_dict(errors[invalid_rows])
 
 
-def export_vehicles(queryset: QuerySet, file_type: str):
-    """ """
+def validate_vehicles_batches(batches: Iterable[DataFrame], key: Optional[str] = None) -> tuple[int, dict]:
+    """
+    Проверяет пакеты данных о транспортных средствах так же, как при импорте, но ничего не сохраняет.
+
+    Для каждого пакета выполняются проверка по колонкам (`validate_vehicles_dataframe`) и проверка уникальности
+    по базе данных запросами `IN (...)`; повторы значений между пакетами проверяются без обращения к базе данных.
+    Если указано ключевое поле `key`, проверка выполняется для режима upsert.
+    Возвращает количество проверенных строк и словарь ошибок вида {номер строки: {поле: [ошибки]}}.
+    """
+    seen = {field: dict() for field in UNIQUE_VEHICLE_FIELDS}
+    rows, result = 0, dict()
+
+    for dataframe in batches:
+        logging.debug(f'validate_vehicles_batches({len(dataframe)=}, {key=})')
+
+        cleaned, errors = validate_vehicles_dataframe(dataframe)
+        check_vehicles_uniqueness(cleaned, errors, key=key)
+        check_vehicles_duplicates(cleaned, errors, seen, key=key)
+
+        result.update(dataframe_errors_to_dict(errors[errors.notna().any(axis=1)]))
+        rows += len(dataframe)
+
+    return rows, result
+
+
+def iterate_export_rows(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    Возвращает итератор по значениям экспортируемых полей.
+
+    Записи считываются из БД порциями по `chunk_size` штук (на PostgreSQL - с помощью серверного курсора),
+    поэтому выборка целиком в память не загружается.
+    """
     field_names = [field.name for field in FileHeadersEnum]     # Выбрать только значимые для экспорта поля
-    values = queryset.values(*field_names)                      # Получить значения указанных полей
-    dataframe = pandas.DataFrame(list(values))                  # Сформировать DataFrame из полученных данных
+    return queryset.values_list(*field_names).iterator(chunk_size=chunk_size)
+
+
+def stream_vehicles_csv(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """ Формирует данные в формате CSV порциями по `chunk_size` строк. """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';', quotechar='"', lineterminator='\n')
+    writer.writerow([field.value for field in FileHeadersEnum])
+
+    for number, row in enumerate(iterate_export_rows(queryset, chunk_size=chunk_size), start=1):
+        writer.writerow(row)
+        if number % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def write_vehicles_xlsx(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> tempfile.SpooledTemporaryFile:
+    """
+    Формирует файл в формате XLSX во временном файле.
+
+    Используется режим constant_memory библиотеки xlsxwriter: строки сбрасываются на диск по мере записи,
+    а временный файл хранится в памяти только до размера `EXPORT_SPOOL_MAX_SIZE`.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Транспортные средства')
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+
+    worksheet.write_row(0, 0, [field.value for field in FileHeadersEnum])
+    for row_number, row in enumerate(iterate_export_rows(queryset, chunk_size=chunk_size), start=1):
+        for column_number, value in enumerate(row):
+            if isinstance(value, datetime.date):
+                worksheet.write_datetime(row_number, column_number, value, date_format)
+            else:
+                worksheet.write(row_number, column_number, value)
+
+    workbook.close()
+    output.seek(0)
+
+    return output
 
+
+class ChunkedOutputStream(io.RawIOBase):
+    """
+    Поток записи, накапливающий записанные данные до их передачи клиенту (см. `drain`).
+
+    В отличие от BytesIO позиция потока (`tell`) не сбрасывается после передачи данных: от неё зависят смещения,
+    которые pyarrow записывает в метаданные файла Parquet.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """ Возвращает данные, записанные после предыдущего вызова. """
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def get_arrow_schema() -> 'pyarrow.Schema':
+    """ Возвращает схему Arrow для экспорта: названия колонок совпадают с заголовками файлов CSV и XLSX. """
+    types = {
+        FileHeadersEnum.year_of_manufacture: pyarrow.int32(),
+        FileHeadersEnum.vehicle_certificate_date: pyarrow.date32(),
+    }
+    return pyarrow.schema([(field.value, types.get(field, pyarrow.string())) for field in FileHeadersEnum])
+
+
+def iterate_export_record_batches(queryset: QuerySet, batch_size: int = COLUMNAR_BATCH_SIZE,
+                                  chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator['pyarrow.RecordBatch']:
+    """ Формирует пакеты записей Arrow по `batch_size` строк из значений экспортируемых полей. """
+    schema = get_arrow_schema()
+    rows = iterate_export_rows(queryset, chunk_size=chunk_size)
+    while batch := list(itertools.islice(rows, batch_size)):
+        columns = [
+            pyarrow.array(values, type=field.type) for values, field in zip(zip(*batch), schema)
+        ]
+        yield pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def stream_vehicles_columnar(queryset: QuerySet, file_type: str,
+                             batch_size: int = COLUMNAR_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Формирует данные в формате Parquet или Arrow IPC (stream) по пакетам записей.
+
+    Каждый пакет (row group для Parquet) передаётся клиенту сразу после формирования.
+    """
+    output = ChunkedOutputStream()
+    schema = get_arrow_schema()
+    if file_type == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(output, schema, compression='zstd')
+    else:
+        writer = pyarrow.ipc.new_stream(output, schema)
+
+    try:
+        for batch in iterate_export_record_batches(queryset, batch_size=batch_size):
+            if file_type == 'parquet':
+                writer.write_batch(batch, row_group_size=batch_size)
+            else:
+                writer.write_batch(batch)
+            yield output.drain()
+    finally:
+        writer.close()
+
+    yield output.drain()
+
+
+def stream_file(file, block_size: int = EXPORT_READ_BLOCK_SIZE) -> Iterator[bytes]:
+    """ Читает файл блоками по `block_size` байт и закрывает его по окончании чтения. """
+    try:
+        while block := file.read(block_size):
+            yield block
+    finally:
+        file.close()
+
+
+def export_vehicles(queryset: QuerySet, file_type: str) -> Iterator:
+    """
+    Экспортирует данные о транспортных средствах в файл указанного типа.
+
+    Возвращает итератор по частям файла, пригодный для передачи в StreamingHttpResponse.
+    """
     match file_type:
         case 'xlsx':
-            return dataframe_to_xlsx_bytes(dataframe)
+            return stream_file(write_vehicles_xlsx(queryset))
         case 'csv':
-            return dataframe_to_csv(dataframe)
+            return stream_vehicles_csv(queryset)
+        case 'parquet' | 'arrow' if pyarrow is not None:
+            return stream_vehicles_columnar(queryset, file_type=file_type)
         case _:
             raise ValueError(f'Тип данных {file_type} не поддерживается.')
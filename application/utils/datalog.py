@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+
+from django.db import DatabaseError, connections
+
+from api.models import DataLog
+from utils.metrics import DATA_LOG_WRITE_DURATION, DATA_LOG_RECORDS
+from utils.transactions import immediate_atomic
+
+
+DATA_LOG_BUFFER_SIZE = 500          # Количество записей в буфере, при котором он записывается в БД
+DATA_LOG_FLUSH_INTERVAL = 1.0       # Максимальное время хранения записи в буфере, секунд
+DATA_LOG_MAX_BUFFER_SIZE = 100000   # Количество записей, при превышении которого сообщается о проблеме записи в БД
+
+
+class DataLogWriter:
+    """
+    Буфер записей лог-таблицы DataLog.
+
+    Записи накапливаются в памяти процесса и сохраняются одним запросом `bulk_create`, когда в буфере набирается
+    `buffer_size` записей или с момента последней записи прошло `flush_interval` секунд (в фоновом потоке).
+    Кроме того, буфер записывается по окончании каждого запроса и при завершении процесса (см. `ApiConfig.ready`).
+    Если сохранить записи не удалось, они возвращаются в буфер и сохраняются при следующей попытке.
+
+    Буфер хранится только в памяти процесса: при аварийном завершении процесса (SIGKILL, нехватка памяти) теряются
+    записи, ещё не сохранённые в БД. Для запросов к API это изменения, зафиксированные до окончания обработки
+    запроса; для остального кода - изменения за последние `flush_interval` секунд, а при недоступности БД -
+    все накопленные в буфере записи.
+    """
+
+    def __init__(self, buffer_size: int = DATA_LOG_BUFFER_SIZE, flush_interval: float = DATA_LOG_FLUSH_INTERVAL):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._buffer: list[DataLog] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def add(self, log: DataLog):
+        """ Добавляет запись в буфер. """
+        with self._lock:
+            self._buffer.append(log)
+            is_full = len(self._buffer) >= self.buffer_size
+
+        if is_full:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def flush(self):
+        """ Сохраняет все записи буфера в БД. """
+        with self._flush_lock:
+            with self._lock:
+                logs, self._buffer = self._buffer, []
+
+            if not logs:
+                return
+
+            started_at = time.perf_counter()
+            try:
+                # Точка сохранения позволяет не прерывать внешнюю транзакцию при ошибке записи в лог
+                with immediate_atomic():
+                    DataLog.objects.bulk_create(logs)
+            except DatabaseError as e:
+                with self._lock:
+                    self._buffer[:0] = logs
+                    buffered = len(self._buffer)
+
+                error_message = f'При попытке записать данные в лог-таблицу возникла ошибка: {e}. ' \
+                                f'Записей в буфере: {buffered}'
+                if buffered > DATA_LOG_MAX_BUFFER_SIZE:
+                    logging.error(error_message)
+                else:
+                    logging.warning(error_message)
+            else:
+                DATA_LOG_WRITE_DURATION.labels('buffer').observe(time.perf_counter() - started_at)
+                DATA_LOG_RECORDS.labels('buffer').inc(len(logs))
+
+    def _schedule_flush(self):
+        """ Запускает фоновую запись буфера через `flush_interval` секунд, если она ещё не запланирована. """
+        with self._lock:
+            if self._timer is not None:
+                return
+
+            self._timer = threading.Timer(self.flush_interval, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_in_background(self):
+        with self._lock:
+            self._timer = None
+
+        try:
+            self.flush()
+        finally:
+            # Соединения с БД привязаны к потоку: закрыть соединение фонового потока
+            connections.close_all()
+
+        # Записи, которые не удалось сохранить, будут сохранены при следующей попытке
+        with self._lock:
+            has_logs = bool(self._buffer)
+        if has_logs:
+            time.sleep(self.flush_interval)
+            self._schedule_flush()
+
+
+data_log_writer = DataLogWriter()
+
+
+def flush_data_log(**kwargs):
+    """ Сохраняет буфер записей лог-таблицы. Используется как обработчик сигналов и функция atexit. """
+    data_log_writer.flush()
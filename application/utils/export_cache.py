@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.http.response import HttpResponseBase
+from rest_framework.request import Request
+
+from utils.cache import get_data_version, get_query_parameters
+from utils.compression import CONTENT_ENCODING_TO_FILE_SUFFIX_MAPPING
+
+
+def get_export_filename(request: Request, file_type: str, content_encoding: Optional[str] = None) -> str:
+    """
+    Возвращает имя файла выгрузки в кэше: версия данных, хэш параметров запроса, тип файла и способ сжатия.
+
+    Версия данных изменяется при любом изменении записей о транспортных средствах (см. utils.cache),
+    поэтому файл с устаревшими данными не может быть найден по имени.
+    """
+    digest = hashlib.sha1(repr(get_query_parameters(request)).encode('utf-8')).hexdigest()
+    filename = f'{get_data_version()}-{digest}.{file_type}'
+    if content_encoding:
+        filename = f'{filename}.{CONTENT_ENCODING_TO_FILE_SUFFIX_MAPPING[content_encoding]}'
+    return filename
+
+
+def get_cached_export(filename: str) -> Optional[str]:
+    """
+    Возвращает путь к файлу выгрузки из кэша или None, если файла нет.
+
+    Время изменения найденного файла обновляется: по нему определяются давно не использованные файлы
+    (см. `evict_exports`).
+    """
+    path = os.path.join(settings.EXPORT_CACHE_DIR, filename)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def cache_export(filename: str, chunks: Iterator, charset: Optional[str] = None) -> Iterator:
+    """
+    Передаёт части файла выгрузки дальше и одновременно записывает их в кэш.
+
+    Файл записывается во временный файл и переносится в кэш только после получения всех частей; если передача
+    прервана (например, клиент закрыл соединение), временный файл удаляется. Строки кодируются в `charset`
+    и передаются дальше уже закодированными, чтобы ответ не кодировал их повторно.
+    """
+    os.makedirs(settings.EXPORT_CACHE_DIR, exist_ok=True)
+    file = tempfile.NamedTemporaryFile(dir=settings.EXPORT_CACHE_DIR, suffix='.tmp', delete=False)
+    try:
+        with file:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode(charset or settings.DEFAULT_CHARSET)
+                file.write(chunk)
+                yield chunk
+        os.replace(file.name, os.path.join(settings.EXPORT_CACHE_DIR, filename))
+    except BaseException:
+        os.remove(file.name)
+        raise
+
+    evict_exports()
+
+
+def evict_exports(max_size: Optional[int] = None):
+    """
+    Удаляет из кэша файлы выгрузки с устаревшей версией данных, а затем - давно не использованные файлы,
+    пока общий размер кэша превышает `max_size` байт.
+    """
+    max_size = settings.EXPORT_CACHE_MAX_SIZE if max_size is None else max_size
+    current_version = str(get_data_version())
+
+    files = []
+    with os.scandir(settings.EXPORT_CACHE_DIR) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            try:
+                if entry.name.split('-', 1)[0] != current_version:
+                    os.remove(entry.path)
+                else:
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            except FileNotFoundError:
+                # Файл уже удалён параллельным запросом
+                continue
+
+    total_size = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+        logging.debug(f'Файл выгрузки {path} удалён из кэша.')
+
+
+def export_file_response(request: Request, path: str, filename: str, content_type: str,
+                         content_encoding: Optional[str] = None) -> HttpResponseBase:
+    """
+    Формирует ответ с файлом выгрузки из кэша.
+
+    Если задан адрес `EXPORT_CACHE_ACCEL_REDIRECT_LOCATION` и запрос получен через nginx (заголовок
+    `X-Sendfile-Type: X-Accel-Redirect`), файл отдаёт nginx по заголовку X-Accel-Redirect,
+    иначе - сервер приложения (uWSGI передаёт файл через sendfile).
+    """
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"', }
+    if content_encoding:
+        headers['Content-Encoding'] = content_encoding
+
+    location = settings.EXPORT_CACHE_ACCEL_REDIRECT_LOCATION
+    if location and request.headers.get('X-Sendfile-Type') == 'X-Accel-Redirect':
+        headers['X-Accel-Redirect'] = f'{location}{os.path.basename(path)}'
+        return HttpResponse(headers=headers, content_type=content_type)
+
+    return FileResponse(open(path, 'rb'), headers=headers, content_type=content_type)
@@ -0,0 +1,124 @@
+import csv
+import logging
+import tempfile
+import time
+from typing import Optional
+
+from django.core.files import File
+from django.utils import timezone
+
+from api.exceptions import VehicleAPIException
+from api.models import ImportJob, IMPORT_JOB_STATUSES_MAPPING, IMPORT_MODES_MAPPING
+from utils.compression import open_decompressed
+from utils.data import parse_vehicles, import_vehicles_batch, upsert_vehicles_batch
+from utils.metrics import IMPORT_ROWS, IMPORT_BATCH_DURATION, IMPORT_JOB_DURATION
+from utils.postgresql import is_copy_import_available, copy_vehicles_batch
+from utils.transactions import immediate_atomic
+
+
+ERRORS_FILE_HEADERS = ['Строка', 'Поле', 'Ошибка']
+
+
+def claim_import_job() -> Optional[ImportJob]:
+    """
+    Выбирает самое раннее ожидающее обработки задание на импорт и переводит его в состояние "Выполняется".
+
+    Смена состояния выполняется условным UPDATE, поэтому одно задание не может быть взято
+    в обработку несколькими обработчиками одновременно.
+    """
+    pending = IMPORT_JOB_STATUSES_MAPPING['pending']
+
+    for job_id in ImportJob.objects.filter(status=pending).order_by('created_at').values_list('id', flat=True)[:10]:
+        claimed = ImportJob.objects.filter(id=job_id, status=pending).update(
+            status=IMPORT_JOB_STATUSES_MAPPING['running'],
+            started_at=timezone.now(),
+        )
+        if claimed:
+            return ImportJob.objects.select_related('created_by').get(id=job_id)
+
+    return None
+
+
+def write_row_errors(writer, errors: dict[int, dict]):
+    """ Записывает ошибки строк в отчёт об ошибках в формате CSV. """
+    for row_number, row_errors in sorted(errors.items()):
+        for field, messages in row_errors.items():
+            for message in messages:
+                writer.writerow([row_number, field, message])
+
+
+def process_import_job(job: ImportJob):
+    """
+    Выполняет задание на импорт: разбирает файл пакетами и сохраняет корректные записи.
+
+    В режиме upsert существующие записи, совпадающие по ключевому полю задания, обновляются.
+    Каждый пакет сохраняется в отдельной транзакции, после чего обновляется прогресс задания.
+    Ошибки строк не прерывают импорт и сохраняются в отчёт об ошибках (CSV).
+    """
+    logging.info(f'Обработка задания на импорт {job.id} ({job.file.name})')
+    started_at = time.perf_counter()
+
+    with tempfile.TemporaryFile(mode='w+', encoding='utf-8', newline='') as errors_file:
+        writer = csv.writer(errors_file, delimiter=';')
+        writer.writerow(ERRORS_FILE_HEADERS)
+
+        try:
+            with job.file.open('rb') as data:
+                # Разбирается файл хранилища, а не FieldFile: pandas определяет двоичный режим по атрибуту mode.
+                # Сжатый файл распаковывается по мере чтения
+                file = open_decompressed(data.file, job.content_encoding)
+                for dataframe in parse_vehicles(job.file_type, file):
+                    batch_started_at = time.perf_counter()
+                    with immediate_atomic():
+                        if is_copy_import_available():
+                            # PostgreSQL: загрузка пакета через COPY во временную таблицу
+                            key = job.key_field if job.mode == IMPORT_MODES_MAPPING['upsert'] else None
+                            imported, updated, unchanged, errors = copy_vehicles_batch(
+                                dataframe, user=job.created_by, key=key,
+                            )
+                        elif job.mode == IMPORT_MODES_MAPPING['upsert']:
+                            imported, updated, unchanged, errors = upsert_vehicles_batch(
+                                dataframe, user=job.created_by, key=job.key_field,
+                            )
+                        else:
+                            imported, errors = import_vehicles_batch(dataframe, user=job.created_by)
+                            updated = unchanged = 0
+                    IMPORT_BATCH_DURATION.observe(time.perf_counter() - batch_started_at)
+
+                    # Скорость импорта - rate(vehicle_manager_import_rows_total[...]) по всем результатам
+                    for result, rows in (('imported', imported), ('updated', updated), ('unchanged', unchanged),
+                                         ('failed', len(errors))):
+                        IMPORT_ROWS.labels(result).inc(rows)
+
+                    write_row_errors(writer, errors)
+                    job.rows_processed += len(dataframe)
+                    job.rows_imported += imported
+                    job.rows_updated += updated
+                    job.rows_unchanged += unchanged
+                    job.rows_failed += len(errors)
+                    job.save(update_fields=[
+                        'rows_processed', 'rows_imported', 'rows_updated', 'rows_unchanged', 'rows_failed',
+                    ])
+
+            job.status = IMPORT_JOB_STATUSES_MAPPING['completed']
+        except VehicleAPIException as e:
+            logging.error(f'Задание на импорт {job.id} завершилось ошибкой: {e}')
+            job.status = IMPORT_JOB_STATUSES_MAPPING['failed']
+            job.message = str(e.detail)
+        except Exception as e:
+            logging.exception(f'Задание на импорт {job.id} завершилось непредвиденной ошибкой: {e}')
+            job.status = IMPORT_JOB_STATUSES_MAPPING['failed']
+            job.message = str(e)
+
+        if job.rows_failed:
+            errors_file.seek(0)
+            job.errors_file.save(f'import_{job.id}_errors.csv', File(errors_file), save=False)
+
+    job.finished_at = timezone.now()
+    job.save()
+    IMPORT_JOB_DURATION.labels(job.status).observe(time.perf_counter() - started_at)
+
+    logging.info(
+        f'Задание на импорт {job.id} обработано: {job.status}, импортировано {job.rows_imported}, '
+        f'ошибок {job.rows_failed}'
+    )
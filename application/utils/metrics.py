@@ -0,0 +1,95 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess
+
+
+# Метрики приложения (префикс vehicle_manager_). Если задана переменная окружения PROMETHEUS_MULTIPROC_DIR,
+# значения каждого процесса (рабочие процессы uWSGI, обработчик заданий) хранятся в файлах этого каталога
+# и суммируются при запросе /metrics
+REQUEST_DURATION = Histogram(
+    'vehicle_manager_request_duration_seconds', 'Время обработки запроса до отправки заголовков ответа, секунд.',
+    ['view', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+REQUEST_DB_QUERIES = Histogram(
+    'vehicle_manager_request_db_queries', 'Количество запросов к БД за время обработки запроса.',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500),
+)
+REQUEST_DB_DURATION = Histogram(
+    'vehicle_manager_request_db_duration_seconds', 'Суммарное время запросов к БД за время обработки запроса, секунд.',
+    ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0),
+)
+IMPORT_ROWS = Counter(
+    'vehicle_manager_import_rows', 'Количество обработанных строк импорта по результату.',
+    ['result'],
+)
+IMPORT_BATCH_DURATION = Histogram(
+    'vehicle_manager_import_batch_duration_seconds', 'Время сохранения пакета строк импорта, секунд.',
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+IMPORT_JOB_DURATION = Histogram(
+    'vehicle_manager_import_job_duration_seconds', 'Время выполнения задания на импорт, секунд.',
+    ['status'],
+    buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0),
+)
+EXPORT_BYTES = Counter(
+    'vehicle_manager_export_bytes', 'Объём отданных файлов выгрузки, байт.',
+    ['file_type', 'source'],
+)
+EXPORT_DURATION = Histogram(
+    'vehicle_manager_export_duration_seconds', 'Время формирования и передачи файла выгрузки, секунд.',
+    ['file_type', 'source'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+DATA_LOG_WRITE_DURATION = Histogram(
+    'vehicle_manager_data_log_write_duration_seconds', 'Время записи пакета записей в лог-таблицу, секунд.',
+    ['source'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+DATA_LOG_RECORDS = Counter(
+    'vehicle_manager_data_log_records', 'Количество записей, сохранённых в лог-таблицу.',
+    ['source'],
+)
+
+# Счётчики запросов к БД текущего запроса к API: [количество, время в секундах].
+# Контекст копируется в потоки sync_to_async, поэтому учитываются и запросы асинхронных представлений
+request_queries: ContextVar[Optional[list]] = ContextVar('request_queries', default=None)
+
+
+def generate_metrics() -> bytes:
+    """ Формирует текст метрик в формате Prometheus; в многопроцессном режиме - суммарно по всем процессам. """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def record_query(execute, sql, params, many, context):
+    """ Обёртка выполнения запросов к БД (execute_wrapper): учитывает запрос в счётчиках текущего запроса к API. """
+    counters = request_queries.get()
+    if counters is None:
+        return execute(sql, params, many, context)
+
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counters[0] += 1
+        counters[1] += time.perf_counter() - started_at
+
+
+def observe_export(chunks: Iterator[bytes], file_type: str, started_at: float) -> Iterator[bytes]:
+    """ Передаёт части файла выгрузки дальше и учитывает их объём и время передачи после получения всех частей. """
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        yield chunk
+
+    EXPORT_BYTES.labels(file_type, 'generated').inc(size)
+    EXPORT_DURATION.labels(file_type, 'generated').observe(time.perf_counter() - started_at)
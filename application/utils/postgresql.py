@@ -0,0 +1,164 @@
+import io
+import logging
+from typing import Optional
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+from pandas import DataFrame
+
+from api.exceptions import VehicleAPIException
+from api.models import Vehicle, DataLog, DATA_OPERATIONS_MAPPING
+from utils.cache import bump_data_version_on_commit
+from utils.data import (
+    FileHeadersEnum, UNIQUE_VEHICLE_FIELDS, BULK_BATCH_SIZE, validate_vehicles_dataframe, check_vehicles_uniqueness,
+    dataframe_errors_to_dict, import_vehicles_batch, upsert_vehicles_batch,
+)
+from utils.metrics import DATA_LOG_RECORDS
+
+
+# Константы
+STAGING_TABLE = 'vehicle_import_staging'
+
+
+def is_copy_import_available() -> bool:
+    """ Проверяет, поддерживает ли используемая СУБД пакетную загрузку через COPY (PostgreSQL). """
+    return connection.vendor == 'postgresql'
+
+
+def copy_to_staging_table(cursor, dataframe: DataFrame):
+    """
+    Создаёт временную таблицу `STAGING_TABLE` (удаляется при завершении транзакции) и загружает в неё
+    строки DataFrame одной командой `COPY FROM STDIN` в формате CSV.
+    """
+    fields = [item.name for item in FileHeadersEnum]
+    columns = ', '.join(
+        f'{Vehicle._meta.get_field(field).column} {Vehicle._meta.get_field(field).db_type(connection)}'
+        for field in fields
+    )
+    cursor.execute(f'CREATE TEMPORARY TABLE {STAGING_TABLE} (row_number bigint, {columns}) ON COMMIT DROP')
+
+    buffer = io.StringIO()
+    dataframe[fields].to_csv(buffer, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(f'COPY {STAGING_TABLE} FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def get_log_operations(key: Optional[str] = None) -> dict[bool, tuple[str, str]]:
+    """ Возвращает операцию и описание записи лог-таблицы для созданных (True) и изменённых (False) записей. """
+    if key is None:
+        created = (DATA_OPERATIONS_MAPPING['import'], 'Импортированы данные о транспортном средстве.')
+        return {True: created, False: created}
+    return {
+        True: (DATA_OPERATIONS_MAPPING['add'], 'Создана запись о транспортном средстве при импорте.'),
+        False: (DATA_OPERATIONS_MAPPING['modify'], 'Изменена запись о транспортном средстве при импорте.'),
+    }
+
+
+def merge_staging_table(cursor, user: User, key: Optional[str] = None) -> list[tuple[int, str, bool]]:
+    """
+    Переносит записи из временной таблицы в таблицу транспортных средств запросом `INSERT ... ON CONFLICT`
+    и в том же запросе добавляет записи лог-таблицы для созданных и изменённых записей.
+
+    Без ключевого поля записи, значения уникальных полей которых уже есть в базе данных, пропускаются.
+    С ключевым полем `key` существующие записи с тем же значением ключа обновляются, если хотя бы одно поле
+    изменилось. Возвращает идентификатор, значение ключевого поля (VIN без ключевого поля) и признак создания
+    для каждой созданной или изменённой записи.
+    """
+    table = Vehicle._meta.db_table
+    fields = [item.name for item in FileHeadersEnum]
+    columns = [Vehicle._meta.get_field(field).column for field in fields]
+    audit_fields = ('created_at', 'created_by', 'updated_at', 'updated_by', )
+    audit_columns = [Vehicle._meta.get_field(field).column for field in audit_fields]
+    unique_columns = [Vehicle._meta.get_field(field).column for field in UNIQUE_VEHICLE_FIELDS]
+
+    if key is None:
+        conflict = 'ON CONFLICT DO NOTHING'
+    else:
+        updated_columns = [*columns, *audit_columns[2:]]
+        conflict = (
+            f'ON CONFLICT ({Vehicle._meta.get_field(key).column}) DO UPDATE SET '
+            + ', '.join(f'{column} = EXCLUDED.{column}' for column in updated_columns)
+            + f' WHERE ({", ".join(f"{table}.{column}" for column in columns)}) '
+              f'IS DISTINCT FROM ({", ".join(f"EXCLUDED.{column}" for column in columns)})'
+        )
+
+    log_fields = ('created_at', 'created_by', 'operation', 'description', 'vehicle_id', *UNIQUE_VEHICLE_FIELDS)
+    log_columns = [DataLog._meta.get_field(field).column for field in log_fields]
+    operations = get_log_operations(key)
+
+    now = timezone.now()
+    cursor.execute(
+        f'WITH merged AS ('
+        f'INSERT INTO {table} ({", ".join([*audit_columns, *columns])}) '
+        f'SELECT %s, %s, %s, %s, {", ".join(columns)} FROM {STAGING_TABLE} ORDER BY row_number '
+        f'{conflict} RETURNING id, {", ".join(unique_columns)}, xmax = 0 AS inserted'
+        f') '
+        f'INSERT INTO {DataLog._meta.db_table} ({", ".join(log_columns)}) '
+        f'SELECT %s, %s, CASE WHEN inserted THEN %s ELSE %s END, CASE WHEN inserted THEN %s ELSE %s END, '
+        f'id, {", ".join(unique_columns)} FROM merged ORDER BY id '
+        f'RETURNING {DataLog._meta.get_field("vehicle_id").column}, '
+        f'{DataLog._meta.get_field(key or "vin").column}, {DataLog._meta.get_field("description").column} = %s',
+        [
+            now, user.id, now, user.id,
+            now, user.id, operations[True][0], operations[False][0], operations[True][1], operations[False][1],
+            operations[True][1],
+        ],
+    )
+    return cursor.fetchall()
+
+
+def copy_vehicles_batch(dataframe: DataFrame, user: User, key: Optional[str] = None,
+                        batch_size: int = BULK_BATCH_SIZE) -> tuple[int, int, int, dict]:
+    """
+    Проверяет пакет данных о транспортных средствах и сохраняет корректные записи на PostgreSQL через COPY.
+
+    Проверенные строки загружаются во временную таблицу (`copy_to_staging_table`) и переносятся в таблицу
+    транспортных средств вместе с записями лог-таблицы одним запросом (`merge_staging_table`), вместо пакетов
+    `bulk_create`/`bulk_update`.
+    Без ключевого поля записи только создаются, с ключевым полем `key` - создаются и обновляются (режим upsert).
+    Если параллельное изменение данных нарушило уникальность, пакет сохраняется обычным способом.
+    Возвращает количество созданных, обновлённых и пропущенных записей и словарь ошибок.
+    """
+    logging.debug(f'copy_vehicles_batch({len(dataframe)=}, {key=})')
+
+    cleaned, errors = validate_vehicles_dataframe(dataframe)
+    if key is not None:
+        # Значения остальных уникальных полей, принадлежащие другим записям, нарушили бы ограничение уникальности
+        check_vehicles_uniqueness(cleaned, errors, key=key)
+    valid = cleaned[~errors.notna().any(axis=1)]
+
+    merged = []
+    try:
+        if not valid.empty:
+            with transaction.atomic(), connection.cursor() as cursor:
+                copy_to_staging_table(cursor, valid)
+                merged = merge_staging_table(cursor, user, key=key)
+                cursor.execute(f'DROP TABLE {STAGING_TABLE}')
+    except IntegrityError as e:
+        logging.warning(f'Пакетная загрузка через COPY невозможна, пакет сохраняется обычным способом: {e}')
+        if key is None:
+            imported, row_errors = import_vehicles_batch(dataframe, user=user, batch_size=batch_size)
+            return imported, 0, 0, row_errors
+        return upsert_vehicles_batch(dataframe, user=user, key=key, batch_size=batch_size)
+    except DatabaseError as e:
+        error_message = f'При попытке записать данные о транспортных средствах возникла ошибка: {e}'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    # Без ключевого поля строки, не попавшие в таблицу, повторяют существующие значения уникальных полей
+    if key is None:
+        skipped = cleaned.index.isin(valid.index) & ~cleaned['vin'].isin([value for _, value, _ in merged])
+        if skipped.any():
+            check_vehicles_uniqueness(cleaned[skipped], errors)
+
+    # Записи сохранены в обход ORM (сигналы post_save не отправляются) - сбросить кэш ответов API явно
+    if merged:
+        bump_data_version_on_commit()
+        # Записи лог-таблицы сохранены тем же запросом, время их записи отдельно не измеряется
+        DATA_LOG_RECORDS.labels('copy').inc(len(merged))
+
+    imported = sum(1 for _, _, inserted in merged if inserted)
+    updated = len(merged) - imported
+    unchanged = len(valid) - len(merged) if key is not None else 0
+    return imported, updated, unchanged, dataframe_errors_to_dict(errors[errors.notna().any(axis=1)])
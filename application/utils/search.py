@@ -0,0 +1,183 @@
+import logging
+from contextlib import nullcontext
+from functools import reduce
+from operator import and_, or_
+
+from django.db import DatabaseError, connection, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import Q
+
+from api.models import Vehicle
+
+
+# Константы
+SEARCH_FIELDS = ('make', 'model', 'color', 'registration_number', 'vin', )
+SEARCH_TABLE = f'{Vehicle._meta.db_table}_search'
+SEARCH_RESULTS_LIMIT = 1000     # Максимальное количество найденных записей
+TRIGRAM_LENGTH = 3              # Слова короче триграммы ищутся без использования индекса
+
+
+def split_search_query(query: str) -> list[str]:
+    """ Разбивает строку поиска на слова. Повторяющиеся слова (без учёта регистра) исключаются. """
+    words = dict()
+    for word in query.split():
+        words.setdefault(word.upper(), word)
+    return list(words.values())
+
+
+def escape_like(value: str) -> str:
+    """ Экранирует служебные символы шаблона LIKE. """
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def get_search_expression() -> str:
+    """ Возвращает SQL-выражение, по которому ищутся записи на PostgreSQL (и по которому построен индекс). """
+    columns = " || ' ' || ".join(f'"{Vehicle._meta.get_field(field).column}"' for field in SEARCH_FIELDS)
+    return f'UPPER({columns})'
+
+
+def create_sqlite_search_index(connection: BaseDatabaseWrapper):
+    """
+    Создаёт на SQLite полнотекстовый индекс FTS5 (токенизатор trigram) по полям `SEARCH_FIELDS`.
+
+    Индекс поддерживается триггерами таблицы транспортных средств, поэтому обновляется при любом изменении данных,
+    включая пакетные `bulk_create`/`bulk_update` и удаление. Если триггеров нет (индекс создаётся впервые
+    или таблица была пересоздана миграцией), индекс строится заново по всем записям.
+    """
+    table = Vehicle._meta.db_table
+    columns = [Vehicle._meta.get_field(field).column for field in SEARCH_FIELDS]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    triggers = {
+        f'{SEARCH_TABLE}_insert': f'AFTER INSERT ON {table} BEGIN '
+                                  f'INSERT INTO {SEARCH_TABLE}(rowid, {column_list}) VALUES (new.id, {new_values}); '
+                                  f'END',
+        f'{SEARCH_TABLE}_delete': f'AFTER DELETE ON {table} BEGIN '
+                                  f'INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {column_list}) '
+                                  f"VALUES ('delete', old.id, {old_values}); "
+                                  f'END',
+        f'{SEARCH_TABLE}_update': f'AFTER UPDATE OF {column_list} ON {table} BEGIN '
+                                  f'INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {column_list}) '
+                                  f"VALUES ('delete', old.id, {old_values}); "
+                                  f'INSERT INTO {SEARCH_TABLE}(rowid, {column_list}) VALUES (new.id, {new_values}); '
+                                  f'END',
+    }
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [table])
+        if set(triggers) <= {name for name, in cursor.fetchall()}:
+            return
+
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+                f"{column_list}, content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+        except DatabaseError as e:
+            logging.warning(f'Не удалось создать полнотекстовый индекс (требуется SQLite 3.34 или новее): {e}')
+            return
+
+        for name, definition in triggers.items():
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {definition}')
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+    logging.info(f'Полнотекстовый индекс {SEARCH_TABLE} создан.')
+
+
+def create_postgresql_search_index(connection: BaseDatabaseWrapper):
+    """
+    Создаёт на PostgreSQL триграммный GIN-индекс по выражению поиска (см. `get_search_expression`).
+
+    Если расширение pg_trgm недоступно, индекс не создаётся, а поиск выполняется без индекса.
+    """
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS vehicle_search_trgm_idx ON "{Vehicle._meta.db_table}" '
+                f'USING gin (({get_search_expression()}) gin_trgm_ops)'
+            )
+    except DatabaseError as e:
+        logging.warning(f'Не удалось создать индекс для поиска (требуется расширение pg_trgm): {e}')
+
+
+def search_sqlite(words: list[str], limit: int) -> list[int]:
+    """
+    Ищет записи по индексу FTS5.
+
+    Слова не короче триграммы ищутся по индексу (MATCH) с сортировкой по релевантности (bm25), более короткие -
+    по вхождению подстроки в любое из полей. Оператор LIKE в SQLite не учитывает регистр только для латиницы,
+    поэтому короткие слова ищутся в нескольких вариантах написания.
+    """
+    long_words = [word for word in words if len(word) >= TRIGRAM_LENGTH]
+    short_words = [word for word in words if len(word) < TRIGRAM_LENGTH]
+
+    conditions, params = [], []
+    if long_words:
+        conditions.append(f'{SEARCH_TABLE} MATCH %s')
+        params.append(' '.join('"{}"'.format(word.replace('"', '""')) for word in long_words))
+
+    for word in short_words:
+        variants = sorted({word, word.upper(), word.lower(), word.capitalize()})
+        conditions.append('(' + ' OR '.join(
+            f"{field} LIKE %s ESCAPE '\\'" for field in SEARCH_FIELDS for _ in variants
+        ) + ')')
+        params.extend(f'%{escape_like(variant)}%' for _ in SEARCH_FIELDS for variant in variants)
+
+    order_by = 'rank, rowid' if long_words else 'rowid'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {" AND ".join(conditions)} ORDER BY {order_by} LIMIT %s',
+            [*params, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_postgresql(words: list[str], limit: int) -> list[int]:
+    """ Ищет записи по вхождению каждого слова (триграммный индекс) с сортировкой по сходству со строкой поиска. """
+    expression = get_search_expression()
+    conditions = ' AND '.join(f'{expression} LIKE %s' for _ in words)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT id FROM "{Vehicle._meta.db_table}" WHERE {conditions} '
+            f'ORDER BY word_similarity(%s, {expression}) DESC, id LIMIT %s',
+            [*(f'%{escape_like(word.upper())}%' for word in words), ' '.join(words).upper(), limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_orm(words: list[str], limit: int) -> list[int]:
+    """ Ищет записи по вхождению каждого слова в любое из полей без использования индекса. """
+    conditions = [
+        reduce(or_, (Q(**{f'{field}__icontains': word}) for field in SEARCH_FIELDS))
+        for word in words
+    ]
+    return list(Vehicle.objects.filter(reduce(and_, conditions)).order_by('id').values_list('id', flat=True)[:limit])
+
+
+def search_vehicle_ids(query: str, limit: int = SEARCH_RESULTS_LIMIT) -> list[int]:
+    """
+    Возвращает идентификаторы транспортных средств, найденных по строке поиска, в порядке релевантности.
+
+    Запись найдена, если каждое слово строки поиска входит (без учёта регистра) в марку, модель, цвет,
+    регистрационный номер или VIN. Если индекс для используемой СУБД недоступен, поиск выполняется без индекса.
+    """
+    words = split_search_query(query)
+    if not words:
+        return []
+
+    # Чтение выполняется без транзакции. Внутри транзакции ошибка запроса откатывается к точке сохранения,
+    # чтобы выполнить поиск без индекса в той же транзакции
+    savepoint = transaction.atomic() if connection.in_atomic_block else nullcontext()
+    try:
+        with savepoint:
+            match connection.vendor:
+                case 'sqlite':
+                    return search_sqlite(words, limit)
+                case 'postgresql':
+                    return search_postgresql(words, limit)
+    except DatabaseError as e:
+        logging.warning(f'Поиск по индексу недоступен, выполняется поиск без индекса: {e}')
+
+    return search_orm(words, limit)
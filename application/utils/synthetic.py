@@ -0,0 +1,144 @@
+import datetime
+import random
+import string
+
+from api.models import FIRST_CAR_MANUFACTURE_YEAR, VIN_LENGTH
+from utils.validators import get_current_year
+
+
+# Константы
+VIN_ALPHABET = ''.join(char for char in string.ascii_uppercase + string.digits if char not in 'IOQ')
+REGISTRATION_NUMBER_LETTERS = 'АВЕКМНОРСТУХ'
+SYNTHETIC_MAKES = {
+    'Audi': ['A4', 'A6', 'Q5', 'Q7'],
+    'BMW': ['X5', 'M5', '320i', '530d'],
+    'Hyundai': ['Creta', 'Solaris', 'Tucson'],
+    'KIA': ['Cerato', 'Rio', 'Sportage'],
+    'Lada': ['Granta', 'Vesta', 'Niva'],
+    'Toyota': ['Camry', 'Corolla', 'RAV4'],
+    'Volkswagen': ['Polo', 'Tiguan', 'Passat'],
+}
+SYNTHETIC_COLORS = ['Белый', 'Чёрный', 'Серебристый', 'Серый', 'Синий', 'Красный', 'Зелёный', 'Голубой']
+
+# Реалистичные значения (см. generate_fleet)
+FLEET_WMI_MAPPING = {       # Код производителя (первые три символа VIN)
+    'Audi': 'WAU',
+    'BMW': 'WBA',
+    'Hyundai': 'KMH',
+    'KIA': 'KNA',
+    'Lada': 'XTA',
+    'Toyota': 'JTD',
+    'Volkswagen': 'WVW',
+}
+VIN_TRANSLITERATION = {
+    **{str(digit): digit for digit in range(10)},
+    **dict(zip('ABCDEFGH', range(1, 9))), **dict(zip('JKLMN', range(1, 6))), 'P': 7, 'R': 9,
+    **dict(zip('STUVWXYZ', range(2, 10))),
+}
+VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+VIN_YEAR_CODES = 'ABCDEFGHJKLMNPRSTVWXY123456789'     # Код модельного года (10-й символ VIN), цикл 30 лет с 1980
+VIN_YEAR_CODES_START = 1980
+REGISTRATION_REGIONS = (
+    77, 97, 99, 177, 197, 199, 777, 797, 799, 50, 90, 150, 190, 750, 78, 98, 178, 198, 47, 16, 116, 716, 66, 96, 196,
+    54, 154, 23, 93, 123, 193, 2, 102, 702, 52, 152, 63, 163, 61, 161,
+)
+REGISTRATION_NUMBER_CAPACITY = 999 * len(REGISTRATION_NUMBER_LETTERS) ** 3 * len(REGISTRATION_REGIONS)
+VIN_SERIAL_CAPACITY = len(VIN_ALPHABET) * 10 ** 6
+FLEET_CAPACITY = min(REGISTRATION_NUMBER_CAPACITY, VIN_SERIAL_CAPACITY, 10 ** 8)
+FLEET_SCRAMBLE_MULTIPLIER = 2_654_435_761     # Взаимно простое с FLEET_CAPACITY: перемешивает номера без повторений
+FLEET_SCRAMBLE_OFFSET = 7_654_321
+
+
+def generate_vehicles(count: int, seed: int = 0, prefix: str = '') -> list[dict]:
+    """
+    Генерирует список синтетических записей о транспортных средствах.
+
+    Значения уникальных полей (регистрационный номер, VIN, номер СТС) строятся из порядкового номера записи,
+    поэтому уникальны в пределах одного вызова. `prefix` позволяет отличать записи разных вызовов.
+    """
+    generator = random.Random(seed)
+    current_year = get_current_year()
+    makes = list(SYNTHETIC_MAKES)
+
+    vehicles = []
+    for number in range(count):
+        make = generator.choice(makes)
+        year_of_manufacture = generator.randint(max(FIRST_CAR_MANUFACTURE_YEAR, current_year - 30), current_year)
+        serial = f'{prefix}{number:012d}'
+        random_part = ''.join(generator.choices(VIN_ALPHABET, k=VIN_LENGTH - len(serial)))
+
+        vehicles.append({
+            'make': make,
+            'model': generator.choice(SYNTHETIC_MAKES[make]),
+            'color': generator.choice(SYNTHETIC_COLORS),
+            'registration_number': f'{generator.choice(REGISTRATION_NUMBER_LETTERS)}{serial}',
+            'year_of_manufacture': year_of_manufacture,
+            'vin': f'{random_part}{serial}'[-VIN_LENGTH:],
+            'vehicle_certificate_number': f'{generator.randint(10, 99)} {serial}',
+            'vehicle_certificate_date': datetime.date(year_of_manufacture, 1, 1) + datetime.timedelta(
+                days=generator.randint(0, 364),
+            ),
+        })
+
+    return vehicles
+
+
+def get_vin_check_digit(vin: str) -> str:
+    """ Вычисляет контрольный символ VIN (9-й символ) по ISO 3779. """
+    remainder = sum(VIN_TRANSLITERATION[char] * weight for char, weight in zip(vin, VIN_WEIGHTS)) % 11
+    return 'X' if remainder == 10 else str(remainder)
+
+
+def generate_fleet(count: int, start: int = 0, seed: int = 0) -> list[dict]:
+    """
+    Генерирует реалистичные записи о транспортных средствах с порядковыми номерами `start` ... `start + count - 1`.
+
+    Регистрационный номер имеет вид `А123ВС77`, номер СТС - `77 01 123456`, VIN содержит код производителя,
+    код модельного года и верный контрольный символ. Уникальные поля однозначно вычисляются из порядкового номера
+    (номера перемешиваются, чтобы соседние записи не отличались одним символом), поэтому флот произвольного
+    размера (до `FLEET_CAPACITY` записей) можно формировать частями с разными `start` без повторений.
+    """
+    if start < 0 or start + count > FLEET_CAPACITY:
+        raise ValueError(f'Порядковые номера записей должны находиться в пределах 0 ... {FLEET_CAPACITY - 1}.')
+
+    generator = random.Random(f'{seed}:{start}')
+    current_year = get_current_year()
+    today = datetime.date.today()
+    makes = list(SYNTHETIC_MAKES)
+    letters = REGISTRATION_NUMBER_LETTERS
+
+    vehicles = []
+    for number in range(start, start + count):
+        key = (number * FLEET_SCRAMBLE_MULTIPLIER + FLEET_SCRAMBLE_OFFSET) % FLEET_CAPACITY
+        make = generator.choice(makes)
+        year_of_manufacture = generator.randint(current_year - 25, current_year)
+
+        # Регистрационный номер: цифры, три буквы серии и код региона
+        digits, rest = key % 999 + 1, key // 999
+        series, rest = rest % len(letters) ** 3, rest // len(letters) ** 3
+        region = REGISTRATION_REGIONS[rest % len(REGISTRATION_REGIONS)]
+        series_letters = [letters[series // len(letters) ** power % len(letters)] for power in (2, 1, 0)]
+        registration_number = f'{series_letters[0]}{digits:03d}{series_letters[1]}{series_letters[2]}{region}'
+
+        # VIN: код производителя, описательная часть, контрольный символ, модельный год, завод и серийный номер
+        descriptor = ''.join(generator.choices(VIN_ALPHABET, k=5))
+        year_code = VIN_YEAR_CODES[(year_of_manufacture - VIN_YEAR_CODES_START) % len(VIN_YEAR_CODES)]
+        plant = VIN_ALPHABET[key // 10 ** 6 % len(VIN_ALPHABET)]
+        vin = f'{FLEET_WMI_MAPPING[make]}{descriptor}0{year_code}{plant}{key % 10 ** 6:06d}'
+        vin = f'{vin[:8]}{get_vin_check_digit(vin)}{vin[9:]}'
+
+        certificate_date = datetime.date(year_of_manufacture, 1, 1) + datetime.timedelta(
+            days=generator.randint(0, 364),
+        )
+        vehicles.append({
+            'make': make,
+            'model': generator.choice(SYNTHETIC_MAKES[make]),
+            'color': generator.choice(SYNTHETIC_COLORS),
+            'registration_number': registration_number,
+            'year_of_manufacture': year_of_manufacture,
+            'vin': vin,
+            'vehicle_certificate_number': f'{region % 100:02d} {key // 10 ** 6:02d} {key % 10 ** 6:06d}',
+            'vehicle_certificate_date': min(certificate_date, today),
+        })
+
+    return vehicles
@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+
+
+@contextmanager
+def immediate_atomic(using: Optional[str] = None):
+    """
+    Транзакция записи: аналог `transaction.atomic` (контекстный менеджер или декоратор `@immediate_atomic()`).
+
+    На SQLite с профилем performance (см. `SQLITE_IMMEDIATE_TRANSACTIONS`) внешняя транзакция начинается командой
+    `BEGIN IMMEDIATE`: блокировка записи получается в начале транзакции с ожиданием `busy_timeout`. Транзакция,
+    начатая командой `BEGIN`, получает её только при первом изменении данных, и если к этому моменту другое
+    соединение уже изменило базу данных, SQLite сразу возвращает ошибку `database is locked`.
+    Только читающий код использует `transaction.atomic` (или работает без транзакции), чтобы не ожидать записи.
+    """
+    connection = transaction.get_connection(using)
+    immediate = (
+        settings.SQLITE_IMMEDIATE_TRANSACTIONS and connection.vendor == 'sqlite' and not connection.in_atomic_block
+    )
+
+    if immediate:
+        connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        if immediate:
+            connection.begin_immediate = False
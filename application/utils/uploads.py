@@ -0,0 +1,213 @@
+import datetime
+import hashlib
+import logging
+import os
+import re
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import Greatest
+from django.http import UnreadablePostError
+from django.utils import timezone
+
+from api.exceptions import VehicleAPIException
+from api.models import ImportJob, ImportUpload, IMPORT_JOB_STATUSES_MAPPING, IMPORT_UPLOAD_STATUSES_MAPPING
+from utils.transactions import immediate_atomic
+
+
+# Константы
+UPLOAD_READ_BLOCK_SIZE = 1024 * 1024    # Размер блока, которым читается тело запроса и файл при подсчёте суммы
+CHECKSUM_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def get_file_checksum(file) -> str:
+    """ Вычисляет SHA-256 содержимого файла, читая его блоками. """
+    digest = hashlib.sha256()
+    for block in iter(lambda: file.read(UPLOAD_READ_BLOCK_SIZE), b''):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def find_duplicate_import_job(user: User, checksum: str, **parameters) -> Optional[ImportJob]:
+    """
+    Возвращает задание пользователя на импорт файла с той же контрольной суммой и теми же параметрами
+    (`file_type`, `content_encoding`, `mode`, `key_field`), если оно ожидает обработки или выполняется.
+
+    Повторная загрузка того же файла, пока предыдущее задание не выполнено, не разбирается заново: клиент получает
+    уже существующее задание. Завершённые задания не учитываются: после них данные могли измениться,
+    и повторный импорт того же файла даёт другой результат.
+    """
+    statuses = [IMPORT_JOB_STATUSES_MAPPING[status] for status in ('pending', 'running')]
+    return ImportJob.objects.select_related('created_by').filter(
+        created_by=user, checksum=checksum, status__in=statuses, **parameters,
+    ).order_by('-created_at').first()
+
+
+def get_upload_path(upload: ImportUpload) -> str:
+    """ Возвращает путь к файлу, в который записываются полученные части загрузки. """
+    return os.path.join(settings.IMPORT_UPLOAD_DIR, f'{upload.id}.part')
+
+
+def parse_content_range(value: str, size: int) -> tuple[int, int]:
+    """
+    Разбирает заголовок `Content-Range: bytes <начало>-<конец>/<размер файла>`.
+
+    Возвращает смещение начала части и её длину.
+    """
+    match = CONTENT_RANGE_PATTERN.match(value.strip())
+    if match is None:
+        error_message = 'Необходимо указать заголовок Content-Range в формате: bytes <начало>-<конец>/<размер файла>'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    start, end, total = (int(group) for group in match.groups())
+    if total != size or start > end or end >= size:
+        error_message = f'Некорректный диапазон {value}: размер загружаемого файла {size} байт.'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    return start, end - start + 1
+
+
+def write_upload_range(upload: ImportUpload, stream, start: int, length: int) -> int:
+    """
+    Записывает часть файла длиной `length` байт из тела запроса `stream` в файл загрузки со смещения `start`.
+
+    Возвращает количество записанных байт: если соединение оборвано, записанная часть сохраняется,
+    и загрузка может быть продолжена с полученного смещения.
+    """
+    if stream is None:
+        # Тело запроса пустое
+        return 0
+
+    path = get_upload_path(upload)
+    os.makedirs(settings.IMPORT_UPLOAD_DIR, exist_ok=True)
+
+    written = 0
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as file:
+        file.seek(start)
+        while written < length:
+            try:
+                block = stream.read(min(UPLOAD_READ_BLOCK_SIZE, length - written))
+            except (UnreadablePostError, OSError) as e:
+                logging.warning(f'Получение части загрузки {upload.id} прервано: {e}')
+                break
+            if not block:
+                break
+            file.write(block)
+            written += len(block)
+
+    return written
+
+
+def record_upload_progress(upload: ImportUpload, received: int) -> bool:
+    """
+    Сохраняет количество полученных байт загрузки одним условным UPDATE вне транзакции.
+
+    Значение только увеличивается, поэтому параллельные запросы с пересекающимися частями не уменьшают его.
+    Возвращает False, если загрузка уже завершена или удалена.
+    """
+    return bool(ImportUpload.objects.filter(id=upload.id, status=IMPORT_UPLOAD_STATUSES_MAPPING['active']).update(
+        received=Greatest('received', received),
+        updated_at=timezone.now(),
+    ))
+
+
+def get_upload_job_file_name(upload: ImportUpload) -> str:
+    """ Возвращает имя файла задания на импорт (относительно хранилища), в который переносится файл загрузки. """
+    filename = f'upload_{upload.id}_{upload.filename}' if upload.filename else f'upload_{upload.id}.{upload.file_type}'
+    return ImportJob._meta.get_field('file').generate_filename(None, filename)
+
+
+def complete_upload(upload: ImportUpload, dedupe: bool = True) -> tuple[ImportJob, bool]:
+    """
+    Завершает загрузку: проверяет контрольную сумму и ставит задание на импорт в очередь.
+
+    Контрольная сумма вычисляется, а файл переносится в хранилище файлов заданий (без копирования) вне транзакции,
+    до создания задания: обработчик заданий не может взять задание, файл которого ещё не перенесён. В транзакции
+    выполняются только завершение загрузки условным UPDATE (из параллельных запросов на завершение задание создаёт
+    один) и создание задания. Если `dedupe` и задание пользователя на импорт файла с той же контрольной суммой
+    и параметрами импорта ещё не выполнено, новое задание не создаётся (см. `find_duplicate_import_job`).
+    Возвращает задание и признак того, что оно создано.
+    """
+    if upload.received < upload.size:
+        error_message = f'Файл загружен не полностью: получено {upload.received} из {upload.size} байт.'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    name = get_upload_job_file_name(upload)
+    job_path = default_storage.path(name)
+    path = get_upload_path(upload)
+    if not os.path.exists(path) and os.path.exists(job_path):
+        # Файл уже перенесён параллельным или прерванным запросом на завершение
+        path = job_path
+
+    try:
+        with open(path, 'rb') as file:
+            checksum = get_file_checksum(file)
+    except FileNotFoundError:
+        error_message = f'Файл загрузки {upload.id} не найден. Передайте файл повторно, начиная с нулевого смещения.'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+    if checksum != upload.checksum:
+        error_message = f'Контрольная сумма загруженного файла {checksum} не совпадает с указанной ' \
+                        f'{upload.checksum}. Передайте файл повторно, начиная с нулевого смещения.'
+        logging.error(error_message)
+        raise VehicleAPIException(error_message)
+
+    if path != job_path:
+        os.makedirs(os.path.dirname(job_path), exist_ok=True)
+        os.replace(path, job_path)
+
+    parameters = dict(
+        file_type=upload.file_type, content_encoding=upload.content_encoding, mode=upload.mode,
+        key_field=upload.key_field,
+    )
+    with immediate_atomic():
+        completed = ImportUpload.objects.filter(id=upload.id, status=IMPORT_UPLOAD_STATUSES_MAPPING['active']).update(
+            status=IMPORT_UPLOAD_STATUSES_MAPPING['completed'],
+            updated_at=timezone.now(),
+        )
+        if not completed:
+            # Загрузка завершена параллельным запросом
+            upload.refresh_from_db()
+            return upload.job, False
+
+        job = find_duplicate_import_job(upload.created_by, checksum, **parameters) if dedupe else None
+        created = job is None
+        if created:
+            job = ImportJob.objects.create(created_by=upload.created_by, file=name, checksum=checksum, **parameters)
+        else:
+            transaction.on_commit(lambda: os.remove(job_path))
+
+        upload.status = IMPORT_UPLOAD_STATUSES_MAPPING['completed']
+        upload.job = job
+        upload.save(update_fields=['job'])
+
+    return job, created
+
+
+def delete_upload(upload: ImportUpload):
+    """ Удаляет загрузку и полученные части файла. """
+    try:
+        os.remove(get_upload_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def delete_expired_uploads() -> int:
+    """ Удаляет незавершённые загрузки, части которых не поступали дольше `IMPORT_UPLOAD_EXPIRATION` секунд. """
+    expired_at = timezone.now() - datetime.timedelta(seconds=settings.IMPORT_UPLOAD_EXPIRATION)
+    uploads = ImportUpload.objects.filter(status=IMPORT_UPLOAD_STATUSES_MAPPING['active'], updated_at__lt=expired_at)
+
+    count = 0
+    for upload in uploads:
+        delete_upload(upload)
+        count += 1
+
+    return count
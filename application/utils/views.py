@@ -1,16 +1,56 @@
 import logging
-from typing import Optional
+import time
+from typing import Any, Callable, Optional
 
-from django.db import DatabaseError
+from django.db import DatabaseError, transaction
 from rest_framework.request import Request
 
-from api.models import DataLog
+from api.exceptions import VehicleAPIException
+from api.models import DataLog, Vehicle
+from utils.datalog import data_log_writer
+from utils.metrics import DATA_LOG_WRITE_DURATION, DATA_LOG_RECORDS
+from utils.transactions import immediate_atomic
+
+
+# Константы
+DATA_LOG_VEHICLE_FIELDS = ('id', 'registration_number', 'vin', 'vehicle_certificate_number', )
+GROUP_BY_FIELDS = ('make', 'model', 'color', 'year_of_manufacture', )
+
+
+def get_vehicle_log_data(vehicle: Vehicle) -> dict:
+    """ Возвращает данные о транспортном средстве, сохраняемые в лог-таблице. """
+    return {field: getattr(vehicle, field) for field in DATA_LOG_VEHICLE_FIELDS}
 
 
 def log_data_modification(vehicle: dict, username: str, operation: str, description: str):
-    """ Сохраняет запись в лог-таблице об изменении данных по транспортному средству. """
-    try:
-        log = DataLog.objects.create(
+    """
+    Сохраняет запись в лог-таблице об изменении данных по транспортному средству.
+
+    Запись передаётся в буфер `data_log_writer` после фиксации текущей транзакции и сохраняется в БД пакетно,
+    не задерживая обработку запроса. При аварийном завершении процесса до записи буфера запись теряется
+    (см. `DataLogWriter`).
+    """
+    log = DataLog(
+        created_by=username,
+        operation=operation,
+        description=description,
+        vehicle_id=vehicle['id'],
+        registration_number=vehicle['registration_number'],
+        vin=vehicle['vin'],
+        vehicle_certificate_number=vehicle['vehicle_certificate_number'],
+    )
+    transaction.on_commit(lambda: data_log_writer.add(log))
+
+
+def bulk_log_data_modification(vehicles: list[dict], username: str, operation: str, description: str,
+                               batch_size: Optional[int] = None):
+    """
+    Сохраняет записи в лог-таблице об изменении данных по нескольким транспортным средствам.
+
+    Записи сохраняются пакетами по `batch_size` штук одним запросом на пакет.
+    """
+    logs = [
+        DataLog(
             created_by=username,
             operation=operation,
             description=description,
@@ -19,13 +59,24 @@ def log_data_modification(vehicle: dict, username: str, operation: str, descript
             vin=vehicle['vin'],
             vehicle_certificate_number=vehicle['vehicle_certificate_number'],
         )
-        log.save()
+        for vehicle in vehicles
+    ]
+
+    started_at = time.perf_counter()
+    try:
+        # Точка сохранения позволяет не прерывать внешнюю транзакцию при ошибке записи в лог
+        with immediate_atomic():
+            DataLog.objects.bulk_create(logs, batch_size=batch_size)
     except DatabaseError as e:
         error_message = f'При попытке записать данные в лог-таблицу возникла ошибка: {e}'
         logging.warning(error_message)
+    else:
+        DATA_LOG_WRITE_DURATION.labels('bulk').observe(time.perf_counter() - started_at)
+        DATA_LOG_RECORDS.labels('bulk').inc(len(logs))
 
 
-def build_field_lookup(request: Request, parameter: str, filtering_method: Optional[str] = None) -> dict:
+def build_field_lookup(request: Request, parameter: str, filtering_method: Optional[str] = None,
+                       normalize: Optional[Callable[[str], Any]] = None) -> dict:
     value = request.query_params.get(parameter)
 
     if value is None:
@@ -34,6 +85,31 @@ def build_field_lookup(request: Request, parameter: str, filtering_method: Optio
         field_lookup_query = f'{parameter}'
         if filtering_method:
             field_lookup_query += f'__{filtering_method}'
+        if normalize:
+            value = normalize(value)
         field_lookup = {field_lookup_query: value}
 
     return field_lookup
+
+
+def get_group_by_fields(request: Request) -> list[str]:
+    """
+    Возвращает поля группировки из параметра запроса `group_by`.
+
+    Поля можно передать через запятую (`?group_by=make,model`) или повторив параметр (`?group_by=make&group_by=model`).
+    """
+    group_by = []
+    for value in request.query_params.getlist('group_by'):
+        for field in value.split(','):
+            field = field.strip()
+            if field and field not in group_by:
+                group_by.append(field)
+
+    unknown_fields = [field for field in group_by if field not in GROUP_BY_FIELDS]
+    if unknown_fields:
+        error_message = f'Группировка по полям {unknown_fields} не поддерживается. ' \
+                        f'Допустимые значения параметра group_by: {list(GROUP_BY_FIELDS)}'
+        logging.error(error_message)
+        raise VehicleAPIException(detail=error_message)
+
+    return group_by
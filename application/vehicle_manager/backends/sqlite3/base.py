@@ -0,0 +1,16 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Бэкенд SQLite, начинающий транзакцию командой `BEGIN IMMEDIATE`, если она открыта
+    `utils.transactions.immediate_atomic` (транзакции записи при профиле performance, см. settings.database).
+    Остальные транзакции, в том числе только читающие, начинаются командой `BEGIN` и не ожидают блокировки записи.
+    """
+    begin_immediate = False
+
+    def _start_transaction_under_autocommit(self):
+        if self.begin_immediate:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -4,6 +4,10 @@ import os
 from pathlib import Path
 
 from settings.base import settings as app_settings, EnvironmentEnum
+from settings.cache import get_cache_configuration
+from settings.database import (
+    get_database_configuration, SQLITE_PROFILES_MAPPING, SQLITE_IMMEDIATE_TRANSACTIONS_PROFILES,
+)
 from settings.logger import LOGGER_CONFIGUARTION
 
 
@@ -48,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,12 +83,28 @@ TEMPLATES = [
 WSGI_APPLICATION = 'vehicle_manager.wsgi.application'
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': get_database_configuration(
+        app_settings.database_url,
+        default_path=BASE_DIR / 'db.sqlite3',
+        conn_max_age=app_settings.database_conn_max_age,
+        statement_timeout=app_settings.database_statement_timeout,
+    ),
 }
 
+# Параметры соединений с SQLite (применяются обработчиком сигнала connection_created, см. api.signals)
+SQLITE_PRAGMAS = SQLITE_PROFILES_MAPPING[app_settings.sqlite_profile]
+SQLITE_IMMEDIATE_TRANSACTIONS = app_settings.sqlite_profile in SQLITE_IMMEDIATE_TRANSACTIONS_PROFILES
+
+CACHES = {
+    'default': get_cache_configuration(
+        app_settings.cache_url,
+        default_location=os.path.join(BASE_DIR, 'media', 'cache'),
+    ),
+}
+
+# Время хранения ответов API в кэше (см. utils.cache)
+RESPONSE_CACHE_TIMEOUT = app_settings.response_cache_timeout
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -113,6 +134,29 @@ STATIC_URL = 'static/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = 'media/'
 
+# Кэш файлов выгрузки (см. utils.export_cache)
+EXPORT_CACHE_DIR = os.path.join(MEDIA_ROOT, 'exports')
+EXPORT_CACHE_MAX_SIZE = app_settings.export_cache_max_size
+EXPORT_CACHE_ACCEL_REDIRECT_LOCATION = app_settings.export_cache_accel_redirect_location
+
+# Загрузка файлов для импорта по частям (см. utils.uploads)
+IMPORT_UPLOAD_DIR = os.path.join(MEDIA_ROOT, 'uploads')
+IMPORT_UPLOAD_EXPIRATION = app_settings.import_upload_expiration
+
+# Библиотека разбора файлов CSV при импорте (см. utils.data.get_csv_engine)
+CSV_IMPORT_ENGINE = app_settings.csv_import_engine
+
+# Количество потоков, выполняющих асинхронные представления на чтение под ASGI (см. utils.asynchronous)
+ASYNC_READ_THREADS = app_settings.async_read_threads
+
+# Метрики Prometheus (см. utils.metrics). prometheus_client определяет многопроцессный режим по переменной окружения
+# PROMETHEUS_MULTIPROC_DIR при импорте, поэтому значение из .env передаётся в окружение до импорта приложений
+PROMETHEUS_MULTIPROC_DIR = app_settings.prometheus_multiproc_dir
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = PROMETHEUS_MULTIPROC_DIR
+METRICS_TOKEN = app_settings.metrics_token
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from api.views.metrics import metrics_view
 from api.views.user import UserViewSet, GroupViewSet
 
 
@@ -12,4 +13,5 @@ router.register(r'groups', GroupViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('api/', include('api.urls')),
+    path('metrics', metrics_view),
 ]